@@ -0,0 +1,723 @@
+import numpy as np
+
+from constants import SimplifiedConsts as SConsts
+
+# Half-widths of the centered averaging windows (in samples), as used by the excel formulas
+FORCE_AVERAGE_WINDOW = 3
+WINDSPEED_AVERAGE_WINDOW = 0
+
+# Averaging windows up to this many samples wide are summed sample by sample, exactly as excel
+# does. Wider windows use a running sum instead, whose cost does not depend on the window.
+EXACT_AVERAGE_MAX_WIDTH = 7
+
+FT_TO_M = 0.3048
+
+# The timestamps are truncated to whole milliseconds, as the data sheet always did, after
+# rounding them to this many decimals of a millisecond. This drops the error of the conversion
+# from seconds, such as 0.3 s being 299.99999999999994 ms, which would lose a millisecond.
+TIME_MS_DECIMALS = 6
+
+# The percentiles of the drag area in the run summaries
+RUN_PERCENTILES = (5, 25, 75, 95)
+
+# Defaults of the run segmentation, see segment_runs
+RUN_HYSTERESIS = 0.2
+RUN_MIN_DURATION_S = 1.0
+RUN_DEBOUNCE_S = 0.5
+
+# The statistics of a log in the meta-analysis, as (key in summarize_log, title)
+META_ANALYSIS_STATISTICS = (('mean_drag_area', "Mean Drag Area [CdSo] (ft^2)"),
+                            ('median_drag_area', "Median Drag Area (ft^2)"),
+                            ('std_drag_area', "Drag Area Std (ft^2)")) +\
+    tuple(('p' + str(percentile) + '_drag_area', "Drag Area P" + str(percentile) + " (ft^2)")
+          for percentile in RUN_PERCENTILES) +\
+    (('sample_count', "Samples Above Thresholds"),
+     ('time_above_threshold_s', "Time Above Thresholds (s)"),
+     ('drag_coeff', "Drag Coefficient (unitless)"),
+     ('drag_coeff_ratio', "Drag Coefficient / TARGET_COEFF_DRAG"),
+     ('run_count', "Runs"))
+
+# The keys of the computed columns, in the same order as the columns in HeaderManager
+COLUMN_KEYS = ('time_ms',
+               'anemometer_raw',
+               'load_cell_raw',
+               'anemometer_calibrated',
+               'load_cell_calibrated',
+               'load_cell_averaged',
+               'anemometer_averaged',
+               'anemometer_ft_s',
+               'target_force',
+               'drag_area',
+               'drag_coeff')
+
+
+def analysis_constants(overrides=None):
+    """
+    Get the numeric values of all constants used by the analysis.
+
+    Parameters
+    ----------
+    overrides: dict=None
+        Values to use instead of the defaults in SimplifiedConsts, keyed by defined name
+
+    Returns
+    -------
+    dict
+        All defined names of SimplifiedConsts mapped to their numeric value
+    """
+    return SConsts().numeric_values(overrides)
+
+
+def centered_average(values, window):
+    """
+    Average every sample with the samples up to window positions before and after it.
+
+    This reproduces the excel AVERAGE over a centered range: near the ends of the data the
+    window is clipped to the samples that exist, and the average is taken over fewer samples.
+    Windows of up to EXACT_AVERAGE_MAX_WIDTH samples are summed in the same left-to-right order as
+    the spreadsheet does. Wider windows are computed from a running sum in O(n), whatever their
+    width, and match the spreadsheet to within rounding.
+
+    Parameters
+    ----------
+    values: numpy.ndarray
+        The samples to be averaged
+    window: int
+        How many samples on each side of the current sample are included
+
+    Returns
+    -------
+    numpy.ndarray
+        The averaged samples, same length as values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if window <= 0 or len(values) == 0:
+        return values.copy()
+
+    count = len(values)
+    idx = np.arange(count)
+    lower = np.maximum(idx - window, 0)
+    upper = np.minimum(idx + window, count - 1)
+
+    if 2 * window + 1 > EXACT_AVERAGE_MAX_WIDTH:
+        # Summed relative to the mean, which keeps the running sum of a long log small
+        offset = values.mean()
+        sums = np.concatenate(([0.0], np.cumsum(values - offset)))
+        return (sums[upper + 1] - sums[lower]) / (upper - lower + 1) + offset
+
+    padded = np.zeros(count + 2 * window)
+    padded[window:window + count] = values
+
+    sums = np.zeros(count)
+    for offset in range(2 * window + 1):
+        sums += padded[offset:offset + count]
+
+    return sums / (upper - lower + 1)
+
+
+def timestamps_ms(time_s):
+    """
+    Convert timestamps to the whole milliseconds of the time column of the data sheet.
+
+    Parameters
+    ----------
+    time_s: array of float
+        The timestamps (s)
+
+    Returns
+    -------
+    numpy.ndarray
+        The timestamps (ms), truncated after rounding to TIME_MS_DECIMALS, as integers
+    """
+    time_ms = np.round(np.asarray(time_s, dtype=np.float64) * 1000, TIME_MS_DECIMALS)
+    return np.trunc(time_ms).astype(np.int64)
+
+
+def compute_derived_columns(time_s, anemometer_raw, load_cell_raw, constants=None,
+                            force_window=FORCE_AVERAGE_WINDOW,
+                            windspeed_window=WINDSPEED_AVERAGE_WINDOW):
+    """
+    Compute every column of the data sheet as whole-array operations.
+
+    The results match what the per-row excel formulas of data_row_formulas evaluate to,
+    including the clipped averaging windows at the ends of the data and the drag area being 0
+    wherever the windspeed is 0. They are identical for averaging windows of up to
+    EXACT_AVERAGE_MAX_WIDTH samples, and equal within rounding for the wider windows, which are
+    averaged with a running sum (see centered_average).
+
+    Parameters
+    ----------
+    time_s: array of float
+        The DAQ timestamps (s)
+    anemometer_raw: array of float
+        The raw anemometer readings (m/s)
+    load_cell_raw: array of float
+        The raw load cell readings (lbf)
+    constants: dict=None
+        Numeric constants as returned by analysis_constants. Default is None, which uses the
+        default values of SimplifiedConsts
+    force_window, windspeed_window: int
+        The half-widths of the centered averaging windows of the force and the windspeed, see
+        centered_average. Default is FORCE_AVERAGE_WINDOW and WINDSPEED_AVERAGE_WINDOW
+
+    Returns
+    -------
+    dict
+        The columns of the data sheet as numpy arrays, keyed by the names in COLUMN_KEYS
+    """
+    if constants is None:
+        constants = analysis_constants()
+
+    time_s = np.asarray(time_s, dtype=np.float64)
+    anemometer_raw = np.asarray(anemometer_raw, dtype=np.float64)
+    load_cell_raw = np.asarray(load_cell_raw, dtype=np.float64)
+
+    columns = {}
+    columns['time_ms'] = timestamps_ms(time_s)
+    columns['anemometer_raw'] = anemometer_raw
+    columns['load_cell_raw'] = load_cell_raw
+
+    columns['anemometer_calibrated'] = anemometer_raw / constants['ANEMOMETER_FACTOR']
+    columns['load_cell_calibrated'] = load_cell_raw / constants['LOAD_CELL_FACTOR']
+
+    columns['load_cell_averaged'] = centered_average(
+        columns['load_cell_calibrated'], force_window)
+    columns['anemometer_averaged'] = centered_average(
+        columns['anemometer_calibrated'], windspeed_window)
+    columns['anemometer_ft_s'] = columns['anemometer_averaged'] / FT_TO_M
+
+    ws_ft_s = columns['anemometer_ft_s']
+    columns['target_force'] = (ws_ft_s ** 2) * constants['AIR_DENSITY_SLG_FT3'] *\
+        constants['TARGET_DRAG_AREA_FT2'] * 0.5
+
+    # Equivalent of the if(ws=0, ,...) guard, where the empty branch evaluates to 0
+    drag_area = np.zeros(len(ws_ft_s))
+    nonzero = ws_ft_s != 0
+    drag_area[nonzero] = (2 * columns['load_cell_averaged'][nonzero]) /\
+        (constants['AIR_DENSITY_SLG_FT3'] * (ws_ft_s[nonzero]) ** 2)
+    columns['drag_area'] = drag_area
+
+    columns['drag_coeff'] = drag_area / constants['NOM_SA_FT2']
+
+    return columns
+
+
+def threshold_mask(columns, constants=None):
+    """
+    Select the samples of a run, as done by the AVERAGEIFS of the meta-analysis.
+
+    Parameters
+    ----------
+    columns: dict
+        The columns as returned by compute_derived_columns
+    constants: dict=None
+        Numeric constants as returned by analysis_constants. Default is None, which uses the
+        default values of SimplifiedConsts
+
+    Returns
+    -------
+    numpy.ndarray
+        True for the samples where both the averaged windspeed is at least WINDSPEED_THRESHOLD
+        and the averaged force is at least FORCE_THRESHOLD
+    """
+    if constants is None:
+        constants = analysis_constants()
+
+    return (columns['anemometer_averaged'] >= constants['WINDSPEED_THRESHOLD']) &\
+        (columns['load_cell_averaged'] >= constants['FORCE_THRESHOLD'])
+
+
+def summarize_run(columns, constants=None, percentiles=RUN_PERCENTILES):
+    """
+    Compute the summary statistics of the drag area of a log over the samples of its run.
+
+    Parameters
+    ----------
+    columns: dict
+        The columns as returned by compute_derived_columns
+    constants: dict=None
+        Numeric constants as returned by analysis_constants. Default is None, which uses the
+        default values of SimplifiedConsts
+    percentiles: tuple of int
+        The percentiles of the drag area that are computed. Default is RUN_PERCENTILES
+
+    Returns
+    -------
+    dict
+        - sample_count: the number of samples of the run, see threshold_mask
+        - time_above_threshold_s: the time (s) from every sample of the run to the next sample
+        - mean_drag_area, median_drag_area, std_drag_area and p<percentile>_drag_area: the
+          statistics of the drag area (ft^2) of the run, where the mean is the value of the
+          AVERAGEIFS of the meta-analysis, and the std is the sample standard deviation
+        - drag_coeff: the mean drag coefficient relative to the nominal surface area
+        - drag_coeff_ratio: the mean drag coefficient relative to TARGET_COEFF_DRAG
+        The statistics are None if the run has no samples.
+    """
+    if constants is None:
+        constants = analysis_constants()
+
+    mask = threshold_mask(columns, constants)
+    time_s = columns['time_ms'] / 1000
+
+    summary = {'sample_count': int(mask.sum()),
+               'time_above_threshold_s': float(np.diff(time_s)[mask[:-1]].sum())}
+    summary.update(_drag_area_statistics(columns['drag_area'][mask], constants, percentiles))
+
+    return summary
+
+
+def _drag_area_statistics(drag_area, constants, percentiles=RUN_PERCENTILES):
+    keys = ['mean_drag_area', 'median_drag_area', 'std_drag_area'] +\
+        ['p' + str(percentile) + '_drag_area' for percentile in percentiles] +\
+        ['drag_coeff', 'drag_coeff_ratio']
+    if len(drag_area) == 0:
+        return dict.fromkeys(keys)
+
+    mean = float(drag_area.mean())
+    values = [mean,
+              float(np.median(drag_area)),
+              float(drag_area.std(ddof=1)) if len(drag_area) > 1 else 0.0]
+    values += np.percentile(drag_area, percentiles).tolist()
+    values += [mean / constants['NOM_SA_FT2'],
+               mean / constants['NOM_SA_FT2'] / constants['TARGET_COEFF_DRAG']]
+
+    return dict(zip(keys, values))
+
+
+def segment_runs(columns, constants=None, hysteresis=RUN_HYSTERESIS,
+                 min_duration_s=RUN_MIN_DURATION_S, debounce_s=RUN_DEBOUNCE_S):
+    """
+    Split a log into its separate runs, in a single vectorized pass.
+
+    A run starts at a sample where both the averaged windspeed and the averaged force reach
+    WINDSPEED_THRESHOLD and FORCE_THRESHOLD, and it only ends once either of them falls below
+    its threshold reduced by the hysteresis, so that noise around the thresholds does not split
+    a run. Runs separated by less than debounce_s are then merged, and runs shorter than
+    min_duration_s (such as a single spike of the load cell) are dropped.
+
+    Parameters
+    ----------
+    columns: dict
+        The columns as returned by compute_derived_columns
+    constants: dict=None
+        Numeric constants as returned by analysis_constants. Default is None, which uses the
+        default values of SimplifiedConsts
+    hysteresis: float
+        The fraction by which the thresholds are reduced to end a run. Default is RUN_HYSTERESIS
+    min_duration_s: float
+        The minimum duration (s) of a run. Default is RUN_MIN_DURATION_S
+    debounce_s: float
+        Runs separated by a shorter gap (s) are merged. Default is RUN_DEBOUNCE_S
+
+    Returns
+    -------
+    list of dict
+        Every run in order, with its start_idx and end_idx (the samples of the run are
+        start_idx:end_idx), start_s, end_s, duration_s, mean_force and peak_force (lbf),
+        mean_drag_area (ft^2) and mean_windspeed_ft_s (ft/s)
+    """
+    if constants is None:
+        constants = analysis_constants()
+
+    windspeed = columns['anemometer_averaged']
+    force = columns['load_cell_averaged']
+    time_s = columns['time_ms'] / 1000
+    if len(time_s) == 0:
+        return []
+
+    enter = (windspeed >= constants['WINDSPEED_THRESHOLD']) &\
+        (force >= constants['FORCE_THRESHOLD'])
+    leave = (windspeed < constants['WINDSPEED_THRESHOLD'] * (1 - hysteresis)) |\
+        (force < constants['FORCE_THRESHOLD'] * (1 - hysteresis))
+
+    # Between the thresholds, every sample keeps the state of the last sample that was outside
+    # of them, which is found with a running maximum of their indices
+    decided = enter | leave
+    last_decided = np.maximum.accumulate(np.where(decided, np.arange(len(decided)), -1))
+    in_run = np.where(last_decided >= 0, enter[np.maximum(last_decided, 0)], False)
+
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], in_run, [False]))))
+    starts, ends = edges[::2], edges[1::2]
+
+    if len(starts) > 1:
+        gaps = time_s[starts[1:]] - time_s[ends[:-1] - 1]
+        merged = gaps < debounce_s
+        starts = np.concatenate((starts[:1], starts[1:][~merged]))
+        ends = np.concatenate((ends[:-1][~merged], ends[-1:]))
+
+    durations = time_s[ends - 1] - time_s[starts]
+    kept = durations >= min_duration_s
+
+    runs = []
+    for start, end, duration in zip(starts[kept], ends[kept], durations[kept]):
+        runs.append({'start_idx': int(start),
+                     'end_idx': int(end),
+                     'start_s': float(time_s[start]),
+                     'end_s': float(time_s[end - 1]),
+                     'duration_s': float(duration),
+                     'mean_force': float(force[start:end].mean()),
+                     'peak_force': float(force[start:end].max()),
+                     'mean_drag_area': float(columns['drag_area'][start:end].mean()),
+                     'mean_windspeed_ft_s': float(windspeed[start:end].mean() / FT_TO_M)})
+
+    return runs
+
+
+def run_segmentation_parameters(run_segmentation=None):
+    """
+    Get every parameter of segment_runs, with the defaults of those that are not given.
+
+    Parameters
+    ----------
+    run_segmentation: dict=None
+        Keyword arguments of segment_runs. Default is None, which uses the default parameters.
+
+    Returns
+    -------
+    dict
+        The hysteresis, min_duration_s and debounce_s of the segmentation
+    """
+    parameters = {'hysteresis': RUN_HYSTERESIS,
+                  'min_duration_s': RUN_MIN_DURATION_S,
+                  'debounce_s': RUN_DEBOUNCE_S}
+    parameters.update(run_segmentation or {})
+
+    return parameters
+
+
+def run_segmentation_config(config):
+    """
+    Get the parameters of segment_runs selected in a configuration.
+
+    Parameters
+    ----------
+    config: dict
+        The configuration, whose RUN_HYSTERESIS, RUN_MIN_DURATION_S and RUN_DEBOUNCE_S are used,
+        see truck_test_rapid_analyzer.execute_complete_analysis
+
+    Returns
+    -------
+    dict
+        The hysteresis, min_duration_s and debounce_s of the segmentation
+    """
+    return {'hysteresis': config.get('RUN_HYSTERESIS', RUN_HYSTERESIS),
+            'min_duration_s': config.get('RUN_MIN_DURATION_S', RUN_MIN_DURATION_S),
+            'debounce_s': config.get('RUN_DEBOUNCE_S', RUN_DEBOUNCE_S)}
+
+
+def summarize_log(columns, run_segmentation=None, constants=None):
+    """
+    Summarize a log, with the statistics of summarize_run and the runs of segment_runs.
+
+    Parameters
+    ----------
+    columns: dict
+        The columns as returned by compute_derived_columns
+    run_segmentation: dict=None
+        Keyword arguments of segment_runs. Default is None, which uses the default parameters.
+    constants: dict=None
+        Numeric constants as returned by analysis_constants. Default is None, which uses the
+        default values of SimplifiedConsts
+
+    Returns
+    -------
+    dict
+        The statistics of summarize_run, along with the list of runs of segment_runs under
+        'runs', their number under 'run_count' and the number of samples of the log under
+        'row_count'
+    """
+    if constants is None:
+        constants = analysis_constants()
+
+    summary = summarize_run(columns, constants)
+    summary['runs'] = segment_runs(columns, constants, **(run_segmentation or {}))
+    summary['run_count'] = len(summary['runs'])
+    summary['row_count'] = len(columns['time_ms'])
+
+    return summary
+
+
+class StreamingSummary():
+    """
+    Summarizes a log from consecutive chunks of its columns, such as those of a
+    StreamingColumnEngine, as summarize_log does for the whole log.
+
+    The runs are segmented as the chunks arrive, and only running totals are kept of them and
+    of the stretches between them, so that runs can still be merged across a short gap at the
+    end. The drag areas of the samples above the thresholds are the only values kept, since
+    their median and percentiles require all of them. The results match summarize_log to
+    within rounding, the sums of the runs being accumulated chunk by chunk.
+    """
+
+    def __init__(self, run_segmentation=None, constants=None):
+        """
+        Parameters
+        ----------
+        run_segmentation: dict=None
+            Keyword arguments of segment_runs. Default is None, which uses the default
+            parameters.
+        constants: dict=None
+            Numeric constants as returned by analysis_constants. Default is None, which uses the
+            default values of SimplifiedConsts
+        """
+        if constants is None:
+            constants = analysis_constants()
+        self.constants = constants
+        self.run_segmentation = run_segmentation_parameters(run_segmentation)
+
+        self.row_count = 0
+        self.sample_count = 0
+        self.time_above_threshold_s = 0.0
+        self._drag_areas = []
+        # The time (s) and threshold mask of the last sample
+        self._last_sample = None
+
+        # Whether the last sample is in a run, and the totals of the stretches of samples that
+        # are in a run or between runs, the last of which is still open
+        self._in_run = False
+        self._stretches = []
+
+    def append(self, columns):
+        """
+        Add the next chunk of columns.
+
+        Parameters
+        ----------
+        columns: dict
+            The columns of consecutive samples, keyed by the names in COLUMN_KEYS
+        """
+        row_count = len(columns['time_ms'])
+        if row_count == 0:
+            return
+
+        mask = threshold_mask(columns, self.constants)
+        time_s = columns['time_ms'] / 1000
+
+        # As in summarize_run, the time from every sample above the thresholds to the next one
+        if self._last_sample is not None and self._last_sample[1]:
+            self.time_above_threshold_s += float(time_s[0] - self._last_sample[0])
+        self.time_above_threshold_s += float(np.diff(time_s)[mask[:-1]].sum())
+        self._last_sample = (float(time_s[-1]), bool(mask[-1]))
+
+        self.sample_count += int(mask.sum())
+        self._drag_areas.append(columns['drag_area'][mask])
+
+        # The same state machine as segment_runs, starting from the state of the last sample
+        windspeed = columns['anemometer_averaged']
+        force = columns['load_cell_averaged']
+        hysteresis = self.run_segmentation['hysteresis']
+        enter = (windspeed >= self.constants['WINDSPEED_THRESHOLD']) &\
+            (force >= self.constants['FORCE_THRESHOLD'])
+        leave = (windspeed < self.constants['WINDSPEED_THRESHOLD'] * (1 - hysteresis)) |\
+            (force < self.constants['FORCE_THRESHOLD'] * (1 - hysteresis))
+
+        decided = enter | leave
+        last_decided = np.maximum.accumulate(np.where(decided, np.arange(row_count), -1))
+        in_run = np.where(last_decided >= 0, enter[np.maximum(last_decided, 0)], self._in_run)
+
+        # Every stretch of the chunk, where the first one continues the last stretch unless the
+        # state changes on the first sample
+        changes = np.flatnonzero(np.diff(np.concatenate(([self._in_run], in_run))))
+        starts = np.unique(np.concatenate(([0], changes)))
+        sums = {key: np.add.reduceat(values, starts) for key, values in
+                (('force', force), ('drag_area', columns['drag_area']),
+                 ('windspeed', windspeed))}
+        peaks = np.maximum.reduceat(force, starts)
+        ends = np.append(starts[1:], row_count)
+        continued = bool(self._stretches) and (len(changes) == 0 or changes[0] != 0)
+
+        for idx, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+            if idx == 0 and continued:
+                stretch = self._stretches[-1]
+            else:
+                stretch = {'in_run': bool(in_run[start]),
+                           'start_idx': self.row_count + start,
+                           'start_s': float(time_s[start]),
+                           'count': 0, 'force': 0.0, 'drag_area': 0.0, 'windspeed': 0.0,
+                           'peak_force': -np.inf}
+                self._stretches.append(stretch)
+
+            stretch['end_idx'] = self.row_count + end
+            stretch['end_s'] = float(time_s[end - 1])
+            stretch['count'] += end - start
+            for key, values in sums.items():
+                stretch[key] += float(values[idx])
+            stretch['peak_force'] = max(stretch['peak_force'], float(peaks[idx]))
+
+        self._in_run = bool(in_run[-1])
+        self.row_count += row_count
+
+    def runs(self):
+        """
+        Get the runs of the samples added so far, see segment_runs.
+
+        Returns
+        -------
+        list of dict
+            Every run in order, with the same keys as those of segment_runs
+        """
+        # Runs separated by less than the debounce time are merged along with the gap between
+        # them, as in segment_runs
+        merged = []
+        gap = None
+        for stretch in self._stretches:
+            if not stretch['in_run']:
+                gap = stretch
+            elif merged and gap is not None and\
+                    stretch['start_s'] - merged[-1]['end_s'] < self.run_segmentation['debounce_s']:
+                merged[-1] = _merge_stretches(_merge_stretches(merged[-1], gap), stretch)
+            else:
+                merged.append(stretch)
+
+        runs = []
+        for run in merged:
+            duration = run['end_s'] - run['start_s']
+            if duration < self.run_segmentation['min_duration_s']:
+                continue
+            runs.append({'start_idx': run['start_idx'],
+                         'end_idx': run['end_idx'],
+                         'start_s': run['start_s'],
+                         'end_s': run['end_s'],
+                         'duration_s': duration,
+                         'mean_force': run['force'] / run['count'],
+                         'peak_force': run['peak_force'],
+                         'mean_drag_area': run['drag_area'] / run['count'],
+                         'mean_windspeed_ft_s': run['windspeed'] / run['count'] / FT_TO_M})
+
+        return runs
+
+    def summary(self):
+        """
+        Get the summary of the samples added so far.
+
+        Returns
+        -------
+        dict
+            The same statistics as summarize_log
+        """
+        drag_area = np.concatenate(self._drag_areas) if self._drag_areas else np.empty(0)
+
+        summary = {'sample_count': self.sample_count,
+                   'time_above_threshold_s': self.time_above_threshold_s}
+        summary.update(_drag_area_statistics(drag_area, self.constants))
+        summary['runs'] = self.runs()
+        summary['run_count'] = len(summary['runs'])
+        summary['row_count'] = self.row_count
+
+        return summary
+
+
+def _merge_stretches(first, second):
+    merged = dict(first, end_idx=second['end_idx'], end_s=second['end_s'],
+                  peak_force=max(first['peak_force'], second['peak_force']))
+    for key in ('count', 'force', 'drag_area', 'windspeed'):
+        merged[key] = first[key] + second[key]
+    return merged
+
+
+def column_rows(columns):
+    """
+    Convert computed columns into spreadsheet rows of native python values.
+
+    Parameters
+    ----------
+    columns: dict
+        The columns as returned by compute_derived_columns
+
+    Returns
+    -------
+    iterator of tuple
+        One tuple per sample, with the values in the order of COLUMN_KEYS
+    """
+    return zip(*(columns[key].tolist() for key in COLUMN_KEYS))
+
+
+class StreamingColumnEngine():
+    """
+    Computes the data sheet columns of a log that is read in consecutive chunks.
+
+    The averaging windows look ahead of the current sample, so the last samples of every chunk
+    are held back until the next chunk (or the end of the log) arrives. A few samples before the
+    held back ones are also kept, so that the windows of the next chunk are complete. The
+    concatenated output of all push() calls and the final finish() call is the output of
+    compute_derived_columns on the whole log: identical for averaging windows of up to
+    EXACT_AVERAGE_MAX_WIDTH samples, and equal within rounding for the wider windows, whose
+    running sums start over in every chunk.
+    """
+
+    def __init__(self, constants=None, force_window=FORCE_AVERAGE_WINDOW,
+                 windspeed_window=WINDSPEED_AVERAGE_WINDOW):
+        """
+        Parameters
+        ----------
+        constants: dict=None
+            Numeric constants as returned by analysis_constants. Default is None, which uses the
+            default values of SimplifiedConsts
+        force_window, windspeed_window: int
+            The averaging windows, see compute_derived_columns
+        """
+        if constants is None:
+            constants = analysis_constants()
+        self.constants = constants
+
+        self.force_window = force_window
+        self.windspeed_window = windspeed_window
+        self.window = max(force_window, windspeed_window)
+
+        self._history = (np.empty(0), np.empty(0), np.empty(0))
+        self._pending = (np.empty(0), np.empty(0), np.empty(0))
+
+    def push(self, time_s, anemometer_raw, load_cell_raw):
+        """
+        Add the next chunk of raw samples.
+
+        Parameters
+        ----------
+        time_s: array of float
+            The DAQ timestamps (s) of the chunk
+        anemometer_raw: array of float
+            The raw anemometer readings (m/s) of the chunk
+        load_cell_raw: array of float
+            The raw load cell readings (lbf) of the chunk
+
+        Returns
+        -------
+        dict
+            The columns of all samples that could be completed, keyed by the names in
+            COLUMN_KEYS. These may be empty.
+        """
+        self._pending = tuple(np.concatenate((pending, np.asarray(new, dtype=np.float64)))
+                              for pending, new in zip(self._pending,
+                                                      (time_s, anemometer_raw, load_cell_raw)))
+        return self._emit(final=False)
+
+    def finish(self):
+        """
+        Complete the samples that are still being held back, at the end of the log.
+
+        Returns
+        -------
+        dict
+            The columns of the remaining samples, keyed by the names in COLUMN_KEYS
+        """
+        return self._emit(final=True)
+
+    def _emit(self, final):
+        history_len = len(self._history[0])
+        buffer = tuple(np.concatenate((history, pending))
+                       for history, pending in zip(self._history, self._pending))
+        buffer_len = len(buffer[0])
+
+        if final:
+            end = buffer_len
+        else:
+            end = max(buffer_len - self.window, history_len)
+
+        columns = compute_derived_columns(*buffer, self.constants, self.force_window,
+                                          self.windspeed_window)
+        columns = {key: col[history_len:end] for key, col in columns.items()}
+
+        self._history = tuple(channel[max(end - self.window, 0):end] for channel in buffer)
+        self._pending = tuple(channel[end:] for channel in buffer)
+
+        return columns
@@ -0,0 +1,262 @@
+import argparse
+import sys
+
+# Only the standard library is imported here, and every command imports what it needs when it is
+# run, so that quick commands such as summary or --help start without loading openpyxl (or numpy).
+
+# The variables of config_variables.py that make up the configuration when no file is given
+CONFIG_VARIABLES = ('USE_HARD_CODED_PATH', 'HARD_CODED_PATH', 'HARD_CODED_OUTPUT',
+                    'FILE_INPUT_HITLIST', 'HITLIST_PATH', 'SINGLE_OUTPUT_FILE',
+                    'SINGLE_OUTPUT_FILE_PATH', 'FILE_SUBDIRECTORY', 'USE_CUSTOM_SHEETNAMES',
+                    'SINGLE_OUTPUT_SHEETNAMES_PATH', 'CONDENSED_EXPORT_VERSION', 'OUTPUT_MODE',
+                    'WRITE_ONLY_EXPORT', 'WORKERS', 'USE_CACHE', 'CACHE_DIRECTORY',
+                    'CACHE_MAX_BYTES', 'INCREMENTAL_UPDATE', 'COLUMNAR_CACHE', 'COLUMNAR_DTYPE',
+                    'CHART_MAX_POINTS', 'CHART_DECIMATION', 'RUN_HYSTERESIS',
+                    'RUN_MIN_DURATION_S', 'RUN_DEBOUNCE_S', 'INSTRUMENTATION',
+                    'INSTRUMENTATION_REPORT_PATH', 'EXPORT_FORMAT', 'LIVE_TAIL_PATH',
+                    'LIVE_POLL_INTERVAL_S', 'LIVE_ROLLING_WINDOW_S', 'LIVE_SUMMARY_PATH',
+                    'LIVE_IDLE_TIMEOUT_S', 'JOB_DATABASE_PATH', 'JOB_POLL_INTERVAL_S',
+                    'JOB_SETTLE_S', 'JOB_MAX_ATTEMPTS', 'JOB_IDLE_TIMEOUT_S',
+                    'FORCE_AVERAGE_WINDOW', 'WINDSPEED_AVERAGE_WINDOW', 'SIGNAL_FILTERS',
+                    'SAMPLE_LIMITS', 'RESAMPLE_RATE_HZ', 'ALIGN_LOGS', 'ALIGN_REFERENCE',
+                    'RESULTS_CATALOG', 'RESULTS_CATALOG_PATH', 'RESULTS_CATALOG_RUNS',
+                    'SHARD_MAX_ROWS', 'SHARD_MAX_BYTES',
+                    'REANALYSIS_OUTPUT_PATH',
+                    'SWEEP_ANEMOMETER_FACTOR', 'SWEEP_LOAD_CELL_FACTOR',
+                    'SWEEP_AIR_DENSITY_KG_M3')
+COMMANDS = ('analyze', 'live', 'batch', 'summary', 'sweep', 'reanalyze')
+
+
+def load_config(config_path=None):
+    """
+    Load the configuration of execute_complete_analysis.
+
+    Parameters
+    ----------
+    config_path: path-format str=None
+        A yaml configuration file. Default is None, which uses the variables of
+        config_variables.py
+
+    Returns
+    -------
+    dict
+        The configuration
+    """
+    if config_path:
+        import yaml
+        with open(config_path) as file:
+            return yaml.load(file, Loader=yaml.FullLoader)
+
+    # Drawing configuration from variables in python script, see config_variables.py for a
+    # detailed description
+    import config_variables
+
+    config = {key: getattr(config_variables, key) for key in CONFIG_VARIABLES}
+    config['SUPPRESS_ALL_PRINTS'] = False
+    return config
+
+
+def summarize_csv(csv_path, run_segmentation=None, pipeline=None):
+    """
+    Compute the meta-analysis statistics of a DAQ log natively, without creating any workbook.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data, including the extension
+    run_segmentation: dict=None
+        Keyword arguments of analysis_engine.segment_runs. Default is None, which uses the
+        default parameters.
+    pipeline: signal_filters.FilterPipeline=None
+        The processing of the samples and the averaging windows. Default is None, which keeps the
+        samples as they are, with the default windows.
+
+    Returns
+    -------
+    dict
+        The summary of analysis_engine.summarize_log
+    """
+    import analysis_engine
+    import daq_log
+
+    log = daq_log.read_log(csv_path, pipeline=pipeline).derive(pipeline)
+    return analysis_engine.summarize_log(log, run_segmentation)
+
+
+def format_summary(csv_path, summary, statistics):
+    """
+    Format a summary of summarize_csv as a table of the meta-analysis statistics.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data
+    summary: dict
+        The summary
+    statistics: tuple of (str, str)
+        The statistics to list, as (key, title), such as analysis_engine.META_ANALYSIS_STATISTICS
+
+    Returns
+    -------
+    str
+        The table, with the file and its number of samples on the first line
+    """
+    lines = [csv_path + " (" + str(summary['row_count']) + " samples)"]
+    for key, title in statistics:
+        value = summary[key]
+        if value is None:
+            value = "-"
+        elif isinstance(value, float):
+            value = format(value, '.6g')
+        lines.append("    " + title.ljust(40) + str(value))
+
+    return "\n".join(lines)
+
+
+def run_analyze(args):
+    config = load_config(args.config_path)
+    if args.no_cache:
+        config['USE_CACHE'] = False
+
+    if 'log' in (config.get('INSTRUMENTATION') or []):
+        import logging
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    # The modes that used to be flags of the analyzer, before they were commands
+    if args.live:
+        import live_analysis
+        live_analysis.run_live_analysis(config)
+    elif args.batch:
+        import job_queue
+        job_queue.run_batch(config)
+    else:
+        import truck_test_rapid_analyzer
+        truck_test_rapid_analyzer.execute_complete_analysis(config)
+
+
+def run_live(args):
+    import live_analysis
+    live_analysis.run_live_analysis(load_config(args.config_path))
+
+
+def run_batch(args):
+    import job_queue
+    job_queue.run_batch(load_config(args.config_path))
+
+
+def run_summary(args):
+    import analysis_engine
+    import signal_filters
+
+    config = load_config(args.config_path)
+    pipeline = signal_filters.create_pipeline(config)
+    run_segmentation = analysis_engine.run_segmentation_config(config)
+
+    summaries = {csv_path: summarize_csv(csv_path, run_segmentation, pipeline)
+                 for csv_path in args.csv_paths}
+
+    if args.json:
+        import json
+        print(json.dumps(summaries, indent=2))
+    else:
+        print("\n".join(format_summary(csv_path, summary,
+                                       analysis_engine.META_ANALYSIS_STATISTICS)
+                        for csv_path, summary in summaries.items()))
+
+
+def run_sweep(args):
+    import sensitivity_sweep
+    sensitivity_sweep.run_sweep(load_config(args.config_path), args.csv_paths)
+
+
+def run_reanalyze(args):
+    import workbook_reanalysis
+    workbook_reanalysis.run_reanalysis(load_config(args.config_path), args.workbook_paths)
+
+
+def create_parser():
+    """Create the argument parser of the command line, with a subparser for every command."""
+    parser = argparse.ArgumentParser(
+        description="Analyze DAQ csv data of recovery truck tests. Without a command, the "
+                    "arguments are those of the analyze command.")
+    commands = parser.add_subparsers(dest='command', metavar='command')
+
+    analyze_parser = commands.add_parser(
+        'analyze', help="analyze the configured files into workbooks (default)")
+    live_parser = commands.add_parser(
+        'live', help="follow a DAQ log while it is being written, see LIVE_TAIL_PATH")
+    batch_parser = commands.add_parser(
+        'batch', help="analyze every log dropped into the FILE_SUBDIRECTORY, "
+                      "see JOB_DATABASE_PATH")
+    for command_parser in (analyze_parser, live_parser, batch_parser):
+        command_parser.add_argument(
+            'config_path', nargs='?',
+            help="yaml configuration file. If not given, config_variables.py is used")
+
+    analyze_parser.add_argument('--no-cache', action='store_true',
+                                help="do not use or update the cache of previously analyzed files")
+    # Kept for the command lines written before the live and batch commands
+    analyze_parser.add_argument('--live', action='store_true', help=argparse.SUPPRESS)
+    analyze_parser.add_argument('--batch', action='store_true', help=argparse.SUPPRESS)
+
+    summary_parser = commands.add_parser(
+        'summary', help="print the meta-analysis statistics of DAQ logs, without any workbook")
+    summary_parser.add_argument('csv_paths', nargs='+', metavar='csv_path',
+                                help="the csv of a DAQ log, including the extension")
+    summary_parser.add_argument('--json', action='store_true',
+                                help="print the full summaries, with the runs, as json")
+    summary_parser.add_argument('--config', dest='config_path',
+                                help="yaml configuration file of the signal filters, averaging "
+                                     "windows and run segmentation. If not given, "
+                                     "config_variables.py is used")
+
+    sweep_parser = commands.add_parser(
+        'sweep', help="evaluate the mean drag area of DAQ logs over a grid of calibration and "
+                      "air density values, see SWEEP_ANEMOMETER_FACTOR")
+    sweep_parser.add_argument('csv_paths', nargs='+', metavar='csv_path',
+                              help="the csv of a DAQ log, including the extension")
+    sweep_parser.add_argument('--config', dest='config_path',
+                              help="yaml configuration file of the grid and signal filters. If "
+                                   "not given, config_variables.py is used")
+
+    reanalyze_parser = commands.add_parser(
+        'reanalyze', help="recompute the statistics of workbooks generated by the analyzer from "
+                          "the samples in their data sheets, see REANALYSIS_OUTPUT_PATH")
+    reanalyze_parser.add_argument('workbook_paths', nargs='+', metavar='workbook_path',
+                                  help="a '___analyzed.xlsx' or single output file")
+    reanalyze_parser.add_argument('--config', dest='config_path',
+                                  help="yaml configuration file of the averaging windows, run "
+                                       "segmentation, workers and export formats. If not given, "
+                                       "config_variables.py is used")
+
+    analyze_parser.set_defaults(func=run_analyze)
+    live_parser.set_defaults(func=run_live)
+    batch_parser.set_defaults(func=run_batch)
+    summary_parser.set_defaults(func=run_summary)
+    sweep_parser.set_defaults(func=run_sweep)
+    reanalyze_parser.set_defaults(func=run_reanalyze)
+    return parser
+
+
+def main(argv=None):
+    """
+    Run the command line.
+
+    Parameters
+    ----------
+    argv: list of str=None
+        The arguments. Default is None, which uses sys.argv
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+
+    # Without a command, such as 'analyzer.py config.yaml', the files are analyzed
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ('-h', '--help')):
+        argv = ['analyze'] + list(argv)
+
+    args = create_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+import synthetic_daq
+import truck_test_rapid_analyzer as analyzer
+
+from instrumentation import peak_rss_mb
+
+DEFAULT_BENCHMARK_ROWS = (10000, 100000, 1000000)
+
+# The stages of execute_analysis that are measured separately. The parse stage is a separate
+# pass over the csv, while write_formula_rows and write_value_rows are the row writing of the
+# formulas and values modes, which happen within populate_data_sheet.
+BENCHMARK_STAGES = ('parse',
+                    'populate_data_sheet',
+                    'write_formula_rows',
+                    'write_value_rows',
+                    'create_graphs',
+                    'space_columns',
+                    'save')
+
+
+class StageTimer():
+    """
+    Accumulates the time spent in each stage, along with the peak memory after it.
+
+    A stage can be entered any number of times, such as once per row, and its times are summed.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    def record(self, stage, seconds):
+        entry = self.stages.setdefault(stage, {'seconds': 0.0, 'calls': 0})
+        entry['seconds'] += seconds
+        entry['calls'] += 1
+        entry['peak_rss_mb'] = peak_rss_mb()
+
+    def wrap(self, stage, func):
+        """
+        Wrap a function so that every call is recorded as the stage.
+
+        Parameters
+        ----------
+        stage: str
+            The name of the stage
+        func: callable
+            The function to be measured
+
+        Returns
+        -------
+        callable
+            The wrapped function
+        """
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+
+        return timed
+
+
+def benchmark_analysis(rows, directory, output_mode=analyzer.OUTPUT_MODE_FORMULAS,
+                       write_only=False, seed=0):
+    """
+    Analyze a synthetic log with execute_analysis, and measure each of its stages.
+
+    The stages are measured by temporarily replacing the functions of the analyzer with timed
+    versions, so that the analysis itself runs exactly as it normally does. This should be run
+    in a fresh process for every log, so that the peak memory belongs to that log alone.
+
+    Parameters
+    ----------
+    rows: int
+        The number of samples of the synthetic log
+    directory: path-format str
+        Where the log and the analysis are written. An existing log of the same size is reused.
+    output_mode: str
+        The output mode of the analysis. Default is OUTPUT_MODE_FORMULAS
+    write_only: bool
+        Whether the workbook is written with the write-only backend. Default is False.
+    seed: int
+        The seed of the synthetic log. Default is 0.
+
+    Returns
+    -------
+    dict
+        The parameters of the benchmark, the time (s), calls and peak memory (MB) of every stage
+        in BENCHMARK_STAGES, the total time, the rows per second and the overall peak memory
+    """
+    input_path = os.path.join(directory, 'synthetic_' + str(rows) + '_' + str(seed))
+    if not os.path.exists(input_path + '.csv'):
+        synthetic_daq.generate_daq_log(input_path + '.csv', rows, seed)
+
+    timer = StageTimer()
+
+    start = time.perf_counter()
+    parse = timer.wrap('parse', lambda: sum(len(chunk[0]) for chunk in
+                                            analyzer.iter_data_chunks(input_path + '.csv')))
+    parse()
+
+    originals = {name: getattr(analyzer, name) for name in BENCHMARK_STAGES[1:-1]}
+    original_save_workbook = analyzer.save_workbook
+
+    try:
+        for name, func in originals.items():
+            setattr(analyzer, name, timer.wrap(name, func))
+        analyzer.save_workbook = timer.wrap('save', original_save_workbook)
+
+        analyzer.execute_analysis(input_path, input_path + '___analyzed.xlsx',
+                                  output_mode=output_mode, write_only=write_only)
+    finally:
+        for name, func in originals.items():
+            setattr(analyzer, name, func)
+        analyzer.save_workbook = original_save_workbook
+
+    total_seconds = time.perf_counter() - start
+
+    return {'rows': rows,
+            'csv_bytes': os.path.getsize(input_path + '.csv'),
+            'output_mode': output_mode,
+            'write_only': write_only,
+            'seed': seed,
+            'stages': {stage: timer.stages[stage] for stage in BENCHMARK_STAGES
+                       if stage in timer.stages},
+            'total_seconds': total_seconds,
+            'rows_per_s': rows / total_seconds,
+            'peak_rss_mb': peak_rss_mb()}
+
+
+def run_benchmarks(rows_list=DEFAULT_BENCHMARK_ROWS, directory=None,
+                   output_mode=analyzer.OUTPUT_MODE_FORMULAS, write_only=False, seed=0):
+    """
+    Benchmark the analysis of synthetic logs of several sizes, each in a fresh process.
+
+    Parameters
+    ----------
+    rows_list: list of int
+        The number of samples of every log. Default is DEFAULT_BENCHMARK_ROWS
+    directory: path-format str
+        Where the logs and analyses are written. Default is None, which uses a temporary
+        directory that is removed afterwards.
+    output_mode, write_only, seed:
+        See benchmark_analysis
+
+    Returns
+    -------
+    dict
+        The environment of the benchmark (python, platform, commit), and the results of
+        benchmark_analysis for every log under 'results'
+    """
+    with tempfile.TemporaryDirectory() as temp_directory:
+        results = []
+        context = multiprocessing.get_context('spawn')
+        for rows in rows_list:
+            with ProcessPoolExecutor(1, mp_context=context) as pool:
+                results.append(pool.submit(benchmark_analysis, rows, directory or temp_directory,
+                                           output_mode, write_only, seed).result())
+
+    return {'python': platform.python_version(),
+            'platform': platform.platform(),
+            'commit': current_commit(),
+            'results': results}
+
+
+def current_commit():
+    """Get the git commit of the analyzer, or None outside of a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)),
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the analyzer on synthetic DAQ logs")
+    parser.add_argument('--rows', type=int, nargs='+', default=list(DEFAULT_BENCHMARK_ROWS),
+                        help="number of samples of every synthetic log")
+    parser.add_argument('--output-mode', default=analyzer.OUTPUT_MODE_FORMULAS,
+                        choices=[analyzer.OUTPUT_MODE_FORMULAS, analyzer.OUTPUT_MODE_VALUES])
+    parser.add_argument('--write-only', action='store_true',
+                        help="write the workbooks with the write-only backend")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--directory',
+                        help="where the logs are kept, so that they are generated only once")
+    parser.add_argument('--json', help="file where the results are written as json")
+    args = parser.parse_args()
+
+    benchmark = run_benchmarks(args.rows, args.directory, args.output_mode, args.write_only,
+                               args.seed)
+
+    for result in benchmark['results']:
+        print(str(result['rows']) + " rows: " + format(result['total_seconds'], '.2f') + " s, " +
+              format(result['rows_per_s'], '.0f') + " rows/s, peak RSS " +
+              str(result['peak_rss_mb']) + " MB")
+        for stage, entry in result['stages'].items():
+            print("    " + stage.ljust(20) + format(entry['seconds'], '8.3f') + " s")
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(benchmark, file, indent=2)
@@ -0,0 +1,138 @@
+import numpy as np
+
+# Decimation methods of a chart series
+DECIMATION_LTTB = 'lttb'
+DECIMATION_MINMAX = 'minmax'
+DECIMATION_NONE = 'none'
+
+DECIMATION_METHODS = (DECIMATION_LTTB, DECIMATION_MINMAX, DECIMATION_NONE)
+
+
+def lttb_indices(x, y, max_points):
+    """
+    Select the points of a series with the Largest-Triangle-Three-Buckets algorithm.
+
+    The series is split into max_points - 2 buckets of equal size, and from every bucket the
+    point forming the largest triangle with the point selected in the previous bucket and the
+    average of the next bucket is kept. The first and last points are always kept. This
+    preserves the visual shape of the series, including its peaks, far better than keeping
+    every n-th point.
+
+    Parameters
+    ----------
+    x: numpy.ndarray
+        The x values of the series, in increasing order
+    y: numpy.ndarray
+        The y values of the series
+    max_points: int
+        The maximum number of points that are kept, at least 3
+
+    Returns
+    -------
+    numpy.ndarray
+        The indices of the kept points, in increasing order
+    """
+    count = len(x)
+    if count <= max_points:
+        return np.arange(count)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bucket edges of the points between the first and the last one
+    edges = np.linspace(1, count - 1, max_points - 1).astype(np.int64)
+
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = count - 1
+
+    selected = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+
+        if bucket + 2 < len(edges):
+            next_start, next_end = end, edges[bucket + 2]
+        else:
+            next_start, next_end = count - 1, count
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+
+        # Twice the area of the triangles, the constant factor does not change the largest
+        areas = np.abs((x[selected] - next_x) * (y[start:end] - y[selected]) -
+                       (x[selected] - x[start:end]) * (next_y - y[selected]))
+
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+
+    return indices
+
+
+def minmax_indices(x, y, max_points):
+    """
+    Select the points of a series by keeping the minimum and maximum of every bucket.
+
+    The series is split into buckets of equal size, and the lowest and highest point of every
+    bucket is kept, so that no extreme value of the series is lost. The first and last points
+    are always kept.
+
+    Parameters
+    ----------
+    x: numpy.ndarray
+        The x values of the series, in increasing order
+    y: numpy.ndarray
+        The y values of the series
+    max_points: int
+        The maximum number of points that are kept, at least 4
+
+    Returns
+    -------
+    numpy.ndarray
+        The indices of the kept points, in increasing order
+    """
+    count = len(x)
+    if count <= max_points:
+        return np.arange(count)
+
+    y = np.asarray(y, dtype=np.float64)
+
+    bucket_count = (max_points - 2) // 2
+    edges = np.linspace(1, count - 1, bucket_count + 1).astype(np.int64)
+
+    indices = [0, count - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            indices.append(start + int(np.argmin(y[start:end])))
+            indices.append(start + int(np.argmax(y[start:end])))
+
+    return np.unique(indices)
+
+
+def decimate(x, y, max_points, method=DECIMATION_LTTB):
+    """
+    Select the points of a series that are kept with a decimation method.
+
+    Parameters
+    ----------
+    x: numpy.ndarray
+        The x values of the series, in increasing order
+    y: numpy.ndarray
+        The y values of the series
+    max_points: int
+        The maximum number of points that are kept
+    method: str
+        One of DECIMATION_METHODS. Default is DECIMATION_LTTB. With DECIMATION_NONE, all points
+        are kept.
+
+    Returns
+    -------
+    numpy.ndarray
+        The indices of the kept points, in increasing order
+    """
+    if method == DECIMATION_LTTB:
+        return lttb_indices(x, y, max(max_points, 3))
+    if method == DECIMATION_MINMAX:
+        return minmax_indices(x, y, max(max_points, 4))
+    if method == DECIMATION_NONE:
+        return np.arange(len(x))
+
+    raise ValueError("Unknown decimation method: " + str(method))
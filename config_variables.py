@@ -33,6 +33,153 @@ SINGLE_OUTPUT_SHEETNAMES_PATH = r"default_target_list_sheetnames.txt"
 # or together in one sheet with both the data and grpahs of that data file (if True)
 CONDENSED_EXPORT_VERSION = True
 
+# Whether the derived data columns are exported as excel formulas ('formulas'), which are only
+# evaluated once the spreadsheet is recalculated, or as values computed by the analyzer itself
+# ('values'), which is much faster for large logs
+OUTPUT_MODE = 'formulas'
+
+# Whether the excel files are streamed to disk while they are written (write-only mode), instead
+# of being built in memory first. This greatly reduces the memory used for long logs.
+WRITE_ONLY_EXPORT = False
+
+# How many files of the hitlist are analyzed in parallel, each in a separate process.
+# 1 analyzes them one after the other.
+WORKERS = 1
+
+# Whether the results of csv files that have not changed since a previous run (with the same
+# constants and settings) are reused instead of being analyzed again. The results are kept in the
+# CACHE_DIRECTORY, so this is off unless it is wanted.
+# This can be overridden for a single run with the --no-cache command-line option.
+USE_CACHE = False
+# Where the results are cached. An empty string uses a '.analysis_cache' folder in the
+# FILE_SUBDIRECTORY
+CACHE_DIRECTORY = ""
+# When the cache becomes larger than this (in bytes), the least recently used results are removed
+CACHE_MAX_BYTES = 1024 ** 3
+
+# If the single output file already exists, whether only the files of the hitlist that are not
+# in it yet are analyzed and added to it, instead of regenerating the whole file
+INCREMENTAL_UPDATE = False
+
+# Whether every csv is converted once to a compact binary columnar file (.daqcol) next to it,
+# which is memory-mapped on later runs instead of parsing the csv again. The file is regenerated
+# automatically whenever the csv changes. This writes a file next to every csv, so it is off
+# unless it is wanted.
+COLUMNAR_CACHE = False
+# The type in which the readings are stored in the columnar files, 'float64' or 'float32'
+# (half the size, at a slight loss of precision)
+COLUMNAR_DTYPE = 'float64'
+
+# If not 0, the charts plot a decimated copy of every series with at most this many points, kept in
+# a hidden sheet, so that workbooks of long logs stay quick to open and scroll. The data sheets
+# always keep the full data. 0 plots the full data directly.
+CHART_MAX_POINTS = 0
+# The decimation method of each chart series: 'lttb', 'minmax' or 'none' (plotted from the full
+# data). Series which are not listed use 'lttb'. The keys are anemometer_raw, load_cell_raw,
+# anemometer_calibrated, load_cell_averaged, target_force and drag_area.
+CHART_DECIMATION = {'load_cell_raw': 'minmax'}
+
+# Every log is split into its separate runs (passes), which are listed in the "Runs" sheet. A run
+# starts when both WINDSPEED_THRESHOLD and FORCE_THRESHOLD are reached, and ends when either falls
+# below its threshold reduced by RUN_HYSTERESIS (a fraction). Runs separated by less than
+# RUN_DEBOUNCE_S seconds are merged, and runs shorter than RUN_MIN_DURATION_S seconds are ignored.
+RUN_HYSTERESIS = 0.2
+RUN_MIN_DURATION_S = 1.0
+RUN_DEBOUNCE_S = 0.5
+
+# Where the wall time, CPU time, rows processed and peak memory of every stage of the analysis are
+# reported: 'log' logs every stage as a json line, and 'json' writes them all to a report file at
+# INSTRUMENTATION_REPORT_PATH (analysis_report.json in the FILE_SUBDIRECTORY if left empty).
+# An empty list measures nothing.
+INSTRUMENTATION = []
+INSTRUMENTATION_REPORT_PATH = ""
+
+# The formats in which the analysis is exported: 'xlsx' for the workbooks, and 'csv', 'npz' or
+# 'columnar' for machine-readable files of the computed columns of every log, along with a
+# 'meta_analysis' table of all logs. Several formats can be listed, and without 'xlsx' no workbook
+# is created at all, which is much quicker.
+EXPORT_FORMAT = ['xlsx']
+
+# Live mode (python truck_test_rapid_analyzer.py live), which follows a DAQ log in the
+# FILE_SUBDIRECTORY while it is being written and shows its results between passes. LIVE_TAIL_PATH
+# is the csv to follow, or the most recently modified csv if left empty. The csv is checked every
+# LIVE_POLL_INTERVAL_S seconds, and the displayed windspeed, force and drag area are averaged over
+# the last LIVE_ROLLING_WINDOW_S seconds. The results are also written to the json file
+# LIVE_SUMMARY_PATH, unless it is left empty. If LIVE_IDLE_TIMEOUT_S is not 0, the live mode stops
+# once the csv has not changed for that long.
+LIVE_TAIL_PATH = ""
+LIVE_POLL_INTERVAL_S = 0.25
+LIVE_ROLLING_WINDOW_S = 5.0
+LIVE_SUMMARY_PATH = ""
+LIVE_IDLE_TIMEOUT_S = 0
+
+# Batch mode (python truck_test_rapid_analyzer.py batch), which keeps analyzing every DAQ log that
+# is dropped into the FILE_SUBDIRECTORY into its own output file, with up to WORKERS logs at once.
+# The logs are queued in the SQLite database JOB_DATABASE_PATH (analysis_jobs.sqlite in the
+# FILE_SUBDIRECTORY if left empty), so that an interrupted batch resumes without analyzing the
+# completed logs again. The folder is checked every JOB_POLL_INTERVAL_S seconds, and a log is only
+# analyzed once it has not changed for JOB_SETTLE_S seconds. A log whose worker dies is attempted up
+# to JOB_MAX_ATTEMPTS times. If JOB_IDLE_TIMEOUT_S is not 0, the batch stops once there was nothing
+# to do for that long.
+JOB_DATABASE_PATH = ""
+JOB_POLL_INTERVAL_S = 2.0
+JOB_SETTLE_S = 2.0
+JOB_MAX_ATTEMPTS = 3
+JOB_IDLE_TIMEOUT_S = 0
+
+# The processing of the samples before they are analyzed. FORCE_AVERAGE_WINDOW and
+# WINDSPEED_AVERAGE_WINDOW are how many samples on each side of a sample are averaged into its force
+# and windspeed (0 does not average). SIGNAL_FILTERS are the filters of the 'anemometer' and
+# 'load_cell' readings, applied in order, e.g. [{'type': 'despike', 'window': 5, 'threshold': 3.0}]
+# with the types 'moving_average' and 'median' (with a 'window'), 'despike' (with a 'window' and
+# 'threshold') and 'ema' (with a 'span'). SAMPLE_LIMITS are the [minimum, maximum] accepted readings
+# of the channels, e.g. {'load_cell': [-50, 500]}, outside of which samples are dropped.
+FORCE_AVERAGE_WINDOW = 3
+WINDSPEED_AVERAGE_WINDOW = 0
+SIGNAL_FILTERS = {'anemometer': [], 'load_cell': []}
+SAMPLE_LIMITS = {}
+
+# If RESAMPLE_RATE_HZ is not 0, the samples are interpolated onto a uniform time grid of this rate
+# (Hz) before they are filtered, so that the averaging windows always cover the same duration. With
+# ALIGN_LOGS, the resampled logs of the hitlist are also placed on a common time grid, and their
+# windspeed, force and drag area compared in a 'Comparison' sheet with overlay charts (or a
+# separate comparison file). ALIGN_REFERENCE is 'start' to compare them from their first sample, or
+# 'run' from the start of their first run.
+RESAMPLE_RATE_HZ = 0
+ALIGN_LOGS = False
+ALIGN_REFERENCE = 'start'
+
+# Whether the summary statistics, parameters and runs of every analyzed file are recorded in a SQLite
+# catalog, which can be queried across campaigns with results_catalog.py. RESULTS_CATALOG_PATH is
+# its path (an empty path uses 'results_catalog.sqlite' in the FILE_SUBDIRECTORY), which several
+# campaigns can share, and RESULTS_CATALOG_RUNS whether the runs of every file are recorded too.
+RESULTS_CATALOG = False
+RESULTS_CATALOG_PATH = ""
+RESULTS_CATALOG_RUNS = True
+
+# The sweep command, which evaluates the mean drag area of DAQ logs over a grid of calibration and
+# air density values, each log being parsed only once. Each is a list of values, or e.g.
+# {'start': 0.6, 'stop': 0.9, 'count': 31} for evenly spaced values, and an empty list only uses the
+# value in the Constants sheet. The grid is every combination of the three.
+SWEEP_ANEMOMETER_FACTOR = []
+SWEEP_LOAD_CELL_FACTOR = []
+SWEEP_AIR_DENSITY_KG_M3 = []
+
+# If not 0, the single output file is split into several workbooks ('___shard1', '___shard2', ...),
+# each with its own Constants sheet and meta-analysis, holding the next files of the hitlist for as
+# long as their data rows (SHARD_MAX_ROWS) and estimated size in bytes (SHARD_MAX_BYTES) fit. The
+# single output file then indexes the shards, with the combined meta-analysis of all of them. With
+# WORKERS, the shards are written in parallel.
+SHARD_MAX_ROWS = 0
+SHARD_MAX_BYTES = 0
+
+# The reanalyze command, which recomputes the statistics of workbooks generated by the analyzer
+# (such as archives whose csv files are lost) from the samples in their data sheets, with the
+# current constants. REANALYSIS_OUTPUT_PATH is where the combined meta-analysis of all of them is
+# written, without the extension of the EXPORT_FORMAT (an empty path uses 'reanalysis' in the
+# FILE_SUBDIRECTORY).
+REANALYSIS_OUTPUT_PATH = ""
+
 # For controlling printouts to console
 DEBUG_MODE = True
 DEBUG_MODE_VERBOSE = False
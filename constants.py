@@ -1,13 +1,4 @@
-from openpyxl import Workbook as WB
-from openpyxl import load_workbook as load_wb
-
-from openpyxl.utils import get_column_letter
-from openpyxl.utils import quote_sheetname as quote
-from openpyxl.utils import absolute_coordinate as abs_coords
-
-from openpyxl.workbook.defined_name import DefinedName as DName
-
-from openpyxl.chart import LineChart, ScatterChart, Reference, Series
+import math
 
 
 class SimplifiedConsts():
@@ -19,6 +10,10 @@ class SimplifiedConsts():
     what order thay are added in, which means that adding and removing variables will be much
     easier. 
 
+    The class may also be created without a target worksheet or workbook, in which case nothing
+    is written to excel and it only serves as the single source of the constant values, which
+    can then be evaluated natively with numeric_values().
+
     """
 
     def __init__(self, target_worksheet=None, target_workbook=None):
@@ -126,28 +121,97 @@ class SimplifiedConsts():
         row = self._next_row_idx
         self._next_row_idx += 1
 
-        # Add the title (descriptor) of the sobject into the first column
-        var_title_loc = 'A' + str(row)
-        self.target_worksheet[var_title_loc] = title
+        if self.target_worksheet is None:
+            return
+
+        # Only needed when writing to a workbook, so that the numeric values do not need openpyxl
+        from openpyxl.utils import absolute_coordinate as abs_coords
+        from xlsx_export import add_defined_name
+
+        # Add the title (descriptor) of the sobject into the first column, followed by the
+        # default value. The row is appended, so that write-only sheets are also supported.
+        row_values = [title, val_default]
 
         # Add the defaul
         var_default_val_location_local = 'B' + str(row)
         var_default_val_location_global = self.target_worksheet.title +\
             "!" + abs_coords(var_default_val_location_local)
-        self.target_worksheet[var_default_val_location_local] = val_default
-        self.target_workbook.defined_names.append(DName(varname_default,
-                                                        attr_text=var_default_val_location_global))
+        add_defined_name(self.target_workbook, varname_default, var_default_val_location_global)
 
         # For utility purposes, add the name : location into a dict
         self.defined_name_dict[varname_default] = var_default_val_location_global
 
         if varname_conv:
             var_conv_val_location_local = 'C' + str(row)
-            self.target_worksheet[var_conv_val_location_local] = val_conv
+            row_values.append(val_conv)
             var_conv_val_location_global = self.target_worksheet.title +\
                 "!" + abs_coords(var_conv_val_location_local)
-            self.target_workbook.defined_names.append(DName(varname_conv,
-                                                            attr_text=var_conv_val_location_global))
+            add_defined_name(self.target_workbook, varname_conv, var_conv_val_location_global)
 
             # For utility purposes, add the name : location into a dict
             self.defined_name_dict[varname_conv] = var_conv_val_location_global
+
+        self.target_worksheet.append(row_values)
+
+    def numeric_values(self, overrides=None):
+        """
+        Evaluate every constant to a float, the same way excel would evaluate the defined names.
+
+        The values in the table may be literals or excel formulas that refer to previously defined
+        names, so they are evaluated in the order that they were added.
+
+        Parameters
+        ----------
+        overrides: dict=None
+            Values to use instead of the ones in the table, keyed by defined name. Constants
+            that depend on an overridden value are evaluated using the override.
+
+        Returns
+        -------
+        dict
+            All defined names mapped to their numeric value
+        """
+        if overrides is None:
+            overrides = {}
+
+        values = {}
+        for var in self.variables_raw:
+            for varname, val in ((var['varname_default'], var['val_default']),
+                                 (var['varname_conv'], var['val_conv'])):
+                if not varname:
+                    continue
+                if varname in overrides:
+                    values[varname] = float(overrides[varname])
+                else:
+                    values[varname] = evaluate_excel_constant(val, values)
+
+        return values
+
+
+def evaluate_excel_constant(value, known_values):
+    """
+    Evaluate a literal or a simple excel formula used in the constants table.
+
+    Only the subset of excel syntax that is used in the constants table is supported, that is
+    arithmetic, '^' for powers, PI() and references to previously defined names.
+
+    Parameters
+    ----------
+    value: str or int or float
+        The literal or excel formula (starting with '=')
+    known_values: dict
+        Previously evaluated defined names, mapped to their numeric value
+
+    Returns
+    -------
+    float
+        The evaluated value
+    """
+    if not (isinstance(value, str) and value.startswith('=')):
+        return float(value)
+
+    expression = value[1:].replace('^', '**').replace('PI()', '_pi')
+    namespace = dict(known_values)
+    namespace['_pi'] = math.pi
+
+    return float(eval(expression, {'__builtins__': {}}, namespace))
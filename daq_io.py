@@ -0,0 +1,675 @@
+import csv
+import json
+import os
+import shutil
+import struct
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+# The header of the csv files exported by the DAQ
+DAQ_HEADER = ['Timestamp', 'ANEMOMETER', 'LOAD CELL']
+
+# The encoding of the csv files, some of which start with a byte order mark
+DAQ_ENCODING = 'utf-8-sig'
+
+# How many samples are parsed at once when reading in chunks
+DEFAULT_CHUNK_ROWS = 65536
+
+# How many bytes of a csv are read and parsed at once by the bulk parser
+DEFAULT_BLOCK_BYTES = 4 * 1024 ** 2
+
+_NEWLINE = ord('\n')
+_CARRIAGE_RETURN = ord('\r')
+_COMMA = ord(',')
+
+
+def iter_daq_rows(csv_path):
+    """
+    Stream the samples of a DAQ csv file one row at a time.
+
+    The file is only read as the rows are consumed, and it is closed as soon as the iteration
+    finishes or the generator is discarded.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data, including the extension
+
+    Yields
+    ------
+    list of float
+        The timestamp (s), anemometer reading (m/s) and load cell reading (lbf) of one sample
+    """
+    with open(csv_path, newline='', encoding=DAQ_ENCODING) as csvfile:
+        csvreader = csv.reader(csvfile, delimiter=',')
+        next(csvreader, None)  # Skipping the header
+
+        for row in csvreader:
+            if not row:  # Blank lines, usually at the end of the file
+                continue
+            yield [float(val) for val in row]
+
+
+def read_daq_header(csv_path):
+    """
+    Read and validate the header of a DAQ csv file.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data, including the extension
+
+    Returns
+    -------
+    list of str
+        The column titles of the header
+
+    Raises
+    ------
+    ValueError
+        If the header is not DAQ_HEADER
+    """
+    with open(csv_path, newline='', encoding=DAQ_ENCODING) as csvfile:
+        header = [title.strip() for title in next(csv.reader(csvfile), [])]
+
+    _check_header(csv_path, header)
+    return header
+
+
+def _check_header(csv_path, header):
+    if header != DAQ_HEADER:
+        raise ValueError(csv_path + " has an unexpected header: " + str(header) +
+                         ", expected " + str(DAQ_HEADER))
+
+
+def parse_daq_block(block, first_line=1, malformed_lines=None):
+    """
+    Parse a block of complete lines of a DAQ csv into a numeric array, without any per-value
+    python calls.
+
+    Every line is checked for exactly three fields by scanning the raw bytes with numpy, and the
+    well-formed lines are then converted all at once. Blank lines are skipped. Lines that do not
+    have three fields, or that contain a field that is not a number, are dropped and reported.
+    A field that is not a number is located by bisecting the block, so a block without any
+    malformed lines is converted in a single call.
+
+    Parameters
+    ----------
+    block: bytes
+        Complete lines of the csv, without the header. A final newline is optional.
+    first_line: int
+        The line number of the first line of the block in the file, used for the reports.
+        Default is 1.
+    malformed_lines: list=None
+        If given, a (line number, line) tuple is appended to it for every malformed line
+
+    Returns
+    -------
+    numpy.ndarray
+        The samples as a float64 array of shape (samples, 3), with the timestamps (s), anemometer
+        readings (m/s) and load cell readings (lbf) as columns
+    """
+    if not block.endswith(b'\n'):
+        block += b'\n'
+
+    buffer = np.frombuffer(block, dtype=np.uint8)
+    ends = np.flatnonzero(buffer == _NEWLINE)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+
+    # Number of commas on every line, from where the line boundaries fall among the commas
+    comma_positions = np.flatnonzero(buffer == _COMMA)
+    commas = np.searchsorted(comma_positions, ends) - np.searchsorted(comma_positions, starts)
+
+    content_ends = ends - (buffer[np.maximum(ends - 1, 0)] == _CARRIAGE_RETURN)
+    blank = content_ends <= starts
+    well_formed = ~blank & (commas == 2)
+
+    if malformed_lines is not None:
+        for line_idx in np.flatnonzero(~blank & ~well_formed):
+            malformed_lines.append((first_line + int(line_idx), _line_text(block, starts, ends,
+                                                                           line_idx)))
+
+    # Every run of consecutive well-formed lines is contiguous in the block
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], well_formed, [False]))))
+    parsed = []
+    for run_start, run_end in zip(edges[::2], edges[1::2]):
+        _parse_run(block, starts, ends, run_start, run_end, first_line, parsed, malformed_lines)
+
+    if not parsed:
+        return np.empty((0, 3))
+    return np.concatenate(parsed)
+
+
+def _parse_run(block, starts, ends, run_start, run_end, first_line, parsed, malformed_lines):
+    line_count = run_end - run_start
+    text = block[starts[run_start]:ends[run_end - 1]].replace(b'\n', b',')
+
+    try:
+        values = np.fromstring(text.decode('ascii'), dtype=np.float64, sep=',')
+    except ValueError:
+        values = None
+
+    if values is not None and len(values) == 3 * line_count:
+        parsed.append(values.reshape(line_count, 3))
+    elif line_count == 1:
+        if malformed_lines is not None:
+            malformed_lines.append((first_line + int(run_start),
+                                    _line_text(block, starts, ends, run_start)))
+    else:
+        middle = run_start + line_count // 2
+        _parse_run(block, starts, ends, run_start, middle, first_line, parsed, malformed_lines)
+        _parse_run(block, starts, ends, middle, run_end, first_line, parsed, malformed_lines)
+
+
+def _line_text(block, starts, ends, line_idx):
+    return block[starts[line_idx]:ends[line_idx]].decode('ascii', 'replace').rstrip('\r')
+
+
+def iter_daq_blocks(csv_path, block_bytes=DEFAULT_BLOCK_BYTES, malformed_lines=None):
+    """
+    Parse a DAQ csv file in large blocks with the bulk parser.
+
+    The header is validated first, and the rest of the file is read block_bytes at a time,
+    cut at the last complete line, and converted with parse_daq_block.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data, including the extension
+    block_bytes: int
+        How many bytes are read at once. Default is DEFAULT_BLOCK_BYTES
+    malformed_lines: list=None
+        If given, a (line number, line) tuple is appended to it for every malformed line.
+        Default is None, which reports the malformed lines with a warning instead.
+
+    Yields
+    ------
+    numpy.ndarray
+        The samples of the block, see parse_daq_block
+
+    Raises
+    ------
+    ValueError
+        If the header is not DAQ_HEADER
+    """
+    read_daq_header(csv_path)
+    report = [] if malformed_lines is None else malformed_lines
+
+    with open(csv_path, 'rb') as file:
+        file.readline()  # Skipping the header
+        line_number = 2
+        remainder = b''
+
+        while True:
+            data = file.read(block_bytes)
+            if not data:
+                break
+
+            block = remainder + data
+            cut = block.rfind(b'\n') + 1
+            block, remainder = block[:cut], block[cut:]
+            if block:
+                yield parse_daq_block(block, line_number, report)
+                line_number += block.count(b'\n')
+
+        if remainder:
+            yield parse_daq_block(remainder, line_number, report)
+
+    if malformed_lines is None and report:
+        warnings.warn(csv_path + ": skipped " + str(len(report)) + " malformed line(s), " +
+                      "the first being line " + str(report[0][0]) + ": " + repr(report[0][1]))
+
+
+def count_daq_lines(csv_path, block_bytes=DEFAULT_BLOCK_BYTES):
+    """
+    Count the lines of a DAQ csv file after its header, without parsing them.
+
+    This is an upper bound of its number of samples, which only differs by the blank and
+    malformed lines.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data, including the extension
+    block_bytes: int
+        How many bytes are read at once. Default is DEFAULT_BLOCK_BYTES
+
+    Returns
+    -------
+    int
+        The number of lines, including a last line without a line break
+    """
+    lines = 0
+    last = b'\n'
+    with open(csv_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_bytes), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+
+    if last != b'\n':
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def iter_daq_chunks(csv_path, chunk_rows=DEFAULT_CHUNK_ROWS, malformed_lines=None):
+    """
+    Stream the samples of a DAQ csv file in fixed-size chunks of numpy arrays.
+
+    The file is parsed in large blocks with the bulk parser, so only a few chunks are held in
+    memory at a time, and the memory used does not depend on the length of the log.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data, including the extension
+    chunk_rows: int
+        The maximum number of samples in each chunk. Default is DEFAULT_CHUNK_ROWS
+    malformed_lines: list=None
+        If given, a (line number, line) tuple is appended to it for every malformed line,
+        see iter_daq_blocks
+
+    Yields
+    ------
+    tuple of numpy.ndarray
+        The timestamps (s), anemometer readings (m/s) and load cell readings (lbf) of the chunk
+    """
+    pending = np.empty((0, 3))
+
+    for block in iter_daq_blocks(csv_path, malformed_lines=malformed_lines):
+        pending = np.concatenate((pending, block)) if len(pending) else block
+        while len(pending) >= chunk_rows:
+            chunk, pending = pending[:chunk_rows], pending[chunk_rows:]
+            yield chunk[:, 0], chunk[:, 1], chunk[:, 2]
+
+    if len(pending):
+        yield pending[:, 0], pending[:, 1], pending[:, 2]
+
+
+class DaqTail():
+    """
+    Follows a DAQ csv file that is still being written, such as during a test.
+
+    Every read only parses the bytes appended since the previous one, so the cost of a read does
+    not depend on the length of the log. Only complete lines are parsed, and a partial line at
+    the end of the file is kept until the rest of it is written. If the file becomes shorter,
+    such as when the DAQ starts a new log under the same name, it is followed again from the
+    start, and resets is incremented.
+    """
+
+    def __init__(self, csv_path, block_bytes=DEFAULT_BLOCK_BYTES):
+        """
+        Parameters
+        ----------
+        csv_path: path-format str
+            The path of the csv data, including the extension. It does not need to exist yet.
+        block_bytes: int
+            The maximum number of bytes that are parsed at once. Default is DEFAULT_BLOCK_BYTES
+        """
+        self.csv_path = csv_path
+        self.block_bytes = block_bytes
+        self.resets = 0
+        # (line number, line) of every malformed line that was skipped, see parse_daq_block
+        self.malformed_lines = []
+        self._restart()
+
+    def _restart(self):
+        self.offset = 0
+        self.line_number = 1
+        self.header_read = False
+        self._remainder = b''
+
+    def read(self):
+        """
+        Parse the samples appended to the file since the last read.
+
+        Returns
+        -------
+        numpy.ndarray
+            The new samples, see parse_daq_block. This is empty if nothing was appended, or if
+            the file does not exist yet.
+
+        Raises
+        ------
+        ValueError
+            If the header is not DAQ_HEADER
+        """
+        try:
+            size = os.path.getsize(self.csv_path)
+        except FileNotFoundError:
+            return np.empty((0, 3))
+
+        if size < self.offset:
+            self._restart()
+            self.resets += 1
+
+        parsed = []
+        with open(self.csv_path, 'rb') as file:
+            file.seek(self.offset)
+            while self.offset < size:
+                data = file.read(min(self.block_bytes, size - self.offset))
+                if not data:
+                    break
+                self.offset += len(data)
+
+                block = self._remainder + data
+                cut = block.rfind(b'\n') + 1
+                block, self._remainder = block[:cut], block[cut:]
+
+                if not self.header_read and block:
+                    header_end = block.index(b'\n') + 1
+                    _check_header(self.csv_path, [title.strip() for title in
+                                                  block[:header_end].decode(DAQ_ENCODING, 'replace')
+                                                  .split(',')])
+                    block = block[header_end:]
+                    self.header_read = True
+                    self.line_number = 2
+
+                if block:
+                    parsed.append(parse_daq_block(block, self.line_number,
+                                                  self.malformed_lines))
+                    self.line_number += block.count(b'\n')
+
+        if not parsed:
+            return np.empty((0, 3))
+        return np.concatenate(parsed)
+
+
+def measure_parse_throughput(csv_paths, repeat=5):
+    """
+    Measure the throughput of the bulk parser.
+
+    Parameters
+    ----------
+    csv_paths: list of path-format str
+        The csv files that are parsed
+    repeat: int
+        How many times every file is parsed, the fastest time is used
+
+    Returns
+    -------
+    dict
+        The total bytes and rows parsed, the time taken (s), and the throughput in MB/s and rows/s
+    """
+    total_bytes = sum(os.path.getsize(path) for path in csv_paths)
+
+    best_time = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = sum(len(block) for path in csv_paths for block in iter_daq_blocks(path))
+        elapsed = time.perf_counter() - start
+        best_time = elapsed if best_time is None else min(best_time, elapsed)
+
+    return {'bytes': total_bytes,
+            'rows': rows,
+            'seconds': best_time,
+            'mb_per_s': total_bytes / 1e6 / best_time,
+            'rows_per_s': rows / best_time}
+
+
+# Binary columnar format of DAQ logs:
+#   - COLUMNAR_MAGIC
+#   - the length of the json metadata header, as a little-endian uint32
+#   - the json metadata header, padded with spaces so that the columns are aligned
+#   - every column in turn, as contiguous little-endian arrays
+COLUMNAR_MAGIC = b'DAQCOL01'
+COLUMNAR_EXTENSION = '.daqcol'
+COLUMNAR_ALIGNMENT = 64
+COLUMNAR_VERSION = 1
+
+# The columns stored in the columnar format, in the same order as in the csv
+COLUMNAR_COLUMNS = ('time_s', 'anemometer_raw', 'load_cell_raw')
+
+
+def columnar_path(csv_path):
+    """
+    Get the path of the columnar version of a csv file, which is stored next to it.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data, including the extension
+
+    Returns
+    -------
+    str
+        The path of the columnar file
+    """
+    return os.path.splitext(csv_path)[0] + COLUMNAR_EXTENSION
+
+
+def convert_to_columnar(csv_path, output_path=None, dtype='float64',
+                        chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Convert a DAQ csv file to the binary columnar format.
+
+    The csv is streamed, and every column is gathered in a temporary file before they are all put
+    together, so the conversion does not need to hold the log in memory. The output is written
+    atomically, so a partial file is never seen by another process.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data, including the extension
+    output_path: path-format str=None
+        Where the columnar file is written. Default is None, which is next to the csv.
+    dtype: str
+        'float64' or 'float32', the type in which the anemometer and load cell readings are
+        stored. The timestamps are always stored as float64, since float32 cannot represent
+        milliseconds over a long log. Default is 'float64'.
+    chunk_rows: int
+        How many samples are parsed at once
+
+    Returns
+    -------
+    str
+        The path of the columnar file
+    """
+    if output_path is None:
+        output_path = columnar_path(csv_path)
+
+    dtypes = ['<f8', np.dtype(dtype).newbyteorder('<').str, np.dtype(dtype).newbyteorder('<').str]
+    source_stat = os.stat(csv_path)
+
+    column_files = [tempfile.TemporaryFile() for _ in COLUMNAR_COLUMNS]
+    try:
+        row_count = 0
+        for chunk in iter_daq_chunks(csv_path, chunk_rows):
+            for column_file, column_dtype, values in zip(column_files, dtypes, chunk):
+                column_file.write(values.astype(column_dtype).tobytes())
+            row_count += len(chunk[0])
+
+        metadata = {'version': COLUMNAR_VERSION,
+                    'row_count': row_count,
+                    'columns': list(COLUMNAR_COLUMNS),
+                    'dtypes': dtypes,
+                    'source_size': source_stat.st_size,
+                    'source_mtime_ns': source_stat.st_mtime_ns}
+
+        # The offsets depend on the header length, which depends on the offsets, so the header is
+        # simply reserved with enough room for any offset
+        offsets = []
+        header_len = len(json.dumps(dict(metadata, offsets=[2 ** 62] * len(dtypes))))
+        offset = _align(len(COLUMNAR_MAGIC) + 4 + header_len)
+        for column_dtype in dtypes:
+            offsets.append(offset)
+            offset = _align(offset + row_count * np.dtype(column_dtype).itemsize)
+        metadata['offsets'] = offsets
+
+        header = json.dumps(metadata).encode()
+        header += b' ' * (offsets[0] - len(COLUMNAR_MAGIC) - 4 - len(header))
+
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        file_handle, temp_path = tempfile.mkstemp(dir=output_dir, suffix='.tmp')
+        with os.fdopen(file_handle, 'wb') as output_file:
+            output_file.write(COLUMNAR_MAGIC)
+            output_file.write(struct.pack('<I', len(header)))
+            output_file.write(header)
+
+            for column_file, column_offset in zip(column_files, offsets):
+                output_file.write(b'\0' * (column_offset - output_file.tell()))
+                column_file.seek(0)
+                shutil.copyfileobj(column_file, output_file)
+        os.replace(temp_path, output_path)
+    finally:
+        for column_file in column_files:
+            column_file.close()
+
+    return output_path
+
+
+def read_columnar_metadata(path):
+    """
+    Read the metadata header of a columnar file.
+
+    Parameters
+    ----------
+    path: path-format str
+        The path of the columnar file
+
+    Returns
+    -------
+    dict
+        The metadata: row_count, columns, dtypes, offsets, and the size and modification time
+        of the csv it was converted from
+    """
+    with open(path, 'rb') as file:
+        if file.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(path + " is not a columnar DAQ log")
+        header_len = struct.unpack('<I', file.read(4))[0]
+        return json.loads(file.read(header_len))
+
+
+def open_columnar(path):
+    """
+    Memory-map all columns of a columnar file, without reading any of the data.
+
+    Parameters
+    ----------
+    path: path-format str
+        The path of the columnar file
+
+    Returns
+    -------
+    dict
+        The columns as read-only numpy memory maps, keyed by the names in COLUMNAR_COLUMNS.
+        Only the parts of the file that are actually accessed are read from disk.
+    """
+    metadata = read_columnar_metadata(path)
+
+    columns = {}
+    for name, column_dtype, offset in zip(metadata['columns'], metadata['dtypes'],
+                                          metadata['offsets']):
+        if metadata['row_count'] == 0:
+            columns[name] = np.empty(0, dtype=column_dtype)
+        else:
+            columns[name] = np.memmap(path, dtype=column_dtype, mode='r', offset=offset,
+                                      shape=(metadata['row_count'],))
+
+    return columns
+
+
+def columnar_time_range(columns, start_s=None, end_s=None):
+    """
+    Slice memory-mapped columns to a time range, without reading the rest of the data.
+
+    The timestamps are assumed to be increasing, so that the range is found with a binary
+    search which only touches a handful of pages of the file.
+
+    Parameters
+    ----------
+    columns: dict
+        The columns as returned by open_columnar
+    start_s: float=None
+        The first timestamp (s) included. Default is None, which starts at the beginning.
+    end_s: float=None
+        The timestamp (s) before which the range ends. Default is None, which goes to the end.
+
+    Returns
+    -------
+    dict
+        Views of the columns over the time range
+    """
+    time_s = columns['time_s']
+    start_idx = 0 if start_s is None else int(np.searchsorted(time_s, start_s, side='left'))
+    end_idx = len(time_s) if end_s is None else int(np.searchsorted(time_s, end_s, side='left'))
+
+    return {name: column[start_idx:end_idx] for name, column in columns.items()}
+
+
+def ensure_columnar(csv_path, dtype='float64'):
+    """
+    Get the columnar version of a csv file, converting it first if it is missing or outdated.
+
+    The columnar file is regenerated whenever the size or modification time of the csv no
+    longer match the ones it was converted from, or if it was stored with another dtype.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data, including the extension
+    dtype: str
+        The dtype of the readings, see convert_to_columnar
+
+    Returns
+    -------
+    str
+        The path of the up to date columnar file
+    """
+    path = columnar_path(csv_path)
+    source_stat = os.stat(csv_path)
+
+    try:
+        metadata = read_columnar_metadata(path)
+        up_to_date = (metadata['version'] == COLUMNAR_VERSION and
+                      metadata['source_size'] == source_stat.st_size and
+                      metadata['source_mtime_ns'] == source_stat.st_mtime_ns and
+                      metadata['dtypes'][1] == np.dtype(dtype).newbyteorder('<').str)
+    except (OSError, ValueError, KeyError):
+        up_to_date = False
+
+    if not up_to_date:
+        convert_to_columnar(csv_path, path, dtype)
+
+    return path
+
+
+def iter_columnar_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Stream the samples of a columnar file in fixed-size chunks, like iter_daq_chunks.
+
+    The chunks are views of the memory maps of the file, so nothing is copied.
+
+    Parameters
+    ----------
+    path: path-format str
+        The path of the columnar file
+    chunk_rows: int
+        The maximum number of samples in each chunk. Default is DEFAULT_CHUNK_ROWS
+
+    Yields
+    ------
+    tuple of numpy.ndarray
+        The timestamps (s), anemometer readings (m/s) and load cell readings (lbf) of the chunk
+    """
+    columns = open_columnar(path)
+    channels = [columns[name] for name in COLUMNAR_COLUMNS]
+
+    for start in range(0, len(channels[0]), chunk_rows):
+        yield tuple(channel[start:start + chunk_rows] for channel in channels)
+
+
+def _align(offset):
+    return -(-offset // COLUMNAR_ALIGNMENT) * COLUMNAR_ALIGNMENT
+
+
+if __name__ == '__main__':
+    import glob
+
+    sample_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests',
+                              'example_data_directory')
+    throughput = measure_parse_throughput(sorted(glob.glob(os.path.join(sample_dir, '*.csv'))))
+    print("Parsed {rows} rows ({bytes} bytes) in {seconds:.4f} s: "
+          "{mb_per_s:.1f} MB/s, {rows_per_s:.0f} rows/s".format(**throughput))
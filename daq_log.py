@@ -0,0 +1,212 @@
+import numpy as np
+
+import analysis_engine
+import daq_io
+import signal_filters
+
+# The columns read from a DAQ log, as stored in a DaqLog
+RAW_COLUMNS = ('time_s', 'anemometer_raw', 'load_cell_raw')
+
+
+class DaqLog():
+    """
+    The samples of a DAQ log, as contiguous typed columns.
+
+    Every stage of the analysis (the data sheet, charts, statistics and exports) reads the log
+    from here, so that the workbook is only ever written to. The timestamps (s) and raw readings
+    are numpy arrays, and the derived columns of analysis_engine.compute_derived_columns are
+    added by derive(). Each sample takes 24 bytes (16 with float32 readings from a columnar file),
+    and about 100 bytes once derived.
+
+    A log can be indexed by the column names of RAW_COLUMNS and analysis_engine.COLUMN_KEYS, like
+    the dict of compute_derived_columns, so that it can be passed to any function which takes
+    such columns.
+    """
+
+    __slots__ = ('time_s', 'anemometer_raw', 'load_cell_raw', 'derived', 'source_path',
+                 'sheetname', 'summary')
+
+    def __init__(self, time_s, anemometer_raw, load_cell_raw, derived=None, source_path=None,
+                 sheetname=None, summary=None):
+        """
+        Parameters
+        ----------
+        time_s, anemometer_raw, load_cell_raw: numpy.ndarray
+            The timestamps (s), raw anemometer readings (m/s) and raw load cell readings (lbf),
+            which are kept without being copied
+        derived: dict=None
+            The derived columns, keyed by the names in analysis_engine.COLUMN_KEYS. Default is
+            None, which leaves them to be computed by derive()
+        source_path: path-format str=None
+            The csv the log was read from. Default is None
+        sheetname: str=None
+            The name of the data sheet of the log, once it has one. Default is None
+        summary: dict=None
+            The summary of the log (see analysis_engine.summarize_log), once it is known, such
+            as when it is cached along with the log. Default is None
+        """
+        self.time_s = np.asarray(time_s)
+        self.anemometer_raw = np.asarray(anemometer_raw)
+        self.load_cell_raw = np.asarray(load_cell_raw)
+        self.derived = derived
+        self.source_path = source_path
+        self.sheetname = sheetname
+        self.summary = summary
+
+    @classmethod
+    def from_columns(cls, columns, source_path=None, sheetname=None):
+        """
+        Create a log from a dict of columns, such as the ones of a cached log.
+
+        Parameters
+        ----------
+        columns: dict
+            The columns of RAW_COLUMNS, and optionally those of analysis_engine.COLUMN_KEYS
+        source_path, sheetname:
+            See DaqLog
+        """
+        derived = None
+        if all(key in columns for key in analysis_engine.COLUMN_KEYS):
+            derived = {key: columns[key] for key in analysis_engine.COLUMN_KEYS}
+
+        return cls(*(columns[key] for key in RAW_COLUMNS), derived, source_path, sheetname)
+
+    def __len__(self):
+        return len(self.time_s)
+
+    def __getitem__(self, key):
+        if key in RAW_COLUMNS:
+            return getattr(self, key)
+        if self.derived is None:
+            raise KeyError(key + " (the derived columns have not been computed)")
+
+        return self.derived[key]
+
+    def __contains__(self, key):
+        return key in RAW_COLUMNS or (self.derived is not None and key in self.derived)
+
+    def keys(self):
+        """Get the names of all columns of the log, so that dict(log) holds all of them."""
+        keys = list(RAW_COLUMNS)
+        if self.derived is not None:
+            keys.extend(key for key in analysis_engine.COLUMN_KEYS if key not in RAW_COLUMNS)
+        return keys
+
+    @property
+    def nbytes(self):
+        """The memory (bytes) of the distinct columns of the log."""
+        arrays = {id(self[key]): self[key] for key in self.keys()}
+        return sum(array.nbytes for array in arrays.values())
+
+    def derive(self, pipeline=None, constants=None):
+        """
+        Compute the derived columns, unless they have already been computed.
+
+        Parameters
+        ----------
+        pipeline: signal_filters.FilterPipeline=None
+            The pipeline of the averaging windows. Default is None, which uses the default
+            windows. The samples are expected to have been processed by it already.
+        constants: dict=None
+            Numeric constants as returned by analysis_engine.analysis_constants. Default is
+            None, which uses the default values of SimplifiedConsts
+
+        Returns
+        -------
+        DaqLog
+            The log itself
+        """
+        if self.derived is None:
+            if pipeline is None:
+                pipeline = signal_filters.DEFAULT_PIPELINE
+            self.derived = pipeline.derived_columns(self.time_s, self.anemometer_raw,
+                                                    self.load_cell_raw, constants)
+
+        return self
+
+    def time_range(self, start_s=None, end_s=None):
+        """
+        Get the samples of a time range, without copying them.
+
+        The timestamps are assumed to be increasing, as in daq_io.columnar_time_range. The
+        derived columns are those of the whole log, so that the averages at the ends of the range
+        include the samples around it.
+
+        Parameters
+        ----------
+        start_s: float=None
+            The first timestamp (s) included. Default is None, which starts at the beginning.
+        end_s: float=None
+            The timestamp (s) before which the range ends. Default is None, which goes to the end.
+
+        Returns
+        -------
+        DaqLog
+            A log of views of the columns over the time range, with the same metadata
+        """
+        start_idx = 0 if start_s is None else int(np.searchsorted(self.time_s, start_s, 'left'))
+        end_idx = len(self) if end_s is None else int(np.searchsorted(self.time_s, end_s, 'left'))
+
+        derived = None
+        if self.derived is not None:
+            derived = {key: column[start_idx:end_idx] for key, column in self.derived.items()}
+
+        return DaqLog(self.time_s[start_idx:end_idx], self.anemometer_raw[start_idx:end_idx],
+                      self.load_cell_raw[start_idx:end_idx], derived, self.source_path,
+                      self.sheetname)
+
+
+def iter_log_chunks(csv_path, columnar_dtype=None, pipeline=None):
+    """
+    Stream the processed samples of a DAQ log in chunks.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data, including the extension
+    columnar_dtype: str=None
+        If given, the samples are read from a memory-mapped columnar version of the csv with
+        readings of this dtype ('float64' or 'float32'), which is created next to the csv the
+        first time and whenever the csv changes. Default is None, which parses the csv.
+    pipeline: signal_filters.FilterPipeline=None
+        Which samples are rejected and how the readings are filtered. Default is None, which
+        keeps the samples as they are.
+
+    Returns
+    -------
+    iterator of tuple of numpy.ndarray
+        The timestamps (s), anemometer readings (m/s) and load cell readings (lbf) of each chunk
+    """
+    if pipeline is None:
+        pipeline = signal_filters.DEFAULT_PIPELINE
+
+    if columnar_dtype:
+        return pipeline.stream(daq_io.iter_columnar_chunks(
+            daq_io.ensure_columnar(csv_path, columnar_dtype)))
+
+    return pipeline.stream(daq_io.iter_daq_chunks(csv_path))
+
+
+def read_log(csv_path, columnar_dtype=None, pipeline=None):
+    """
+    Read a DAQ log into a DaqLog, without its derived columns.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data, including the extension
+    columnar_dtype, pipeline:
+        See iter_log_chunks
+
+    Returns
+    -------
+    DaqLog
+        The processed samples of the log
+    """
+    # Always concatenated, so that the log never holds views of the memory maps of a columnar file
+    chunks = list(iter_log_chunks(csv_path, columnar_dtype, pipeline))
+    if chunks:
+        return DaqLog(*(np.concatenate(channel) for channel in zip(*chunks)),
+                      source_path=csv_path)
+
+    return DaqLog(np.empty(0), np.empty(0), np.empty(0), source_path=csv_path)
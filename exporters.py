@@ -0,0 +1,388 @@
+import csv
+import json
+import os
+import shutil
+
+import numpy as np
+
+# The formats in which the analysis can be exported. The xlsx workbooks are created by the
+# analyzer itself, while the other formats only hold the computed columns and the meta-analysis.
+EXPORT_FORMAT_XLSX = 'xlsx'
+EXPORT_FORMAT_CSV = 'csv'
+EXPORT_FORMAT_NPZ = 'npz'
+EXPORT_FORMAT_COLUMNAR = 'columnar'
+
+EXPORT_FORMATS = (EXPORT_FORMAT_XLSX, EXPORT_FORMAT_CSV, EXPORT_FORMAT_NPZ,
+                  EXPORT_FORMAT_COLUMNAR)
+
+# How many samples are written at once
+EXPORT_CHUNK_ROWS = 65536
+
+# The name of the exported meta-analysis table, without the extension
+META_ANALYSIS_NAME = 'meta_analysis'
+
+# The name of the exported comparison of aligned logs, without the extension
+COMPARISON_NAME = 'comparison'
+
+# A column store is a directory holding one raw little-endian file per column, named after the
+# column, and a json metadata file with the names, titles, types and number of rows
+COLUMN_STORE_EXTENSION = '.colstore'
+COLUMN_STORE_METADATA = 'metadata.json'
+COLUMN_STORE_VERSION = 1
+
+
+class Exporter():
+    """
+    Writes a table of named columns, such as the computed columns of a log, to a file.
+
+    The columns are appended in consecutive chunks, so that a table does not need to be held in
+    memory to be written unless the format requires it. Every column has a key, under which it is
+    stored in the machine-readable formats, and a title, such as the headers of HeaderManager.
+    Exporters are context managers, which close the table once it is complete, or discard it
+    when an exception is raised before then.
+    """
+
+    extension = ''
+
+    def __init__(self, path, keys, titles):
+        """
+        Parameters
+        ----------
+        path: path-format str
+            Where the table is written, without the extension of the format
+        keys: list of str
+            The keys of the columns, in order
+        titles: list of str
+            The titles of the columns, in the same order
+        """
+        self.path = path + self.extension
+        self.keys = list(keys)
+        self.titles = list(titles)
+        self.row_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def append(self, columns):
+        """
+        Append rows to the table.
+
+        Parameters
+        ----------
+        columns: dict
+            The values of the rows as equally long numpy arrays, keyed by the keys of the columns.
+            Text columns are only supported by write_table.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Finish writing the table."""
+
+    def discard(self):
+        """Stop writing the table without completing it, leaving no partial table behind."""
+
+
+class CsvExporter(Exporter):
+    """Writes a table to a csv file, with the titles as the header and one sample per line."""
+
+    extension = '.csv'
+
+    def __init__(self, path, keys, titles):
+        super().__init__(path, keys, titles)
+        self.file = open(self.path, 'w', newline='')
+        csv.writer(self.file).writerow(self.titles)
+
+    def append(self, columns):
+        values = [np.asarray(columns[key]) for key in self.keys]
+        if len(values[0]) == 0:
+            return
+
+        # Enough digits that every float is read back exactly
+        formats = ['%d' if np.issubdtype(column.dtype, np.integer) else '%.17g'
+                   for column in values]
+        np.savetxt(self.file, np.column_stack(values), delimiter=',', fmt=formats)
+        self.row_count += len(values[0])
+
+    def close(self):
+        self.file.close()
+
+    def discard(self):
+        self.file.close()
+        os.remove(self.path)
+
+
+class NpzExporter(Exporter):
+    """
+    Writes a table to a numpy .npz archive, with one array per column and the titles under
+    'titles'.
+
+    An archive cannot be appended to, so the chunks are gathered and written when it is closed.
+    """
+
+    extension = '.npz'
+
+    def __init__(self, path, keys, titles):
+        super().__init__(path, keys, titles)
+        self.chunks = {key: [] for key in self.keys}
+
+    def append(self, columns):
+        for key in self.keys:
+            self.chunks[key].append(np.asarray(columns[key]))
+        self.row_count += len(columns[self.keys[0]])
+
+    def close(self):
+        arrays = {key: np.concatenate(chunks) if chunks else np.empty(0)
+                  for key, chunks in self.chunks.items()}
+        np.savez(self.path, titles=np.array(self.titles), **arrays)
+
+    def discard(self):
+        self.chunks = None
+
+
+class ColumnStoreExporter(Exporter):
+    """
+    Writes a table to a column store, see open_column_store.
+
+    Every chunk is appended to the end of the column files, and the number of rows in the
+    metadata is only updated when the store is closed. A store can be reopened to append more
+    rows, while readers only ever see the rows of the last completed update.
+    """
+
+    extension = COLUMN_STORE_EXTENSION
+
+    def __init__(self, path, keys, titles, append=False):
+        """
+        Parameters
+        ----------
+        path, keys, titles:
+            See Exporter
+        append: bool=False
+            Whether the rows are appended to an existing store with the same columns, instead of
+            replacing it
+        """
+        super().__init__(path, keys, titles)
+        self.dtypes = None
+
+        if append and os.path.exists(os.path.join(self.path, COLUMN_STORE_METADATA)):
+            metadata = read_column_store_metadata(self.path)
+            if metadata['columns'] != self.keys:
+                raise ValueError(self.path + " does not have the columns " + str(self.keys))
+            self.row_count = metadata['row_count']
+            self.dtypes = metadata['dtypes']
+
+            # Anything past the last completed update is discarded
+            for key, dtype in zip(self.keys, self.dtypes):
+                with open(self._column_path(key), 'r+b') as file:
+                    file.truncate(self.row_count * np.dtype(dtype).itemsize)
+        else:
+            if os.path.exists(self.path):
+                shutil.rmtree(self.path)
+            os.makedirs(self.path)
+
+    def append(self, columns):
+        if self.dtypes is None:
+            self.dtypes = [np.dtype(np.asarray(columns[key]).dtype).newbyteorder('<').str
+                           for key in self.keys]
+
+        for key, dtype in zip(self.keys, self.dtypes):
+            with open(self._column_path(key), 'ab') as file:
+                file.write(np.asarray(columns[key], dtype=dtype).tobytes())
+        self.row_count += len(columns[self.keys[0]])
+
+    def close(self):
+        if self.dtypes is None:
+            self.dtypes = ['<f8'] * len(self.keys)
+            for key in self.keys:
+                open(self._column_path(key), 'ab').close()
+
+        write_column_store_metadata(self.path, {'version': COLUMN_STORE_VERSION,
+                                                'row_count': self.row_count,
+                                                'columns': self.keys,
+                                                'titles': self.titles,
+                                                'dtypes': self.dtypes})
+
+    def discard(self):
+        # The metadata still holds the rows of the last completed update, and the rows appended
+        # since are discarded when the store is appended to again
+        pass
+
+    def _column_path(self, key):
+        return os.path.join(self.path, key)
+
+
+# The exporter of every format other than xlsx
+EXPORTERS = {EXPORT_FORMAT_CSV: CsvExporter,
+             EXPORT_FORMAT_NPZ: NpzExporter,
+             EXPORT_FORMAT_COLUMNAR: ColumnStoreExporter}
+
+
+def export_formats(selection):
+    """
+    Validate a selection of export formats.
+
+    Parameters
+    ----------
+    selection: str or list of str
+        One or several of EXPORT_FORMATS
+
+    Returns
+    -------
+    list of str
+        The selected formats
+    """
+    if isinstance(selection, str):
+        selection = [selection]
+
+    for export_format in selection:
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError("Unknown export format: " + str(export_format))
+
+    return list(selection)
+
+
+def export_table(export_format, path, columns, keys, titles, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Write a table of columns that are already in memory, in chunks.
+
+    Parameters
+    ----------
+    export_format: str
+        One of the formats of EXPORTERS
+    path: path-format str
+        Where the table is written, without the extension of the format
+    columns: dict
+        The columns as equally long numpy arrays
+    keys, titles:
+        See Exporter
+    chunk_rows: int
+        How many rows are written at once
+
+    Returns
+    -------
+    str
+        The path of the written file
+    """
+    row_count = len(columns[keys[0]])
+    with EXPORTERS[export_format](path, keys, titles) as exporter:
+        for start in range(0, row_count, chunk_rows):
+            exporter.append({key: columns[key][start:start + chunk_rows] for key in keys})
+
+    return exporter.path
+
+
+def export_records(export_format, path, records, keys, titles):
+    """
+    Write a small table of records, such as the meta-analysis.
+
+    The first column is the label of every record, which is text. All other columns are numbers,
+    where missing values (None) are written as NaN.
+
+    Parameters
+    ----------
+    export_format: str
+        One of the formats of EXPORTERS
+    path: path-format str
+        Where the table is written, without the extension of the format
+    records: list of list
+        The values of every record, in the order of the keys
+    keys, titles:
+        See Exporter
+
+    Returns
+    -------
+    str
+        The path of the written file
+    """
+    labels = [record[0] for record in records]
+    values = np.array([[np.nan if value is None else value for value in record[1:]]
+                       for record in records], dtype=np.float64).reshape(len(records),
+                                                                          len(keys) - 1)
+
+    if export_format == EXPORT_FORMAT_CSV:
+        path += CsvExporter.extension
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(titles)
+            writer.writerows([label] + [repr(value) for value in row.tolist()]
+                             for label, row in zip(labels, values))
+        return path
+
+    if export_format == EXPORT_FORMAT_NPZ:
+        path += NpzExporter.extension
+        arrays = {key: values[:, idx] for idx, key in enumerate(keys[1:])}
+        np.savez(path, titles=np.array(titles), **{keys[0]: np.array(labels, dtype=str)},
+                 **arrays)
+        return path
+
+    # Text is not stored in the column files, so the labels are kept in the metadata
+    with ColumnStoreExporter(path, keys[1:], titles[1:]) as exporter:
+        exporter.append({key: values[:, idx] for idx, key in enumerate(keys[1:])})
+    metadata = read_column_store_metadata(exporter.path)
+    metadata['labels'] = {'key': keys[0], 'title': titles[0], 'values': labels}
+    write_column_store_metadata(exporter.path, metadata)
+
+    return exporter.path
+
+
+def read_column_store_metadata(path):
+    """
+    Read the metadata of a column store.
+
+    Parameters
+    ----------
+    path: path-format str
+        The path of the column store directory
+
+    Returns
+    -------
+    dict
+        The metadata: row_count, columns, titles, dtypes, and the labels of a table of records
+    """
+    with open(os.path.join(path, COLUMN_STORE_METADATA)) as file:
+        return json.load(file)
+
+
+def write_column_store_metadata(path, metadata):
+    # Written atomically, so that readers never see a partial update
+    temp_path = os.path.join(path, COLUMN_STORE_METADATA + '.tmp')
+    with open(temp_path, 'w') as file:
+        json.dump(metadata, file, indent=2)
+    os.replace(temp_path, os.path.join(path, COLUMN_STORE_METADATA))
+
+
+def open_column_store(path):
+    """
+    Memory-map all columns of a column store, without reading any of the data.
+
+    Parameters
+    ----------
+    path: path-format str
+        The path of the column store directory
+
+    Returns
+    -------
+    dict
+        The columns as read-only numpy arrays, keyed by their names. Only the rows of the last
+        completed update are included. The labels of a table of records are included as an
+        array of str under their own key.
+    """
+    metadata = read_column_store_metadata(path)
+
+    columns = {}
+    for key, dtype in zip(metadata['columns'], metadata['dtypes']):
+        if metadata['row_count'] == 0:
+            columns[key] = np.empty(0, dtype=dtype)
+        else:
+            columns[key] = np.memmap(os.path.join(path, key), dtype=dtype, mode='r',
+                                     shape=(metadata['row_count'],))
+
+    if 'labels' in metadata:
+        columns[metadata['labels']['key']] = np.array(metadata['labels']['values'], dtype=str)
+
+    return columns
@@ -0,0 +1,265 @@
+import json
+import logging
+import os
+import sys
+import time
+
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Not available on windows
+    resource = None
+
+# The sinks that can be selected by name in the configuration
+SINK_LOG = 'log'
+SINK_JSON = 'json'
+
+DEFAULT_REPORT_NAME = 'analysis_report.json'
+
+logger = logging.getLogger('truck_test_rapid_analyzer')
+
+
+def peak_rss_mb():
+    """
+    Get the peak resident memory of the current process.
+
+    Returns
+    -------
+    float or None
+        The peak resident set size (MB), or None where it cannot be measured
+    """
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, and in kilobytes everywhere else
+    if sys.platform == 'darwin':
+        return peak / 1024 ** 2
+    return peak / 1024
+
+
+class LogSink():
+    """Writes every record as a json line to the analyzer logger, at the INFO level."""
+
+    def __init__(self, log=logger):
+        self.log = log
+
+    def __call__(self, record):
+        self.log.info(json.dumps(record))
+
+
+class JsonReportSink():
+    """
+    Collects every record, and writes them to a json report file when it is closed.
+
+    Along with the records, the report holds the totals of every stage over all files, and of
+    every file over all of its stages.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records = []
+
+    def __call__(self, record):
+        self.records.append(record)
+
+    def close(self):
+        totals = {}
+        files = {}
+        for record in self.records:
+            entry = totals.setdefault(record['stage'], {'wall_s': 0.0, 'cpu_s': 0.0,
+                                                        'rows': 0, 'count': 0})
+            entry['wall_s'] += record['wall_s']
+            entry['cpu_s'] += record['cpu_s']
+            entry['rows'] += record['rows'] or 0
+            entry['count'] += 1
+
+            if record['target'] is not None:
+                entry = files.setdefault(record['target'], {'wall_s': 0.0, 'cpu_s': 0.0,
+                                                            'rows': 0, 'peak_rss_mb': None})
+                entry['wall_s'] += record['wall_s']
+                entry['cpu_s'] += record['cpu_s']
+                entry['rows'] = max(entry['rows'], record['rows'] or 0)
+                if record['peak_rss_mb'] is not None:
+                    entry['peak_rss_mb'] = max(entry['peak_rss_mb'] or 0, record['peak_rss_mb'])
+
+        with open(self.path, 'w') as file:
+            json.dump({'totals': totals, 'files': files, 'records': self.records}, file,
+                      indent=2)
+
+
+class Instrumentation():
+    """
+    Measures the wall time, CPU time, rows processed and peak memory of the analysis stages.
+
+    Every measured stage produces a record, which is passed to all sinks. A sink is any callable
+    taking the record (a json-serializable dict), and may have a close() method which is called
+    once the analysis is finished. Without any sinks nothing is measured, so that the
+    instrumentation costs next to nothing when it is disabled.
+    """
+
+    def __init__(self, sinks=()):
+        """
+        Parameters
+        ----------
+        sinks: list of callable
+            Where the records are sent. Default is no sinks, which disables the instrumentation.
+        """
+        self.sinks = list(sinks)
+        self.enabled = bool(self.sinks)
+
+    @contextmanager
+    def stage(self, stage, target=None):
+        """
+        Measure a stage of the analysis.
+
+        Parameters
+        ----------
+        stage: str
+            The name of the stage
+        target: str=None
+            The file the stage belongs to, if any
+
+        Yields
+        ------
+        dict
+            The record of the stage. The number of rows processed can be set in it under 'rows'.
+        """
+        record = {'stage': stage, 'target': target, 'rows': None}
+        if not self.enabled:
+            yield record
+            return
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        yield record
+        record['wall_s'] = time.perf_counter() - wall_start
+        record['cpu_s'] = time.process_time() - cpu_start
+        record['peak_rss_mb'] = peak_rss_mb()
+        record['pid'] = os.getpid()
+
+        self.emit(record)
+
+    def submit(self, pool, func, *args, **kwargs):
+        """
+        Submit a function taking an 'instrumentation' keyword argument to a process pool, so that
+        its records are sent to the sinks of this instrumentation once its result is collected
+        with result().
+
+        Parameters
+        ----------
+        pool: concurrent.futures.Executor
+            The pool where the function is run
+        func: callable
+            The function
+        args, kwargs:
+            The other arguments of the function
+
+        Returns
+        -------
+        concurrent.futures.Future
+            The future of the call, to be passed to result()
+        """
+        if not self.enabled:
+            return pool.submit(func, *args, **kwargs)
+        return pool.submit(run_recorded, func, *args, **kwargs)
+
+    def result(self, future):
+        """
+        Get the result of a call made with submit(), and send its records to the sinks.
+
+        Parameters
+        ----------
+        future: concurrent.futures.Future
+            The future returned by submit()
+
+        Returns
+        -------
+        object
+            The result of the function. Any exception it raised is raised again.
+        """
+        if not self.enabled:
+            return future.result()
+
+        result, records = future.result()
+        for record in records:
+            self.emit(record)
+        return result
+
+    def emit(self, record):
+        """Pass a record to every sink."""
+        for sink in self.sinks:
+            sink(record)
+
+    def close(self):
+        """Close every sink which needs to be closed, such as a JsonReportSink."""
+        for sink in self.sinks:
+            if hasattr(sink, 'close'):
+                sink.close()
+
+
+# Shared by all callers that do not measure anything
+DISABLED = Instrumentation()
+
+
+def create_instrumentation(config):
+    """
+    Create the instrumentation selected in a configuration.
+
+    Parameters
+    ----------
+    config: dict
+        The configuration of execute_complete_analysis, where INSTRUMENTATION lists the named
+        sinks (SINK_LOG and SINK_JSON), INSTRUMENTATION_REPORT_PATH is the path of the json
+        report, and INSTRUMENTATION_CALLBACK is an additional sink
+
+    Returns
+    -------
+    Instrumentation
+        The instrumentation, which is DISABLED if no sinks are selected
+    """
+    sinks = []
+
+    names = config.get('INSTRUMENTATION') or []
+    if isinstance(names, str):
+        names = [names]
+
+    for name in names:
+        if name == SINK_LOG:
+            sinks.append(LogSink())
+        elif name == SINK_JSON:
+            sinks.append(JsonReportSink(config.get('INSTRUMENTATION_REPORT_PATH') or
+                                        os.path.join(config['FILE_SUBDIRECTORY'],
+                                                     DEFAULT_REPORT_NAME)))
+        else:
+            raise ValueError("Unknown instrumentation sink: " + str(name))
+
+    if config.get('INSTRUMENTATION_CALLBACK'):
+        sinks.append(config['INSTRUMENTATION_CALLBACK'])
+
+    if not sinks:
+        return DISABLED
+    return Instrumentation(sinks)
+
+
+def run_recorded(func, *args, **kwargs):
+    """
+    Call a function with an instrumentation that keeps its records, such as in a worker process,
+    whose records cannot reach the sinks of the main process directly.
+
+    Parameters
+    ----------
+    func: callable
+        The function, which takes the instrumentation as its 'instrumentation' keyword argument
+    args, kwargs:
+        The other arguments of the function
+
+    Returns
+    -------
+    tuple of (object, list of dict)
+        The result of the function and its records, which can be passed to Instrumentation.emit
+    """
+    records = []
+    result = func(*args, instrumentation=Instrumentation([records.append]), **kwargs)
+    return result, records
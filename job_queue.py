@@ -0,0 +1,480 @@
+import glob
+import os
+import sqlite3
+import time
+import traceback
+
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from concurrent.futures.process import BrokenProcessPool
+
+import truck_test_rapid_analyzer as analyzer
+
+from daq_io import read_daq_header
+
+# The states of a job. A job is claimed from pending to running by a worker, and ends up done or
+# failed, from where it can be retried.
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+JOB_STATUSES = (JOB_PENDING, JOB_RUNNING, JOB_DONE, JOB_FAILED)
+
+DEFAULT_DATABASE_NAME = 'analysis_jobs.sqlite'
+
+# Defaults of the batch mode, see run_batch
+JOB_POLL_INTERVAL_S = 2.0
+JOB_SETTLE_S = 2.0
+JOB_MAX_ATTEMPTS = 3
+JOB_IDLE_TIMEOUT_S = 0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    duration_s REAL,
+    row_count INTEGER,
+    output_path TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_by_priority ON jobs (status, priority DESC, id);
+"""
+
+
+class JobQueue():
+    """
+    A durable queue of DAQ logs to analyze, kept in a SQLite database.
+
+    Every log is a single job, identified by the path of its csv, which holds its status, the
+    number of attempts, its timings and its last error. Every change is committed immediately, so
+    that a batch that is interrupted, even by a crash, resumes where it stopped: completed logs
+    are never analyzed again unless they change, and the logs that were being analyzed are
+    claimed again by recover(). Several processes can use the same database.
+    """
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path: path-format str
+            The path of the database, which is created if it does not exist
+        """
+        self.path = path
+        # Every statement is committed on its own, see the class description
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def enqueue(self, csv_path, priority=0):
+        """
+        Add a log to the queue.
+
+        A log that is already queued is left as it is, unless its csv has changed since, in which
+        case it is analyzed again. Logs that are being analyzed are never changed.
+
+        Parameters
+        ----------
+        csv_path: path-format str
+            The path of the csv data, including the extension
+        priority: int
+            Jobs with a higher priority are claimed first. Default is 0.
+
+        Returns
+        -------
+        bool
+            Whether the log was added or queued again
+        """
+        stat = os.stat(csv_path)
+        cursor = self.connection.execute(
+            "INSERT INTO jobs (path, size, mtime, priority, enqueued_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (path) DO UPDATE SET size = excluded.size, mtime = excluded.mtime, "
+            "status = 'pending', attempts = 0, enqueued_at = excluded.enqueued_at, "
+            "error = NULL WHERE (jobs.size != excluded.size OR jobs.mtime != excluded.mtime) "
+            "AND jobs.status != 'running'",
+            (os.path.abspath(csv_path), stat.st_size, stat.st_mtime, priority, time.time()))
+        return cursor.rowcount > 0
+
+    def claim(self):
+        """
+        Take the pending job with the highest priority, oldest first, and mark it as running.
+
+        Returns
+        -------
+        dict or None
+            The job (see jobs()), or None if no job is pending
+        """
+        row = self.connection.execute(
+            "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, "
+            "finished_at = NULL, duration_s = NULL WHERE id = (SELECT id FROM jobs "
+            "WHERE status = 'pending' ORDER BY priority DESC, id LIMIT 1) RETURNING *",
+            (time.time(),)).fetchone()
+        return dict(row) if row else None
+
+    def complete(self, job_id, row_count=None, output_path=None):
+        """Mark a running job as done, along with the number of samples and the output path."""
+        self.connection.execute(
+            "UPDATE jobs SET status = 'done', finished_at = ?1, duration_s = ?1 - started_at, "
+            "row_count = ?2, output_path = ?3, error = NULL WHERE id = ?4",
+            (time.time(), row_count, output_path, job_id))
+
+    def fail(self, job_id, error, max_attempts=1):
+        """
+        Record the error of a running job.
+
+        Parameters
+        ----------
+        job_id: int
+            The id of the job
+        error: str
+            The error
+        max_attempts: int
+            The job is failed once it was attempted this many times, and queued again before.
+            Default is 1, which fails it at once.
+        """
+        self.connection.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts < ?1 THEN 'pending' ELSE 'failed' END, "
+            "finished_at = ?2, duration_s = ?2 - started_at, error = ?3 WHERE id = ?4",
+            (max_attempts, time.time(), error, job_id))
+
+    def release(self, job_id):
+        """Return a running job to the queue without counting the attempt, such as on shutdown."""
+        self.connection.execute(
+            "UPDATE jobs SET status = 'pending', attempts = max(attempts - 1, 0), "
+            "started_at = NULL WHERE id = ? AND status = 'running'", (job_id,))
+
+    def recover(self, max_attempts=JOB_MAX_ATTEMPTS):
+        """
+        Queue again the jobs that were left running, by a batch which did not stop cleanly.
+
+        This must only be called when no other batch is using the database.
+
+        Parameters
+        ----------
+        max_attempts: int
+            Jobs which were already attempted this many times are failed instead, in case they
+            are what brought the batch down. Default is JOB_MAX_ATTEMPTS
+
+        Returns
+        -------
+        int
+            The number of recovered jobs
+        """
+        return self.connection.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END, "
+            "error = 'Interrupted while running' WHERE status = 'running'",
+            (max_attempts,)).rowcount
+
+    def retry(self, job_ids=None):
+        """
+        Queue failed jobs again, with a fresh number of attempts.
+
+        Parameters
+        ----------
+        job_ids: list of int
+            The jobs to retry, which may also be done. Default is None, which retries every
+            failed job.
+
+        Returns
+        -------
+        int
+            The number of jobs queued again
+        """
+        if job_ids is None:
+            return self.connection.execute(
+                "UPDATE jobs SET status = 'pending', attempts = 0 "
+                "WHERE status = 'failed'").rowcount
+
+        return self.connection.execute(
+            "UPDATE jobs SET status = 'pending', attempts = 0 WHERE status != 'running' "
+            "AND id IN (" + ", ".join("?" * len(job_ids)) + ")", list(job_ids)).rowcount
+
+    def prioritize(self, job_ids, priority):
+        """
+        Change the priority of jobs.
+
+        Parameters
+        ----------
+        job_ids: list of int
+            The jobs
+        priority: int
+            Their new priority, higher being claimed first
+
+        Returns
+        -------
+        int
+            The number of jobs changed
+        """
+        return self.connection.execute(
+            "UPDATE jobs SET priority = ? WHERE id IN (" + ", ".join("?" * len(job_ids)) + ")",
+            [priority] + list(job_ids)).rowcount
+
+    def jobs(self, status=None):
+        """
+        List the jobs, in the order in which they are claimed.
+
+        Parameters
+        ----------
+        status: str=None
+            Only list the jobs with this status. Default is None, which lists all jobs.
+
+        Returns
+        -------
+        list of dict
+            The jobs, with the columns of the database: id, path, size, mtime, status, priority,
+            attempts, enqueued_at, started_at, finished_at, duration_s, row_count, output_path and
+            error (times are in seconds since the epoch)
+        """
+        query = "SELECT * FROM jobs"
+        parameters = ()
+        if status is not None:
+            query += " WHERE status = ?"
+            parameters = (status,)
+
+        return [dict(row) for row in self.connection.execute(
+            query + " ORDER BY priority DESC, id", parameters)]
+
+    def counts(self):
+        """Get the number of jobs with every status, as a dict."""
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        counts.update(self.connection.execute(
+            "SELECT status, count(*) FROM jobs GROUP BY status").fetchall())
+        return counts
+
+
+def find_logs(directory, settle_s=JOB_SETTLE_S):
+    """
+    Find the DAQ logs in a directory which are ready to be analyzed.
+
+    Any csv which is not a DAQ log, such as the exported analyses, is ignored, as are the logs
+    which were modified too recently, since they may still be being copied or written.
+
+    Parameters
+    ----------
+    directory: path-format str
+        The directory
+    settle_s: float
+        How long (s) a log must be left unchanged before it is ready. Default is JOB_SETTLE_S
+
+    Returns
+    -------
+    list of str
+        The paths of the csv logs, sorted
+    """
+    now = time.time()
+    paths = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.csv'))):
+        try:
+            if now - os.path.getmtime(path) < settle_s:
+                continue
+            read_daq_header(path)
+        except (ValueError, OSError):
+            continue
+        paths.append(path)
+
+    return paths
+
+
+def analyze_job(csv_path, options, cache=None):
+    """
+    Analyze a log into its own output file, as the analyzer does for every file of a hitlist.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data, including the extension
+    options: dict
+        The options of execute_analysis, see truck_test_rapid_analyzer.analysis_options
+    cache: result_cache.ResultCache=None
+        The result cache, if any
+
+    Returns
+    -------
+    tuple of (int, str)
+        The number of samples and the path of the workbook, which is without an extension if
+        only the other export formats are written
+    """
+    target = os.path.splitext(csv_path)[0]
+    output_path = target + '___analyzed.xlsx'
+    summary = analyzer.execute_analysis(target, output_path, cache=cache, **options)
+
+    if analyzer.exporters.EXPORT_FORMAT_XLSX not in options['export_formats']:
+        output_path = os.path.splitext(output_path)[0]
+    return summary['row_count'], output_path
+
+
+def run_batch(config):
+    '''
+    Analyzes every DAQ log that is dropped into the FILE_SUBDIRECTORY, through a durable job queue
+
+    Every log is analyzed into its own output file, as in the hitlist mode without a single
+    output file. The queue is kept in a SQLite database, see JobQueue, and can be managed while the
+    batch is running with the command line of this module (list, retry and prioritize).
+
+    Parameters
+    ----------
+    config: dict
+        The configuration dictionary of execute_complete_analysis, of which FILE_SUBDIRECTORY,
+        WORKERS (the number of logs analyzed at once), SUPPRESS_ALL_PRINTS, the cache and the
+        options of execute_analysis are used, along with the following fields:
+         1. JOB_DATABASE_PATH: string : Optional. The database of the job queue. Defaults to
+                analysis_jobs.sqlite in the FILE_SUBDIRECTORY.
+         2. JOB_POLL_INTERVAL_S: float : Optional. The time (s) between checks for new logs.
+                Defaults to 2.0.
+         3. JOB_SETTLE_S: float : Optional. How long (s) a log must be left unchanged before it
+                is analyzed, so that logs which are still being copied are left alone.
+                Defaults to 2.0.
+         4. JOB_MAX_ATTEMPTS: int : Optional. How many times a log is attempted when its worker
+                process dies, or when the batch is interrupted while analyzing it. Logs which
+                raise an error fail at once. Defaults to 3.
+         5. JOB_IDLE_TIMEOUT_S: float : Optional. If not 0, the batch stops once nothing was
+                left to analyze for this long (s). Defaults to 0, which runs until the analyzer
+                is interrupted.
+
+    Returns
+    -------
+    dict
+        The number of jobs with every status, once the batch stops
+    '''
+    directory = config['FILE_SUBDIRECTORY'] or '.'
+    database_path = config.get('JOB_DATABASE_PATH') or os.path.join(directory,
+                                                                    DEFAULT_DATABASE_NAME)
+    poll_interval_s = config.get('JOB_POLL_INTERVAL_S', JOB_POLL_INTERVAL_S)
+    settle_s = config.get('JOB_SETTLE_S', JOB_SETTLE_S)
+    max_attempts = config.get('JOB_MAX_ATTEMPTS', JOB_MAX_ATTEMPTS)
+    idle_timeout_s = config.get('JOB_IDLE_TIMEOUT_S', JOB_IDLE_TIMEOUT_S)
+    workers = max(1, config.get('WORKERS', 1))
+    show = not config['SUPPRESS_ALL_PRINTS']
+
+    options = analyzer.analysis_options(config)
+    cache = analyzer.analysis_cache(config)
+
+    with JobQueue(database_path) as queue:
+        recovered = queue.recover(max_attempts)
+        if show:
+            print("Watching " + os.path.abspath(directory) + " with " + str(workers) +
+                  " worker(s) (Ctrl+C to stop)")
+            if recovered:
+                print(str(recovered) + " interrupted job(s) recovered")
+
+        # Every log is analyzed in a worker process, so that a crash only takes down its own job
+        pool = ProcessPoolExecutor(workers)
+        running = {}
+        last_activity = time.monotonic()
+        try:
+            while True:
+                for csv_path in find_logs(directory, settle_s):
+                    queue.enqueue(csv_path)
+
+                while len(running) < workers:
+                    job = queue.claim()
+                    if job is None:
+                        break
+                    running[pool.submit(analyze_job, job['path'], options, cache)] = job
+
+                if not running:
+                    if idle_timeout_s and time.monotonic() - last_activity >= idle_timeout_s:
+                        break
+                    time.sleep(poll_interval_s)
+                    continue
+
+                finished, _ = wait(running, timeout=poll_interval_s,
+                                   return_when=FIRST_COMPLETED)
+                broken = False
+                for future in finished:
+                    job = running.pop(future)
+                    try:
+                        row_count, output_path = future.result()
+                    except BrokenProcessPool as err:
+                        # Any of the running jobs may have brought the worker down
+                        broken = True
+                        queue.fail(job['id'], repr(err), max_attempts)
+                        if show:
+                            print(job['path'] + " was interrupted: " + repr(err))
+                    except Exception as err:
+                        queue.fail(job['id'], "".join(traceback.format_exception(err)))
+                        if show:
+                            print(job['path'] + " could not be analyzed: " + repr(err))
+                    else:
+                        queue.complete(job['id'], row_count, output_path)
+                        if show:
+                            print(job['path'] + " analyzed")
+                last_activity = time.monotonic()
+
+                if broken:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = ProcessPoolExecutor(workers)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for job in running.values():
+                queue.release(job['id'])
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        return queue.counts()
+
+
+def format_job(job):
+    """Format a job of JobQueue.jobs as a single line, with the last line of its error."""
+    duration = "-" if job['duration_s'] is None else format(job['duration_s'], '.1f') + "s"
+    line = (str(job['id']).rjust(5) + "  " + job['status'].ljust(8) +
+            str(job['priority']).rjust(4) + str(job['attempts']).rjust(4) + duration.rjust(9) +
+            "  " + job['path'])
+    if job['error']:
+        line += "\n       " + job['error'].strip().splitlines()[-1]
+    return line
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the job queue of the batch mode")
+    parser.add_argument('database', help="the database of the job queue, see JOB_DATABASE_PATH")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = commands.add_parser('list', help="list the jobs in the order they are run")
+    list_parser.add_argument('--status', choices=JOB_STATUSES)
+
+    retry_parser = commands.add_parser('retry', help="queue failed jobs again")
+    retry_parser.add_argument('job_ids', type=int, nargs='*',
+                              help="the jobs to retry. Default is every failed job")
+
+    prioritize_parser = commands.add_parser('prioritize', help="change the priority of jobs")
+    prioritize_parser.add_argument('job_ids', type=int, nargs='+')
+    prioritize_parser.add_argument('--priority', type=int, default=1,
+                                   help="higher priorities are run first. Default is 1")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        parser.error("no job queue at " + args.database)
+
+    with JobQueue(args.database) as queue:
+        if args.command == 'list':
+            print("   id  status     pri att duration  path")
+            for job in queue.jobs(args.status):
+                print(format_job(job))
+            print(", ".join(str(count) + " " + status
+                            for status, count in queue.counts().items()))
+        elif args.command == 'retry':
+            print(str(queue.retry(args.job_ids or None)) + " job(s) queued again")
+        else:
+            print(str(queue.prioritize(args.job_ids, args.priority)) + " job(s) changed")
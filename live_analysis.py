@@ -0,0 +1,320 @@
+import asyncio
+import glob
+import json
+import os
+import tempfile
+
+import numpy as np
+
+import analysis_engine
+import signal_filters
+
+from daq_io import DaqTail
+from daq_io import read_daq_header
+
+# Defaults of the live analysis, see run_live_analysis
+LIVE_POLL_INTERVAL_S = 0.25
+LIVE_ROLLING_WINDOW_S = 5.0
+LIVE_IDLE_TIMEOUT_S = 0
+
+# The columns that are kept over the rolling window
+ROLLING_COLUMNS = ('time_ms', 'anemometer_calibrated', 'load_cell_calibrated', 'drag_area')
+
+
+class LiveAnalysis():
+    """
+    Computes the columns and summary of a log incrementally, as its samples arrive.
+
+    The samples are processed by the streamer of a signal_filters.FilterPipeline and the columns
+    computed by an analysis_engine.StreamingColumnEngine, both of which hold back the last few
+    samples until the windows after them are complete. Only running totals and
+    the samples of the rolling window are kept, so the memory used does not grow with the log.
+    Once finish() has been called, the totals match analysis_engine.summarize_run on the whole
+    log.
+    """
+
+    def __init__(self, constants=None, rolling_window_s=LIVE_ROLLING_WINDOW_S, pipeline=None):
+        """
+        Parameters
+        ----------
+        constants: dict=None
+            Numeric constants as returned by analysis_engine.analysis_constants. Default is None,
+            which uses the default values of SimplifiedConsts
+        rolling_window_s: float
+            The duration (s) of the most recent samples that the rolling means are computed over.
+            Default is LIVE_ROLLING_WINDOW_S
+        pipeline: signal_filters.FilterPipeline=None
+            The processing of the samples and the averaging windows, as in the analyzer. Default
+            is None, which keeps the samples as they are.
+        """
+        if pipeline is None:
+            pipeline = signal_filters.DEFAULT_PIPELINE
+        self.filters = pipeline.streamer()
+        self.engine = pipeline.column_engine(constants)
+        self.constants = self.engine.constants
+        self.rolling_window_s = rolling_window_s
+
+        self.row_count = 0
+        self.sample_count = 0
+        self.drag_area_sum = 0.0
+        self.time_above_threshold_s = 0.0
+
+        self.recent = {key: np.empty(0) for key in ROLLING_COLUMNS}
+        # The time (s) and threshold mask of the last completed sample
+        self._last_sample = None
+
+    def push(self, samples):
+        """
+        Add newly read samples.
+
+        Parameters
+        ----------
+        samples: numpy.ndarray
+            The samples, as returned by daq_io.DaqTail.read
+        """
+        if len(samples):
+            self._update(self.engine.push(*self.filters.push(samples[:, 0], samples[:, 1],
+                                                             samples[:, 2])))
+
+    def finish(self):
+        """Complete the samples that are still held back, once the log has ended."""
+        self._update(self.engine.push(*self.filters.finish()))
+        self._update(self.engine.finish())
+
+    def _update(self, columns):
+        row_count = len(columns['time_ms'])
+        if row_count == 0:
+            return
+
+        mask = analysis_engine.threshold_mask(columns, self.constants)
+        time_s = columns['time_ms'] / 1000
+
+        self.row_count += row_count
+        self.sample_count += int(mask.sum())
+        self.drag_area_sum += float(columns['drag_area'][mask].sum())
+
+        # As in summarize_run, the time from every sample above the thresholds to the next one
+        if self._last_sample is not None and self._last_sample[1]:
+            self.time_above_threshold_s += float(time_s[0] - self._last_sample[0])
+        self.time_above_threshold_s += float(np.diff(time_s)[mask[:-1]].sum())
+        self._last_sample = (float(time_s[-1]), bool(mask[-1]))
+
+        recent = {key: np.concatenate((self.recent[key], columns[key])) for key in ROLLING_COLUMNS}
+        keep = recent['time_ms'] >= columns['time_ms'][-1] - self.rolling_window_s * 1000
+        self.recent = {key: values[keep] for key, values in recent.items()}
+
+    def summary(self):
+        """
+        Get the current results of the log.
+
+        Returns
+        -------
+        dict
+            - row_count: the number of samples computed so far
+            - elapsed_s: the timestamp (s) of the last computed sample
+            - windspeed, force, drag_area: the calibrated windspeed (m/s), calibrated force (lbf)
+              and drag area (ft^2), averaged over the rolling window
+            - sample_count, time_above_threshold_s: the samples above the thresholds so far,
+              see analysis_engine.summarize_run
+            - mean_drag_area, drag_coeff: the mean drag area (ft^2) and drag coefficient over
+              the samples above the thresholds, as in the meta-analysis
+            The values are None until there are samples to compute them from.
+        """
+        has_recent = len(self.recent['time_ms']) > 0
+        mean_drag_area = self.drag_area_sum / self.sample_count if self.sample_count else None
+
+        return {'row_count': self.row_count,
+                'elapsed_s': float(self.recent['time_ms'][-1]) / 1000 if has_recent else None,
+                'windspeed': float(self.recent['anemometer_calibrated'].mean())
+                if has_recent else None,
+                'force': float(self.recent['load_cell_calibrated'].mean()) if has_recent else None,
+                'drag_area': float(self.recent['drag_area'].mean()) if has_recent else None,
+                'sample_count': self.sample_count,
+                'time_above_threshold_s': self.time_above_threshold_s,
+                'mean_drag_area': mean_drag_area,
+                'drag_coeff': mean_drag_area / self.constants['NOM_SA_FT2']
+                if mean_drag_area is not None else None}
+
+
+async def follow_log(csv_path, on_update, poll_interval_s=LIVE_POLL_INTERVAL_S,
+                     idle_timeout_s=LIVE_IDLE_TIMEOUT_S, rolling_window_s=LIVE_ROLLING_WINDOW_S,
+                     constants=None, pipeline=None):
+    """
+    Follow a DAQ csv file as it is written, and analyze every new sample as it arrives.
+
+    The file is polled for appended bytes, which are read and parsed in a worker thread so that
+    the event loop stays responsive. If the file is restarted (see daq_io.DaqTail), the analysis
+    starts over.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data, including the extension
+    on_update: callable
+        Called with the summary of LiveAnalysis.summary whenever new samples were analyzed, and
+        once more when following stops
+    poll_interval_s: float
+        The time (s) between reads. Default is LIVE_POLL_INTERVAL_S
+    idle_timeout_s: float
+        If not 0, following stops once nothing was appended for this long (s).
+        Default is LIVE_IDLE_TIMEOUT_S, which follows the file until the task is cancelled.
+    rolling_window_s, constants, pipeline:
+        See LiveAnalysis
+
+    Returns
+    -------
+    dict
+        The final summary, including the samples that were held back
+    """
+    loop = asyncio.get_running_loop()
+    tail = DaqTail(csv_path)
+    analysis = LiveAnalysis(constants, rolling_window_s, pipeline)
+    resets = tail.resets
+
+    last_update = loop.time()
+    try:
+        while True:
+            samples = await loop.run_in_executor(None, tail.read)
+            if tail.resets != resets:
+                resets = tail.resets
+                analysis = LiveAnalysis(constants, rolling_window_s, pipeline)
+
+            if len(samples):
+                analysis.push(samples)
+                on_update(analysis.summary())
+                last_update = loop.time()
+            elif idle_timeout_s and loop.time() - last_update >= idle_timeout_s:
+                break
+
+            await asyncio.sleep(poll_interval_s)
+    finally:
+        analysis.finish()
+        on_update(analysis.summary())
+
+    return analysis.summary()
+
+
+def format_summary(summary):
+    """
+    Format a summary of LiveAnalysis.summary as a single compact line.
+
+    Parameters
+    ----------
+    summary: dict
+        The summary
+
+    Returns
+    -------
+    str
+        The line
+    """
+    def value(key, digits):
+        return "-" if summary[key] is None else format(summary[key], '.' + str(digits) + 'f')
+
+    return ("t=" + value('elapsed_s', 1) + "s  wind=" + value('windspeed', 2) + "m/s  force=" +
+            value('force', 2) + "lbf  CdSo=" + value('drag_area', 2) + "ft^2  |  mean CdSo=" +
+            value('mean_drag_area', 3) + "ft^2 over " + value('time_above_threshold_s', 1) +
+            "s (" + str(summary['sample_count']) + " samples)")
+
+
+def write_summary(path, summary):
+    """Write a summary to a json file atomically, so that a reader never sees a partial file."""
+    file_handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                              suffix='.tmp')
+    with os.fdopen(file_handle, 'w') as file:
+        json.dump(summary, file, indent=2)
+    os.replace(temp_path, path)
+
+
+def latest_log(directory):
+    """
+    Find the most recently modified DAQ csv in a directory, ignoring any other csv such as the
+    exported analyses.
+
+    Parameters
+    ----------
+    directory: path-format str
+        The directory
+
+    Returns
+    -------
+    str
+        The path of the csv
+
+    Raises
+    ------
+    ValueError
+        If the directory does not have any csv
+    """
+    paths = []
+    for path in glob.glob(os.path.join(directory, '*.csv')):
+        try:
+            read_daq_header(path)
+        except (ValueError, OSError):
+            continue
+        paths.append(path)
+
+    if not paths:
+        raise ValueError("No csv to follow in " + os.path.abspath(directory))
+
+    return max(paths, key=os.path.getmtime)
+
+
+def run_live_analysis(config):
+    '''
+    Follows a DAQ log as it is written, and shows its results as they are updated
+
+    Parameters
+    ----------
+    config: dict
+        The configuration dictionary of execute_complete_analysis, of which FILE_SUBDIRECTORY,
+        SUPPRESS_ALL_PRINTS and the signal filters (see signal_filters.create_pipeline) are used,
+        along with the following fields:
+         1. LIVE_TAIL_PATH: string : Optional. The csv which is followed, relative to the
+                FILE_SUBDIRECTORY. Defaults to the most recently modified csv in it.
+         2. LIVE_POLL_INTERVAL_S: float : Optional. The time (s) between reads of the csv.
+                Defaults to 0.25.
+         3. LIVE_ROLLING_WINDOW_S: float : Optional. The duration (s) of the most recent
+                samples that the displayed windspeed, force and drag area are averaged over.
+                Defaults to 5.0.
+         4. LIVE_SUMMARY_PATH: string : Optional. A json file where the summary is written
+                whenever it is updated, for other programs to show. Defaults to no file.
+         5. LIVE_IDLE_TIMEOUT_S: float : Optional. If not 0, the analysis stops once nothing
+                was appended to the csv for this long (s). Defaults to 0, which follows the
+                csv until the analyzer is interrupted.
+
+    Returns
+    -------
+    dict
+        The final summary (see LiveAnalysis.summary), or None if the analysis was interrupted
+    '''
+    csv_path = config.get('LIVE_TAIL_PATH')
+    if csv_path:
+        csv_path = os.path.join(config['FILE_SUBDIRECTORY'], csv_path)
+    else:
+        csv_path = latest_log(config['FILE_SUBDIRECTORY'] or '.')
+
+    summary_path = config.get('LIVE_SUMMARY_PATH')
+    show = not config['SUPPRESS_ALL_PRINTS']
+
+    def on_update(summary):
+        if summary_path:
+            write_summary(summary_path, summary)
+        if show:
+            print('\r' + format_summary(summary), end='', flush=True)
+
+    if show:
+        print("Following " + csv_path + " (Ctrl+C to stop)")
+
+    try:
+        return asyncio.run(follow_log(
+            csv_path, on_update,
+            poll_interval_s=config.get('LIVE_POLL_INTERVAL_S', LIVE_POLL_INTERVAL_S),
+            idle_timeout_s=config.get('LIVE_IDLE_TIMEOUT_S', LIVE_IDLE_TIMEOUT_S),
+            rolling_window_s=config.get('LIVE_ROLLING_WINDOW_S', LIVE_ROLLING_WINDOW_S),
+            pipeline=signal_filters.create_pipeline(config)))
+    except KeyboardInterrupt:
+        return None
+    finally:
+        if show:
+            print()
@@ -0,0 +1,147 @@
+import numpy as np
+
+import analysis_engine
+import daq_log
+
+# How the logs are aligned on the common grid, see align_logs
+ALIGN_START = 'start'
+ALIGN_RUN = 'run'
+ALIGN_REFERENCES = (ALIGN_START, ALIGN_RUN)
+
+# The columns of every log that are compared, as (key, title)
+COMPARISON_CHANNELS = (('anemometer_averaged', "Windspeed (m/s)"),
+                       ('load_cell_averaged', "Force (lbf)"),
+                       ('drag_area', "Drag Area (ft^2)"))
+
+# The columns that are kept while a log is streamed, which are also those of segment_runs
+_KEPT_COLUMNS = ('time_ms', 'anemometer_averaged', 'load_cell_averaged', 'drag_area')
+
+
+def aligned_columns(csv_path, pipeline, columnar_dtype=None, constants=None):
+    """
+    Stream a log through a resampling pipeline and keep the columns that are compared.
+
+    Only a chunk of the log is read at a time, and only the columns of COMPARISON_CHANNELS (and
+    those needed to find its runs) are kept, at the resampled rate.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data, including the extension
+    pipeline: signal_filters.FilterPipeline
+        The processing of the samples, which must resample them
+    columnar_dtype: str=None
+        Whether the samples are read from a columnar file, see daq_log.iter_log_chunks
+    constants: dict=None
+        Numeric constants as returned by analysis_engine.analysis_constants. Default is None,
+        which uses the default values of SimplifiedConsts
+
+    Returns
+    -------
+    tuple of (numpy.ndarray, dict)
+        The index of every sample on the grid of the pipeline, and the kept columns
+    """
+    if pipeline.resampler is None:
+        raise ValueError("Logs can only be aligned once they are resampled, see RESAMPLE_RATE_HZ")
+
+    engine = pipeline.column_engine(constants)
+    indices = []
+    parts = []
+    for time_s, anemometer_raw, load_cell_raw in daq_log.iter_log_chunks(csv_path,
+                                                                         columnar_dtype, pipeline):
+        indices.append(np.rint(time_s * pipeline.resampler.rate_hz).astype(np.int64))
+        parts.append(engine.push(time_s, anemometer_raw, load_cell_raw))
+        parts[-1] = {key: parts[-1][key] for key in _KEPT_COLUMNS}
+    parts.append(engine.finish())
+
+    columns = {key: np.concatenate([part[key] for part in parts]) for key in _KEPT_COLUMNS}
+    return np.concatenate(indices or [np.empty(0, dtype=np.int64)]), columns
+
+
+def align_logs(logs, rate_hz, reference=ALIGN_START, constants=None, run_segmentation=None):
+    """
+    Place resampled logs on a common time grid, for their columns to be compared.
+
+    Parameters
+    ----------
+    logs: dict
+        The grid indices and columns of every log, as returned by aligned_columns, keyed by
+        its label. All of them are resampled at rate_hz
+    rate_hz: float
+        The rate of the grid (Hz)
+    reference: str
+        ALIGN_START to compare the logs from their first sample, or ALIGN_RUN from the start of
+        their first run (see analysis_engine.segment_runs), or from their first sample if they
+        have no run. Default is ALIGN_START
+    constants: dict=None
+        Numeric constants as returned by analysis_engine.analysis_constants, for the runs.
+        Default is None, which uses the default values of SimplifiedConsts
+    run_segmentation: dict=None
+        Keyword arguments of analysis_engine.segment_runs. Default is None, which uses the
+        default parameters.
+
+    Returns
+    -------
+    dict
+        - time_s: the times (s) of the common grid, from the reference of the logs
+        - labels: the labels of the logs, in order
+        - offsets_s: the time (s) of every log which is aligned at 0
+        - the key of every channel of COMPARISON_CHANNELS: the values of that column of every
+          log on the common grid (a 2D array, with a row per log), which are NaN outside the log
+    """
+    if reference not in ALIGN_REFERENCES:
+        raise ValueError("Unknown alignment reference: " + str(reference))
+
+    labels = list(logs)
+    offsets = []
+    for label in labels:
+        indices, columns = logs[label]
+        offset = int(indices[0]) if len(indices) else 0
+        if reference == ALIGN_RUN:
+            runs = analysis_engine.segment_runs(columns, constants, **(run_segmentation or {}))
+            if runs:
+                offset = int(indices[runs[0]['start_idx']])
+        offsets.append(offset)
+
+    shifted = [logs[label][0] - offset for label, offset in zip(labels, offsets)]
+    nonempty = [indices for indices in shifted if len(indices)]
+    first_idx = min(int(indices[0]) for indices in nonempty) if nonempty else 0
+    last_idx = max(int(indices[-1]) for indices in nonempty) if nonempty else -1
+
+    comparison = {'time_s': np.arange(first_idx, last_idx + 1) / rate_hz,
+                  'labels': labels,
+                  'offsets_s': [offset / rate_hz for offset in offsets]}
+    for key, _ in COMPARISON_CHANNELS:
+        values = np.full((len(labels), last_idx - first_idx + 1), np.nan)
+        for row, label, indices in zip(values, labels, shifted):
+            row[indices - first_idx] = logs[label][1][key]
+        comparison[key] = values
+
+    return comparison
+
+
+def comparison_table(comparison):
+    """
+    Flatten a comparison of align_logs into the columns of a table.
+
+    Parameters
+    ----------
+    comparison: dict
+        The comparison
+
+    Returns
+    -------
+    tuple of (dict, list of str, list of str)
+        The columns, along with their keys and titles in order: the time, then every channel of
+        COMPARISON_CHANNELS of every log
+    """
+    columns = {'time_s': comparison['time_s']}
+    keys = ['time_s']
+    titles = ["Time (s)"]
+    for key, title in COMPARISON_CHANNELS:
+        for log_idx, label in enumerate(comparison['labels']):
+            keys.append(key + '_' + str(log_idx))
+            titles.append(label + " " + title)
+            columns[keys[-1]] = comparison[key][log_idx]
+
+    return columns, keys, titles
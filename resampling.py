@@ -0,0 +1,94 @@
+import math
+
+import numpy as np
+
+
+class Resampler():
+    """
+    Interpolates samples linearly onto a uniform time grid.
+
+    The grid holds every multiple of 1 / rate_hz within the timestamps of the samples, so that
+    all logs resampled at the same rate share their grid points. The timestamps are assumed to be
+    increasing. A log that is resampled in consecutive chunks is resampled exactly as a whole,
+    see streamer().
+    """
+
+    def __init__(self, rate_hz):
+        """
+        Parameters
+        ----------
+        rate_hz: float
+            The rate of the grid (Hz)
+        """
+        self.rate_hz = float(rate_hz)
+        if self.rate_hz <= 0:
+            raise ValueError("The resampling rate must be positive: " + str(rate_hz))
+
+    def grid_indices(self, start_s, end_s):
+        """Get the indices k of the grid times k / rate_hz from start_s to end_s (included)."""
+        return np.arange(math.ceil(start_s * self.rate_hz), math.floor(end_s * self.rate_hz) + 1)
+
+    def apply(self, time_s, *channels):
+        """
+        Resample the samples of a whole log.
+
+        Parameters
+        ----------
+        time_s: numpy.ndarray
+            The timestamps (s) of the samples
+        channels: numpy.ndarray
+            The readings of every channel
+
+        Returns
+        -------
+        tuple of numpy.ndarray
+            The grid times (s) and the interpolated readings of every channel at them
+        """
+        if len(time_s) == 0:
+            return (np.asarray(time_s, dtype=np.float64),) +\
+                tuple(np.asarray(channel, dtype=np.float64) for channel in channels)
+
+        grid = self.grid_indices(time_s[0], time_s[-1]) / self.rate_hz
+        return (grid,) + tuple(np.interp(grid, time_s, channel) for channel in channels)
+
+    def streamer(self):
+        """Create a _ResampleStreamer, which resamples a log that is read in consecutive chunks."""
+        return _ResampleStreamer(self)
+
+    def parameters(self):
+        """Get the rate of the grid, as part of the parameters of a pipeline."""
+        return self.rate_hz
+
+
+class _ResampleStreamer():
+    """
+    Resamples a log that is read in consecutive chunks.
+
+    The last sample of every chunk is kept, so that the grid points between it and the first
+    sample of the next chunk are interpolated between the same samples as in the whole log. No
+    grid point is held back, so there is nothing to complete at the end of the log.
+    """
+
+    def __init__(self, resampler):
+        self.resampler = resampler
+        self._last = None
+        self._next_idx = None
+
+    def push(self, time_s, *channels):
+        channels = (time_s,) + channels
+        if self._last is not None:
+            channels = tuple(np.concatenate((last, channel))
+                             for last, channel in zip(self._last, channels))
+        if len(channels[0]) == 0:
+            return tuple(np.empty(0) for _ in channels)
+
+        time_s = channels[0]
+        if self._next_idx is None:
+            self._next_idx = math.ceil(time_s[0] * self.resampler.rate_hz)
+        end_idx = math.floor(time_s[-1] * self.resampler.rate_hz) + 1
+
+        grid = np.arange(self._next_idx, max(end_idx, self._next_idx)) / self.resampler.rate_hz
+        self._next_idx = max(end_idx, self._next_idx)
+        self._last = tuple(channel[-1:] for channel in channels)
+
+        return (grid,) + tuple(np.interp(grid, time_s, channel) for channel in channels[1:])
@@ -0,0 +1,210 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+
+import numpy as np
+
+import analysis_engine
+import signal_filters
+
+# Increase whenever the content of the cached results changes, to invalidate older entries
+CACHE_FORMAT_VERSION = 4
+
+CACHE_FILE_EXTENSION = '.npz'
+
+DEFAULT_CACHE_DIRECTORY_NAME = '.analysis_cache'
+DEFAULT_CACHE_MAX_BYTES = 1024 ** 3
+
+# The name under which the summary is stored next to the columns in a cache file
+_SUMMARY_KEY = '__summary__'
+
+
+def file_digest(path, block_size=1024 ** 2):
+    """
+    Hash the contents of a file.
+
+    Parameters
+    ----------
+    path: path-format str
+        The file to hash
+    block_size: int
+        How many bytes are read at once
+
+    Returns
+    -------
+    str
+        The hex SHA-256 digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def analysis_parameters(output_mode, constants=None, columnar_dtype=None, pipeline=None,
+                        run_segmentation=None):
+    """
+    Collect every parameter that the cached results of a file depend on.
+
+    Parameters
+    ----------
+    output_mode: str
+        The export mode the results were prepared for
+    constants: dict=None
+        Numeric constants as returned by analysis_engine.analysis_constants. Default is None,
+        which uses the default values of SimplifiedConsts
+    columnar_dtype: str=None
+        The dtype of the readings, if they were loaded from a columnar file. Default is None,
+        which means that they were parsed from the csv as float64.
+    pipeline: signal_filters.FilterPipeline=None
+        The processing of the samples and the averaging windows. Default is None, which means
+        that the samples were kept as they are, with the default windows.
+    run_segmentation: dict=None
+        Keyword arguments of analysis_engine.segment_runs, which the cached summary depends on.
+        Default is None, which uses the default parameters.
+
+    Returns
+    -------
+    dict
+        The parameters, all of which are json-serializable
+    """
+    if constants is None:
+        constants = analysis_engine.analysis_constants()
+    if pipeline is None:
+        pipeline = signal_filters.DEFAULT_PIPELINE
+
+    parameters = {'cache_format_version': CACHE_FORMAT_VERSION,
+                  'output_mode': output_mode,
+                  'constants': constants,
+                  'reading_dtype': columnar_dtype or 'float64',
+                  'run_segmentation': analysis_engine.run_segmentation_parameters(
+                      run_segmentation)}
+    parameters.update(pipeline.parameters())
+
+    return parameters
+
+
+class ResultCache():
+    """
+    Content-addressed on-disk cache of analyzed DAQ logs.
+
+    Every entry is keyed by the hash of the csv contents together with all of the analysis
+    parameters, so an entry is never used once either of them changes. An entry holds the computed
+    columns of the log and its summary (see analysis_engine.summarize_log) in a single npz file.
+
+    The total size of the cache is bounded. Whenever it is exceeded, the least recently used
+    entries are evicted, where the modification time of an entry is updated every time it is used.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        """
+        Parameters
+        ----------
+        directory: path-format str
+            Where the entries are stored. It is created if it does not exist.
+        max_bytes: int
+            The maximum total size of all entries
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, csv_path, parameters):
+        """
+        Get the key of the entry of a csv file.
+
+        Parameters
+        ----------
+        csv_path: path-format str
+            The path of the csv data
+        parameters: dict
+            The analysis parameters, as returned by analysis_parameters
+
+        Returns
+        -------
+        str
+            The key of the entry
+        """
+        digest = hashlib.sha256(file_digest(csv_path).encode())
+        digest.update(json.dumps(parameters, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def load(self, key):
+        """
+        Get an entry from the cache.
+
+        Parameters
+        ----------
+        key: str
+            The key of the entry, as returned by key()
+
+        Returns
+        -------
+        tuple of (dict, dict) or None
+            The columns as numpy arrays and the summary, or None if the entry is not cached
+        """
+        path = self._entry_path(key)
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                columns = {name: entry[name] for name in entry.files if name != _SUMMARY_KEY}
+                summary = json.loads(str(entry[_SUMMARY_KEY]))
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            # Missing, evicted by another process in the meantime, or incomplete
+            return None
+
+        return columns, summary
+
+    def store(self, key, columns, summary):
+        """
+        Add an entry to the cache, and evict the least recently used entries if it is too large.
+
+        Parameters
+        ----------
+        key: str
+            The key of the entry, as returned by key()
+        columns: dict
+            The columns as numpy arrays, keyed by their names
+        summary: dict
+            The json-serializable summary of the columns
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        buffer = io.BytesIO()
+        np.savez(buffer, **columns, **{_SUMMARY_KEY: np.array(json.dumps(summary))})
+
+        # Written to a temporary file first, so that other processes never see a partial entry
+        file_handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(file_handle, 'wb') as temp_file:
+            temp_file.write(buffer.getvalue())
+        os.replace(temp_path, self._entry_path(key))
+
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(CACHE_FILE_EXTENSION):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total_size -= size
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key + CACHE_FILE_EXTENSION)
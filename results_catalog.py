@@ -0,0 +1,329 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import analysis_engine
+import result_cache
+
+DEFAULT_CATALOG_NAME = 'results_catalog.sqlite'
+
+# The summary statistics of a log that are kept in their own columns, see
+# analysis_engine.META_ANALYSIS_STATISTICS
+CATALOG_STATISTICS = tuple(key for key, _ in analysis_engine.META_ANALYSIS_STATISTICS)
+
+# The statistics of a run that are kept, see analysis_engine.segment_runs
+CATALOG_RUN_STATISTICS = ('start_s', 'end_s', 'duration_s', 'mean_force', 'peak_force',
+                          'mean_drag_area', 'mean_windspeed_ft_s')
+
+_INTEGER_STATISTICS = ('sample_count', 'run_count')
+
+# The columns of the logs table
+_LOG_COLUMNS = ('id', 'path', 'file_hash', 'sheetname', 'output_path', 'analyzed_at', 'row_count',
+                'parameters', 'parameters_hash', 'windspeed_threshold',
+                'force_threshold') + CATALOG_STATISTICS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    file_hash TEXT NOT NULL,
+    sheetname TEXT,
+    output_path TEXT,
+    analyzed_at REAL NOT NULL,
+    row_count INTEGER,
+    parameters TEXT NOT NULL,
+    parameters_hash TEXT NOT NULL,
+    windspeed_threshold REAL,
+    force_threshold REAL,
+    {statistics},
+    UNIQUE (path, parameters_hash)
+);
+CREATE INDEX IF NOT EXISTS logs_by_hash ON logs (file_hash);
+CREATE INDEX IF NOT EXISTS logs_by_sheetname ON logs (sheetname);
+CREATE INDEX IF NOT EXISTS logs_by_drag_area ON logs (mean_drag_area);
+CREATE INDEX IF NOT EXISTS logs_by_thresholds ON logs (windspeed_threshold, force_threshold);
+CREATE TABLE IF NOT EXISTS runs (
+    log_id INTEGER NOT NULL REFERENCES logs (id) ON DELETE CASCADE,
+    run_idx INTEGER NOT NULL,
+    {run_statistics},
+    PRIMARY KEY (log_id, run_idx)
+);
+CREATE INDEX IF NOT EXISTS runs_by_drag_area ON runs (mean_drag_area);
+CREATE INDEX IF NOT EXISTS runs_by_windspeed ON runs (mean_windspeed_ft_s);
+""".format(statistics=",\n    ".join(key + (" INTEGER" if key in _INTEGER_STATISTICS else " REAL")
+                                    for key in CATALOG_STATISTICS),
+           run_statistics=",\n    ".join(key + " REAL" for key in CATALOG_RUN_STATISTICS))
+
+# The columns of logs() and runs() that are printed by the command line
+_LOG_LISTING = ('id', 'sheetname', 'row_count', 'run_count', 'mean_drag_area', 'drag_coeff',
+                'path')
+_RUN_LISTING = ('log_id', 'run_idx', 'sheetname', 'duration_s', 'mean_windspeed_ft_s',
+                'mean_force', 'mean_drag_area')
+
+
+def catalog_parameters(output_mode, constants=None, columnar_dtype=None, pipeline=None,
+                       run_segmentation=None):
+    """
+    Collect the analysis parameters that the statistics of a log depend on.
+
+    Parameters
+    ----------
+    output_mode, constants, columnar_dtype, pipeline:
+        See result_cache.analysis_parameters
+    run_segmentation: dict=None
+        Keyword arguments of analysis_engine.segment_runs. Default is None, which uses the
+        default parameters.
+
+    Returns
+    -------
+    dict
+        The parameters, all of which are json-serializable
+    """
+    parameters = result_cache.analysis_parameters(output_mode, constants, columnar_dtype,
+                                                  pipeline, run_segmentation)
+    del parameters['cache_format_version']
+
+    return parameters
+
+
+class ResultsCatalog():
+    """
+    The summary statistics of every analyzed DAQ log, kept in a SQLite database.
+
+    A log is recorded once per set of analysis parameters: analyzing it again with the same
+    parameters replaces its record, and with other parameters adds another. Each record holds
+    the hash of the csv, its sheetname and row count, the parameters as json, and the statistics
+    of analysis_engine.META_ANALYSIS_STATISTICS in indexed columns, so that the logs of every
+    campaign can be compared without opening any workbook. The runs of each log are kept in a
+    separate table. Several processes can use the same database.
+    """
+
+    def __init__(self, path, read_only=False):
+        """
+        Parameters
+        ----------
+        path: path-format str
+            The path of the database, which is created if it does not exist
+        read_only: bool
+            Whether the database is only queried, and any change is refused. Default is False.
+        """
+        self.path = path
+        # Every statement is committed on its own, unless it is part of a record()
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        if read_only:
+            self.connection.execute("PRAGMA query_only=ON")
+        else:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.executescript(_SCHEMA)
+        self.connection.execute("PRAGMA foreign_keys=ON")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def record(self, csv_path, summary, parameters, sheetname=None, output_path=None,
+               file_hash=None, include_runs=True):
+        """
+        Record the statistics of an analyzed log.
+
+        Parameters
+        ----------
+        csv_path: path-format str
+            The path of the csv data, including the extension
+        summary: dict
+            The summary of the log, see analysis_engine.summarize_log
+        parameters: dict
+            The parameters of the analysis, see catalog_parameters
+        sheetname: str=None
+            The name of the log in the analysis. Default is None
+        output_path: path-format str=None
+            Where the analysis was exported. Default is None
+        file_hash: str=None
+            The hash of the csv, see result_cache.file_digest. Default is None, which hashes it.
+        include_runs: bool
+            Whether the runs of the log are recorded too. Default is True.
+
+        Returns
+        -------
+        int
+            The id of the record
+        """
+        if file_hash is None:
+            file_hash = result_cache.file_digest(csv_path)
+        encoded_parameters = json.dumps(parameters, sort_keys=True)
+        constants = parameters.get('constants', {})
+
+        values = {'path': os.path.abspath(csv_path),
+                  'file_hash': file_hash,
+                  'sheetname': sheetname,
+                  'output_path': output_path and os.path.abspath(output_path),
+                  'analyzed_at': time.time(),
+                  'row_count': summary.get('row_count'),
+                  'parameters': encoded_parameters,
+                  'parameters_hash': hashlib.sha256(encoded_parameters.encode()).hexdigest(),
+                  'windspeed_threshold': constants.get('WINDSPEED_THRESHOLD'),
+                  'force_threshold': constants.get('FORCE_THRESHOLD')}
+        values.update((key, summary.get(key)) for key in CATALOG_STATISTICS)
+
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            log_id = self.connection.execute(
+                "INSERT INTO logs (" + ", ".join(values) + ") VALUES (" +
+                ", ".join("?" * len(values)) + ") ON CONFLICT (path, parameters_hash) DO UPDATE "
+                "SET " + ", ".join(key + " = excluded." + key for key in values) +
+                " RETURNING id", tuple(values.values())).fetchone()[0]
+
+            self.connection.execute("DELETE FROM runs WHERE log_id = ?", (log_id,))
+            if include_runs:
+                self.connection.executemany(
+                    "INSERT INTO runs (log_id, run_idx, " + ", ".join(CATALOG_RUN_STATISTICS) +
+                    ") VALUES (" + ", ".join("?" * (len(CATALOG_RUN_STATISTICS) + 2)) + ")",
+                    [(log_id, run_idx) + tuple(run.get(key) for key in CATALOG_RUN_STATISTICS)
+                     for run_idx, run in enumerate(summary.get('runs', []))])
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+
+        return log_id
+
+    def logs(self, where=None, order_by=None, limit=None, parameters=()):
+        """
+        Get the records of the logs.
+
+        Parameters
+        ----------
+        where: str=None
+            An SQL condition on the columns of the logs, e.g. "mean_drag_area > ?", with
+            json_extract(parameters, '$.constants.AIR_DENSITY') for the other parameters.
+            Default is None, which gets every log.
+        order_by: str=None
+            The SQL ordering, e.g. "mean_drag_area DESC". Default is None, which orders them as
+            they were first recorded.
+        limit: int=None
+            The maximum number of logs. Default is None, which has no limit.
+        parameters: tuple
+            The values of the placeholders of where. Default is none.
+
+        Returns
+        -------
+        list of dict
+            Every log, with the columns of the logs table
+        """
+        return self.query("SELECT * FROM logs" + _clauses(where, order_by or "id", limit),
+                          parameters)
+
+    def runs(self, where=None, order_by=None, limit=None, parameters=()):
+        """
+        Get the runs of the logs, along with the columns of their log.
+
+        The parameters are those of logs(), where the columns of the runs are prefixed by
+        'runs.' when they are also a column of the logs, e.g. "runs.mean_drag_area > ?".
+
+        Returns
+        -------
+        list of dict
+            Every run, with the columns of the runs table and those of its log, except the ones
+            of the same name
+        """
+        log_columns = ", ".join("logs." + key for key in _LOG_COLUMNS
+                                if key not in CATALOG_RUN_STATISTICS)
+        return self.query("SELECT runs.*, " + log_columns +
+                          " FROM runs JOIN logs ON logs.id = runs.log_id" +
+                          _clauses(where, order_by or "runs.log_id, runs.run_idx", limit),
+                          parameters)
+
+    def query(self, sql, parameters=()):
+        """Run an SQL query on the catalog and get its rows as dicts."""
+        return [dict(row) for row in self.connection.execute(sql, parameters)]
+
+
+def _clauses(where, order_by, limit):
+    clauses = ""
+    if where:
+        clauses += " WHERE " + where
+    clauses += " ORDER BY " + order_by
+    if limit is not None:
+        clauses += " LIMIT " + str(int(limit))
+    return clauses
+
+
+def format_rows(rows, keys=None):
+    """
+    Format rows of the catalog as an aligned text table.
+
+    Parameters
+    ----------
+    rows: list of dict
+        The rows, as returned by ResultsCatalog.query
+    keys: tuple=None
+        The columns to include. Default is None, which includes every column of the first row.
+
+    Returns
+    -------
+    str
+        The table, with a line per row under a line of the column names
+    """
+    if keys is None:
+        keys = tuple(rows[0]) if rows else ()
+
+    def cell(value):
+        if isinstance(value, float):
+            return format(value, '.6g')
+        return "" if value is None else str(value)
+
+    lines = [keys] + [tuple(cell(row.get(key)) for key in keys) for row in rows]
+    widths = [max(len(line[idx]) for line in lines) for idx in range(len(keys))]
+
+    return "\n".join("  ".join(text.ljust(width) for text, width in zip(line, widths)).rstrip()
+                     for line in lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query the catalog of analyzed logs")
+    parser.add_argument('database', help="the database of the catalog, see RESULTS_CATALOG_PATH")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    for command, help_text in (('logs', "list the analyzed logs"),
+                               ('runs', "list the runs of the analyzed logs")):
+        command_parser = commands.add_parser(command, help=help_text)
+        command_parser.add_argument('--where', help="an SQL condition, e.g. "
+                                    "\"mean_drag_area > 5 AND sheetname LIKE 'reef%%'\"")
+        command_parser.add_argument('--order-by', help="an SQL ordering, e.g. "
+                                    "\"mean_drag_area DESC\"")
+        command_parser.add_argument('--limit', type=int)
+        command_parser.add_argument('--all-columns', action='store_true',
+                                    help="print every column instead of the main ones")
+
+    sql_parser = commands.add_parser('sql', help="run any read-only SQL query")
+    sql_parser.add_argument('query')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        parser.error("no results catalog at " + args.database)
+
+    with ResultsCatalog(args.database, read_only=True) as catalog:
+        try:
+            if args.command == 'sql':
+                rows, keys = catalog.query(args.query), None
+            elif args.command == 'logs':
+                rows = catalog.logs(args.where, args.order_by, args.limit)
+                keys = None if args.all_columns else _LOG_LISTING
+            else:
+                rows = catalog.runs(args.where, args.order_by, args.limit)
+                keys = None if args.all_columns else _RUN_LISTING
+        except sqlite3.Error as err:
+            parser.error(str(err))
+
+        print(format_rows(rows, keys))
+        print(str(len(rows)) + " row(s)")
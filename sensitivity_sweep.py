@@ -0,0 +1,358 @@
+import os
+
+import numpy as np
+
+import analysis_engine
+import daq_log
+import exporters
+import signal_filters
+
+# The constants that are swept, as (defined name, config key of its values, key in the results)
+SWEEP_PARAMETERS = (('ANEMOMETER_FACTOR', 'SWEEP_ANEMOMETER_FACTOR', 'anemometer_factor'),
+                    ('LOAD_CELL_FACTOR', 'SWEEP_LOAD_CELL_FACTOR', 'load_cell_factor'),
+                    ('AIR_DENSITY_KG_M3', 'SWEEP_AIR_DENSITY_KG_M3', 'air_density_kg_m3'))
+
+# The statistics of every point of the grid, as (key, title)
+SWEEP_STATISTICS = (('mean_drag_area', "Mean Drag Area [CdSo] (ft^2)"),
+                    ('drag_coeff', "Drag Coefficient (unitless)"),
+                    ('sample_count', "Samples Above Thresholds"))
+
+# Appended to the path of a log (without its extension) for its sweep table and matrix
+SWEEP_SUFFIX = '___sweep'
+
+
+def sweep_values(spec, nominal):
+    """
+    Get the values of a swept constant.
+
+    Parameters
+    ----------
+    spec: list or dict or None
+        The values as a list, or a dict of 'start', 'stop' and 'count' for evenly spaced values
+        (including both ends). None or an empty list only uses the nominal value.
+    nominal: float
+        The value of the constant in SimplifiedConsts
+
+    Returns
+    -------
+    numpy.ndarray
+        The distinct values, in increasing order
+    """
+    if isinstance(spec, dict):
+        values = np.linspace(float(spec['start']), float(spec['stop']), int(spec['count']))
+    elif spec:
+        values = np.asarray(spec, dtype=np.float64)
+    else:
+        values = np.array([nominal], dtype=np.float64)
+
+    values = np.unique(values)
+    if len(values) == 0 or values[0] <= 0:
+        raise ValueError("The swept values must be positive: " + str(spec))
+
+    return values
+
+
+def sweep_grid(config, constants=None):
+    """
+    Get the grid of the swept constants selected in a configuration.
+
+    Parameters
+    ----------
+    config: dict
+        The configuration, see run_sweep
+    constants: dict=None
+        Numeric constants as returned by analysis_engine.analysis_constants, for the nominal
+        values. Default is None, which uses the default values of SimplifiedConsts
+
+    Returns
+    -------
+    dict
+        The values of every constant of SWEEP_PARAMETERS, keyed by its defined name
+    """
+    if constants is None:
+        constants = analysis_engine.analysis_constants()
+
+    return {name: sweep_values(config.get(config_key), constants[name])
+            for name, config_key, _ in SWEEP_PARAMETERS}
+
+
+def threshold_counts(values, thresholds):
+    """
+    Count how many of the increasing thresholds every sample reaches (value >= threshold).
+
+    NaN samples reach none of them, as in the comparisons of analysis_engine.threshold_mask.
+    """
+    counts = np.searchsorted(thresholds, values, side='right')
+    counts[np.isnan(values)] = 0
+    return counts
+
+
+def sweep_columns(columns, grid, constants=None):
+    """
+    Evaluate the mean drag area and drag coefficient of a log over a grid of constants.
+
+    The log is analyzed once with unit calibration factors, since every other calibration only
+    scales the averaged windspeed and force, and the drag area by factor^2 / (load factor *
+    density). Only the samples above the thresholds change with the factors: the windspeed
+    threshold applies to the raw average divided by the anemometer factor, so the samples are
+    binned by how many of the (increasing) factors they pass for each channel, and the sums of
+    every combination of factors are the cumulative sums of the 2D histogram. This costs one
+    pass over the samples, however many points the grid has. The results match a full analysis
+    with the same constants to within rounding.
+
+    Parameters
+    ----------
+    columns: daq_log.DaqLog or dict
+        The log with its derived columns (see analysis_engine.compute_derived_columns), computed
+        with ANEMOMETER_FACTOR and LOAD_CELL_FACTOR of 1 (see unit_constants)
+    grid: dict
+        The increasing values of the constants of SWEEP_PARAMETERS, see sweep_grid
+    constants: dict=None
+        Numeric constants as returned by analysis_engine.analysis_constants, for the
+        thresholds, nominal surface area and density conversion. Default is None, which uses
+        the default values of SimplifiedConsts
+
+    Returns
+    -------
+    dict
+        The values of the constants under their key of SWEEP_PARAMETERS, and mean_drag_area,
+        drag_coeff and sample_count as arrays indexed by the anemometer factor, load cell factor
+        and air density, where the statistics are NaN if no sample is above the thresholds
+    """
+    if constants is None:
+        constants = analysis_engine.analysis_constants()
+
+    anemometer_factor, load_cell_factor, air_density = (grid[name]
+                                                        for name, _, _ in SWEEP_PARAMETERS)
+    # The drag area of the log at a density of 1 slug/ft^3
+    unit_drag_area = columns['drag_area'] * constants['AIR_DENSITY_SLG_FT3']
+
+    windspeed_counts = threshold_counts(columns['anemometer_averaged'],
+                                        constants['WINDSPEED_THRESHOLD'] * anemometer_factor)
+    force_counts = threshold_counts(columns['load_cell_averaged'],
+                                    constants['FORCE_THRESHOLD'] * load_cell_factor)
+
+    shape = (len(anemometer_factor) + 1, len(load_cell_factor) + 1)
+    bins = np.ravel_multi_index((windspeed_counts, force_counts), shape)
+    histograms = [np.bincount(bins, weights, minlength=shape[0] * shape[1]).reshape(shape)
+                  for weights in (unit_drag_area, None)]
+
+    # The samples that pass factors i and j are those in bins [i + 1:, j + 1:]
+    sums, counts = (histogram[::-1, ::-1].cumsum(axis=0).cumsum(axis=1)[-2::-1, -2::-1]
+                    for histogram in histograms)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        unit_mean = np.where(counts > 0, sums / counts, np.nan)
+
+    density_slg_ft3 = air_density * (constants['AIR_DENSITY_SLG_FT3'] /
+                                     constants['AIR_DENSITY_KG_M3'])
+    mean_drag_area = unit_mean[:, :, None] * (anemometer_factor[:, None, None] ** 2) /\
+        (load_cell_factor[None, :, None] * density_slg_ft3[None, None, :])
+
+    result = {key: grid[name] for name, _, key in SWEEP_PARAMETERS}
+    result['mean_drag_area'] = mean_drag_area
+    result['drag_coeff'] = mean_drag_area / constants['NOM_SA_FT2']
+    result['sample_count'] = np.broadcast_to(counts.astype(np.int64)[:, :, None],
+                                             mean_drag_area.shape)
+    return result
+
+
+def unit_constants(constants):
+    """Get a copy of the constants with unit calibration factors, see sweep_columns."""
+    return dict(constants, ANEMOMETER_FACTOR=1.0, LOAD_CELL_FACTOR=1.0)
+
+
+def sweep_csv(csv_path, grid, constants=None, pipeline=None):
+    """
+    Parse a DAQ log once and evaluate it over a grid of constants, see sweep_columns.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data, including the extension
+    grid: dict
+        The values of the swept constants, see sweep_grid
+    constants: dict=None
+        Numeric constants as returned by analysis_engine.analysis_constants. Default is None,
+        which uses the default values of SimplifiedConsts
+    pipeline: signal_filters.FilterPipeline=None
+        The processing of the samples and the averaging windows. Default is None, which keeps the
+        samples as they are, with the default windows.
+
+    Returns
+    -------
+    dict
+        The results of sweep_columns, along with the number of samples under 'row_count'
+    """
+    if constants is None:
+        constants = analysis_engine.analysis_constants()
+
+    log = daq_log.read_log(csv_path, pipeline=pipeline).derive(pipeline,
+                                                                unit_constants(constants))
+    result = sweep_columns(log, grid, constants)
+    result['row_count'] = len(log)
+    return result
+
+
+def sensitivity(result, constants=None):
+    """
+    Summarize how sensitive the mean drag area is to every swept constant.
+
+    Parameters
+    ----------
+    result: dict
+        The results of sweep_columns
+    constants: dict=None
+        Numeric constants as returned by analysis_engine.analysis_constants, for the nominal
+        values. Default is None, which uses the default values of SimplifiedConsts
+
+    Returns
+    -------
+    dict
+        - nominal: the mean drag area (ft^2) at the grid point nearest to the nominal constants
+        - minimum and maximum: the extremes of the mean drag area over the whole grid
+        - the key of every constant in SWEEP_PARAMETERS: a dict of the lowest and highest
+          values, the mean drag area at each of them (the other constants being nearest to
+          their nominal value) and the relative change (%) between them
+    """
+    if constants is None:
+        constants = analysis_engine.analysis_constants()
+
+    mean_drag_area = result['mean_drag_area']
+    nominal_idx = tuple(int(np.argmin(np.abs(result[key] - constants[name])))
+                        for name, _, key in SWEEP_PARAMETERS)
+
+    def statistic(value):
+        return None if np.isnan(value) else float(value)
+
+    finite = mean_drag_area[~np.isnan(mean_drag_area)]
+    summary = {'nominal': statistic(mean_drag_area[nominal_idx]),
+               'minimum': float(finite.min()) if len(finite) else None,
+               'maximum': float(finite.max()) if len(finite) else None}
+
+    for axis, (_, _, key) in enumerate(SWEEP_PARAMETERS):
+        ends = []
+        for end_idx in (0, -1):
+            idx = list(nominal_idx)
+            idx[axis] = end_idx
+            ends.append(statistic(mean_drag_area[tuple(idx)]))
+
+        change = None
+        if None not in ends and ends[0] != 0:
+            change = (ends[1] - ends[0]) / ends[0] * 100
+        summary[key] = {'low': float(result[key][0]), 'high': float(result[key][-1]),
+                        'low_drag_area': ends[0], 'high_drag_area': ends[1],
+                        'change_percent': change}
+
+    return summary
+
+
+def format_sensitivity(csv_path, result, summary):
+    """
+    Format the summary of sensitivity as a compact table.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data
+    result: dict
+        The results of sweep_csv
+    summary: dict
+        The summary of sensitivity
+
+    Returns
+    -------
+    str
+        The table, with the file, its number of samples and grid points on the first line
+    """
+    def number(value):
+        return "-" if value is None else format(value, '.6g')
+
+    lines = [csv_path + " (" + str(result['row_count']) + " samples, " +
+             str(result['mean_drag_area'].size) + " grid points)",
+             "    " + "Nominal CdSo (ft^2)".ljust(24) + number(summary['nominal']),
+             "    " + "Range over grid (ft^2)".ljust(24) + number(summary['minimum']) + " to " +
+             number(summary['maximum'])]
+    for _, _, key in SWEEP_PARAMETERS:
+        ends = summary[key]
+        lines.append("    " + key.ljust(24) + number(ends['low']) + " -> " + number(ends['high']) +
+                     ": CdSo " + number(ends['low_drag_area']) + " -> " +
+                     number(ends['high_drag_area']) + " (" + number(ends['change_percent']) +
+                     " %)")
+
+    return "\n".join(lines)
+
+
+def export_sweep(export_path, result):
+    """
+    Write the sensitivity table (csv) and the heat-map matrices (npz) of a log.
+
+    The table has a row per point of the grid. The npz archive holds the values of every
+    constant and the statistics of SWEEP_STATISTICS as arrays indexed by the anemometer factor,
+    load cell factor and air density, so that any two of them can be plotted as a heat map.
+
+    Parameters
+    ----------
+    export_path: path-format str
+        Where the sweep is written, without the extension
+
+    Returns
+    -------
+    list of str
+        The paths of the table and the archive
+    """
+    parameter_keys = [key for _, _, key in SWEEP_PARAMETERS]
+    points = np.meshgrid(*(result[key] for key in parameter_keys), indexing='ij')
+    table = {key: values.ravel() for key, values in zip(parameter_keys, points)}
+    table.update((key, np.ravel(result[key])) for key, _ in SWEEP_STATISTICS)
+
+    keys = parameter_keys + [key for key, _ in SWEEP_STATISTICS]
+    titles = [name for name, _, _ in SWEEP_PARAMETERS] + [title for _, title in SWEEP_STATISTICS]
+    table_path = exporters.export_table(exporters.EXPORT_FORMAT_CSV, export_path, table, keys,
+                                        titles)
+
+    matrix_path = export_path + exporters.NpzExporter.extension
+    np.savez(matrix_path, **{key: np.asarray(result[key]) for key in keys})
+
+    return [table_path, matrix_path]
+
+
+def run_sweep(config, csv_paths):
+    '''
+    Evaluates the mean drag area of DAQ logs over a grid of calibration and atmosphere constants
+
+    Every log is parsed once, and its sensitivity table and heat-map matrices are written next to
+    it (see export_sweep), with SWEEP_SUFFIX added to its name.
+
+    Parameters
+    ----------
+    config: dict
+        The configuration dictionary of execute_complete_analysis, of which SUPPRESS_ALL_PRINTS
+        and the signal filters (see signal_filters.create_pipeline) are used, along with the
+        following fields:
+         1. SWEEP_ANEMOMETER_FACTOR: list or dict : Optional. The values of ANEMOMETER_FACTOR,
+                as a list or as {'start': ..., 'stop': ..., 'count': ...} for evenly spaced
+                values. Defaults to the value in SimplifiedConsts only.
+         2. SWEEP_LOAD_CELL_FACTOR: list or dict : Optional. The same for LOAD_CELL_FACTOR.
+         3. SWEEP_AIR_DENSITY_KG_M3: list or dict : Optional. The same for AIR_DENSITY_KG_M3.
+    csv_paths: list of path-format str
+        The csv of every log, including the extension
+
+    Returns
+    -------
+    dict
+        The results of sweep_csv of every log, keyed by its csv path
+    '''
+    constants = analysis_engine.analysis_constants()
+    grid = sweep_grid(config, constants)
+    pipeline = signal_filters.create_pipeline(config)
+
+    results = {}
+    for csv_path in csv_paths:
+        result = sweep_csv(csv_path, grid, constants, pipeline)
+        export_sweep(os.path.splitext(csv_path)[0] + SWEEP_SUFFIX, result)
+        results[csv_path] = result
+
+        if not config['SUPPRESS_ALL_PRINTS']:
+            print(format_sensitivity(csv_path, result, sensitivity(result, constants)))
+
+    return results
@@ -0,0 +1,674 @@
+import bisect
+import itertools
+
+import numpy as np
+
+import analysis_engine
+import resampling
+
+# The channels that can be filtered, in the order of the samples after the timestamp
+CHANNELS = ('anemometer', 'load_cell')
+
+# The filter types of a filter specification, see create_filter
+FILTER_MOVING_AVERAGE = 'moving_average'
+FILTER_EMA = 'ema'
+FILTER_MEDIAN = 'median'
+FILTER_DESPIKE = 'despike'
+
+# The smallest weight of a sample within a block of the exponential moving average, which keeps
+# the inverse weights of the block within the range of a float, see ExponentialMovingAverage
+EMA_MIN_BLOCK_WEIGHT = 1e-100
+
+# The scale of the median absolute deviation of normally distributed samples to their standard
+# deviation
+MAD_TO_STD = 1.4826
+
+
+class WindowFilter():
+    """
+    A filter of every sample over a centered window of the samples around it.
+
+    Like the averaging of the data sheet, the window is clipped to the samples that exist near
+    the ends of the log. A log that is filtered in consecutive chunks is filtered exactly as a
+    whole, see streamer().
+    """
+
+    def __init__(self, window):
+        """
+        Parameters
+        ----------
+        window: int
+            How many samples on each side of the current sample are included
+        """
+        self.window = int(window)
+
+    def apply(self, values):
+        """
+        Filter the samples of a whole log.
+
+        Parameters
+        ----------
+        values: numpy.ndarray
+            The samples
+
+        Returns
+        -------
+        numpy.ndarray
+            The filtered samples, same length as values
+        """
+        raise NotImplementedError
+
+    def streamer(self):
+        """Create a _WindowStreamer, which filters a log that is read in consecutive chunks."""
+        return _WindowStreamer(self.apply, self.window)
+
+    def parameters(self):
+        """Get the type and parameters of the filter, as a specification of create_filter."""
+        return {'type': self.filter_type, 'window': self.window}
+
+
+class MovingAverage(WindowFilter):
+    """The average of the window, computed as analysis_engine.centered_average."""
+
+    filter_type = FILTER_MOVING_AVERAGE
+
+    def apply(self, values):
+        return analysis_engine.centered_average(values, self.window)
+
+
+class MovingMedian(WindowFilter):
+    """The median of the window, which removes isolated spikes without smearing them."""
+
+    filter_type = FILTER_MEDIAN
+    # Windows up to this many samples wide are filtered all at once, whose cost grows with the
+    # width. Wider windows are kept sorted as they slide instead, see sorted_windows.
+    vectorized_max_width = 25
+
+    def apply(self, values):
+        if use_sorted_windows(values, self.window, self.vectorized_max_width):
+            return sorted_windows(values, self.window, lambda ordered, sample: _median(ordered))
+
+        return centered_windows(values, self.window,
+                                lambda windows, centers: np.median(windows, axis=1))
+
+
+class Despike(WindowFilter):
+    """
+    Replaces spikes by the median of their window (a Hampel filter).
+
+    A sample is a spike when it differs from the median of its window by more than threshold
+    times the standard deviation of the window, as estimated from the median absolute deviation.
+    All other samples are kept as they are.
+    """
+
+    filter_type = FILTER_DESPIKE
+    # As for MovingMedian, the median absolute deviation being slower to find in sorted windows
+    vectorized_max_width = 81
+
+    def __init__(self, window, threshold=3.0):
+        """
+        Parameters
+        ----------
+        window: int
+            How many samples on each side of the current sample are included
+        threshold: float
+            How many standard deviations a spike differs from the median. Default is 3.0.
+        """
+        super().__init__(window)
+        self.threshold = float(threshold)
+
+    def apply(self, values):
+        def despike(windows, centers):
+            medians = np.median(windows, axis=1)
+            deviations = np.median(np.abs(windows - medians[:, None]), axis=1) * MAD_TO_STD
+            samples = windows[np.arange(len(windows)), centers]
+            return np.where(np.abs(samples - medians) > self.threshold * deviations, medians,
+                            samples)
+
+        def despike_sorted(ordered, sample):
+            median = _median(ordered)
+            deviation = _median_deviation(ordered, median) * MAD_TO_STD
+            return median if abs(sample - median) > self.threshold * deviation else sample
+
+        if use_sorted_windows(values, self.window, self.vectorized_max_width):
+            return sorted_windows(values, self.window, despike_sorted)
+
+        return centered_windows(values, self.window, despike)
+
+    def parameters(self):
+        return {'type': self.filter_type, 'window': self.window, 'threshold': self.threshold}
+
+
+class ExponentialMovingAverage():
+    """
+    An exponential moving average, where every sample is weighted by 2 / (span + 1) against the
+    average of the samples before it. The first sample is kept as it is.
+
+    Unlike the window filters, it only depends on the past samples, which delays the signal.
+    """
+
+    filter_type = FILTER_EMA
+
+    def __init__(self, span):
+        """
+        Parameters
+        ----------
+        span: float
+            The span of the average (in samples), which is at least 1
+        """
+        self.span = float(span)
+        self.alpha = 2 / (self.span + 1)
+
+    def apply(self, values, initial=None):
+        """
+        Filter the samples of a whole log, see WindowFilter.apply.
+
+        Parameters
+        ----------
+        values: numpy.ndarray
+            The samples
+        initial: float=None
+            The average of the samples before these, if any. Default is None, which starts from
+            the first sample.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        decay = 1 - self.alpha
+        if len(values) == 0 or decay == 0:
+            return values.copy()
+
+        # Within a block, the k-th average is weights[k] * (average + alpha * sum(values[j] /
+        # weights[j], j <= k)), where weights[k] = decay ** (k + 1) and average is the one
+        # before the block, so that only the blocks are looped over. They are short enough for
+        # the weights to stay above EMA_MIN_BLOCK_WEIGHT.
+        block = int(min(len(values), max(np.log(EMA_MIN_BLOCK_WEIGHT) / np.log(decay), 1)))
+        weights = decay ** np.arange(1, block + 1)
+
+        average = values[0] if initial is None else initial
+        averages = np.empty(len(values))
+        for start in range(0, len(values), block):
+            chunk = values[start:start + block]
+            chunk_weights = weights[:len(chunk)]
+            averages[start:start + len(chunk)] = chunk_weights * (
+                average + self.alpha * np.cumsum(chunk / chunk_weights))
+            average = averages[start + len(chunk) - 1]
+
+        return averages
+
+    def streamer(self):
+        return _EmaStreamer(self)
+
+    def parameters(self):
+        return {'type': self.filter_type, 'span': self.span}
+
+
+# The filter classes of every filter type
+FILTER_TYPES = {FILTER_MOVING_AVERAGE: MovingAverage,
+                FILTER_EMA: ExponentialMovingAverage,
+                FILTER_MEDIAN: MovingMedian,
+                FILTER_DESPIKE: Despike}
+
+
+def centered_windows(values, window, func):
+    """
+    Apply a function to the centered window of every sample, clipped at the ends of the samples.
+
+    Parameters
+    ----------
+    values: numpy.ndarray
+        The samples
+    window: int
+        How many samples on each side of the current sample are included
+    func: callable
+        Called with a 2D array of equally long windows (one per row) and the index of the current
+        sample within each of them, and returns the filtered value of every window
+
+    Returns
+    -------
+    numpy.ndarray
+        The filtered samples, same length as values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    count = len(values)
+    if window <= 0 or count == 0:
+        return values.copy()
+
+    result = np.empty(count)
+    width = 2 * window + 1
+    if count >= width:
+        windows = np.lib.stride_tricks.sliding_window_view(values, width)
+        result[window:count - window] = func(windows, np.full(len(windows), window))
+
+    # The clipped windows at the ends, which are all shorter
+    for idx in itertools.chain(range(min(window, count)), range(max(count - window, window),
+                                                                 count)):
+        lower = max(idx - window, 0)
+        result[idx] = func(values[None, lower:idx + window + 1], np.array([idx - lower]))[0]
+
+    return result
+
+
+def use_sorted_windows(values, window, vectorized_max_width):
+    """Whether the windows of a filter are kept sorted, see sorted_windows."""
+    # The order of NaN samples is undefined, so their windows are always filtered all at once
+    return 2 * window + 1 > vectorized_max_width and not np.isnan(values).any()
+
+
+def sorted_windows(values, window, func):
+    """
+    Apply a function to the centered window of every sample, as centered_windows does, from the
+    sorted samples of the window.
+
+    The window is kept sorted as it slides, every sample being inserted and removed once by a
+    binary search, so that the cost barely grows with the window. The samples must not be NaN.
+
+    Parameters
+    ----------
+    values: numpy.ndarray
+        The samples
+    window: int
+        How many samples on each side of the current sample are included
+    func: callable
+        Called with the sorted samples of the window (a list) and the current sample, and returns
+        the filtered value of the window
+
+    Returns
+    -------
+    numpy.ndarray
+        The filtered samples, same length as values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    count = len(values)
+    if window <= 0 or count == 0:
+        return values.copy()
+
+    samples = values.tolist()
+    ordered = sorted(samples[:window])
+    result = np.empty(count)
+    for idx, sample in enumerate(samples):
+        if idx + window < count:
+            bisect.insort(ordered, samples[idx + window])
+        if idx > window:
+            del ordered[bisect.bisect_left(ordered, samples[idx - window - 1])]
+        result[idx] = func(ordered, sample)
+
+    return result
+
+
+def _median(ordered):
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def _median_deviation(ordered, median):
+    # The median of the absolute deviations from the median of sorted samples. The deviations
+    # of the samples below the median increase to the left of it, and those of the others to
+    # the right, so that every rank is found by a binary search over the two.
+    split = bisect.bisect_left(ordered, median)
+
+    def deviation(rank):
+        # How many of the rank + 1 smallest deviations are those of the samples below the median
+        lower = max(0, rank + 1 - (len(ordered) - split))
+        upper = min(rank + 1, split)
+        while lower < upper:
+            below = (lower + upper) // 2
+            if median - ordered[split - below - 1] < ordered[split + rank - below] - median:
+                lower = below + 1
+            else:
+                upper = below
+
+        deviations = []
+        if lower:
+            deviations.append(median - ordered[split - lower])
+        if rank + 1 - lower:
+            deviations.append(ordered[split + rank - lower] - median)
+        return max(deviations)
+
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return deviation(middle)
+    return (deviation(middle - 1) + deviation(middle)) / 2
+
+
+class _WindowStreamer():
+    """
+    Filters a log that is read in consecutive chunks with a window filter.
+
+    The last window samples of every chunk are held back until the samples after them arrive,
+    and the window samples before them are kept, so that every window is complete.
+    """
+
+    def __init__(self, apply, window):
+        self.apply = apply
+        self.window = window
+        self._history = np.empty(0)
+        self._pending = np.empty(0)
+
+    def push(self, values):
+        self._pending = np.concatenate((self._pending, np.asarray(values, dtype=np.float64)))
+        return self._emit(final=False)
+
+    def finish(self):
+        return self._emit(final=True)
+
+    def _emit(self, final):
+        history_len = len(self._history)
+        buffer = np.concatenate((self._history, self._pending))
+
+        end = len(buffer) if final else max(len(buffer) - self.window, history_len)
+        filtered = self.apply(buffer)[history_len:end]
+
+        self._history = buffer[max(end - self.window, 0):end]
+        self._pending = buffer[end:]
+        return filtered
+
+
+class _EmaStreamer():
+    """Filters a log that is read in consecutive chunks with an exponential moving average."""
+
+    def __init__(self, ema):
+        self.ema = ema
+        self._average = None
+
+    def push(self, values):
+        averages = self.ema.apply(values, self._average)
+        if len(averages):
+            self._average = float(averages[-1])
+        return averages
+
+    def finish(self):
+        return np.empty(0)
+
+
+class FilterPipeline():
+    """
+    The processing of the DAQ samples before they are analyzed.
+
+    Samples outside of the limits of any channel are rejected first, then the samples are
+    resampled onto a uniform time grid if a rate is given (see resampling.Resampler), so that the
+    windows of the filters and averages all cover the same duration. Every channel is then
+    filtered by its own list of filters, in order, and the filtered readings are what the data
+    sheet holds. The pipeline also holds the half-widths of the averaging windows of the data
+    sheet, see analysis_engine.compute_derived_columns. Every step works on whole arrays.
+
+    The default pipeline, without limits or filters, leaves the samples as they are.
+    """
+
+    def __init__(self, filters=None, limits=None,
+                 force_window=analysis_engine.FORCE_AVERAGE_WINDOW,
+                 windspeed_window=analysis_engine.WINDSPEED_AVERAGE_WINDOW, resample_rate_hz=0):
+        """
+        Parameters
+        ----------
+        filters: dict=None
+            The filters of every channel of CHANNELS, as lists of filter objects (see
+            FILTER_TYPES) or specifications of create_filter. Default is None, which filters
+            nothing.
+        limits: dict=None
+            The (minimum, maximum) accepted reading of channels of CHANNELS, where either may be
+            None. Samples which are NaN in a limited channel are also rejected. Default is None,
+            which rejects nothing.
+        force_window, windspeed_window: int
+            The averaging windows of the data sheet. Default is FORCE_AVERAGE_WINDOW and
+            WINDSPEED_AVERAGE_WINDOW
+        resample_rate_hz: float=0
+            The rate (Hz) of the uniform grid the samples are resampled onto. Default is 0, which
+            keeps the timestamps of the samples
+        """
+        filters = filters or {}
+        limits = limits or {}
+        for channel in itertools.chain(filters, limits):
+            if channel not in CHANNELS:
+                raise ValueError("Unknown channel: " + str(channel))
+
+        self.filters = {channel: [create_filter(spec) if isinstance(spec, dict) else spec
+                                  for spec in filters.get(channel) or []]
+                        for channel in CHANNELS}
+        self.limits = {channel: tuple(limits[channel]) for channel in CHANNELS
+                       if channel in limits}
+        self.force_window = int(force_window)
+        self.windspeed_window = int(windspeed_window)
+        self.resampler = resampling.Resampler(resample_rate_hz) if resample_rate_hz else None
+
+    @property
+    def active(self):
+        """Whether any sample is rejected, resampled or filtered."""
+        return bool(self.limits) or self.resampler is not None or any(self.filters.values())
+
+    def accept(self, anemometer, load_cell):
+        """
+        Select the samples within the limits.
+
+        Parameters
+        ----------
+        anemometer, load_cell: numpy.ndarray
+            The raw readings of the channels
+
+        Returns
+        -------
+        numpy.ndarray
+            The mask of the accepted samples
+        """
+        mask = np.ones(len(anemometer), dtype=bool)
+        for channel, values in zip(CHANNELS, (anemometer, load_cell)):
+            if channel not in self.limits:
+                continue
+
+            minimum, maximum = self.limits[channel]
+            mask &= ~np.isnan(values)
+            if minimum is not None:
+                mask &= values >= minimum
+            if maximum is not None:
+                mask &= values <= maximum
+
+        return mask
+
+    def apply(self, time_s, anemometer, load_cell):
+        """
+        Process the samples of a whole log.
+
+        Parameters
+        ----------
+        time_s, anemometer, load_cell: numpy.ndarray
+            The timestamps (s) and raw readings of the samples
+
+        Returns
+        -------
+        tuple of numpy.ndarray
+            The timestamps and filtered readings of the accepted (or resampled) samples
+        """
+        if not self.active:
+            return time_s, anemometer, load_cell
+
+        mask = self.accept(anemometer, load_cell)
+        time_s, anemometer, load_cell = time_s[mask], anemometer[mask], load_cell[mask]
+        if self.resampler is not None:
+            time_s, anemometer, load_cell = self.resampler.apply(time_s, anemometer, load_cell)
+
+        channels = [time_s]
+        for channel, values in zip(CHANNELS, (anemometer, load_cell)):
+            for signal_filter in self.filters[channel]:
+                values = signal_filter.apply(values)
+            channels.append(values)
+
+        return tuple(channels)
+
+    def streamer(self):
+        """Create a PipelineStreamer, which processes a log that is read in consecutive chunks."""
+        return PipelineStreamer(self)
+
+    def stream(self, chunks):
+        """
+        Process a log that is read in consecutive chunks, exactly as apply() does a whole log.
+
+        Parameters
+        ----------
+        chunks: iterable of tuple of numpy.ndarray
+            The timestamps (s) and raw readings of every chunk
+
+        Returns
+        -------
+        iterator of tuple of numpy.ndarray
+            The timestamps and filtered readings of the accepted samples. Without any limits or
+            filters, these are the chunks themselves.
+        """
+        if not self.active:
+            return iter(chunks)
+
+        return self._stream(chunks)
+
+    def _stream(self, chunks):
+        streamer = self.streamer()
+        for chunk in chunks:
+            processed = streamer.push(*chunk)
+            if len(processed[0]):
+                yield processed
+
+        processed = streamer.finish()
+        if len(processed[0]):
+            yield processed
+
+    def derived_columns(self, time_s, anemometer_raw, load_cell_raw, constants=None):
+        """Compute the columns of processed samples, with the averaging windows of the pipeline."""
+        return analysis_engine.compute_derived_columns(time_s, anemometer_raw, load_cell_raw,
+                                                       constants, self.force_window,
+                                                       self.windspeed_window)
+
+    def column_engine(self, constants=None):
+        """Create an analysis_engine.StreamingColumnEngine with the averaging windows."""
+        return analysis_engine.StreamingColumnEngine(constants, self.force_window,
+                                                     self.windspeed_window)
+
+    def parameters(self):
+        """
+        Get every parameter of the pipeline, such as for the keys of the result cache.
+
+        Returns
+        -------
+        dict
+            The averaging windows, resampling rate, filters and limits, all of which are
+            json-serializable
+        """
+        return {'force_average_window': self.force_window,
+                'windspeed_average_window': self.windspeed_window,
+                'resample_rate_hz': self.resampler.parameters() if self.resampler else 0,
+                'signal_filters': {channel: [signal_filter.parameters()
+                                             for signal_filter in filters]
+                                   for channel, filters in self.filters.items() if filters},
+                'sample_limits': {channel: list(limits)
+                                  for channel, limits in self.limits.items()}}
+
+
+class PipelineStreamer():
+    """
+    Processes a log that is read in consecutive chunks with a FilterPipeline.
+
+    The resampler and every filter of every channel have their own streamer, and the samples that
+    have been filtered in all channels are returned together, so that the channels stay aligned.
+    """
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self._streamers = {channel: [signal_filter.streamer()
+                                     for signal_filter in pipeline.filters[channel]]
+                           for channel in CHANNELS}
+        self._resampler = pipeline.resampler.streamer() if pipeline.resampler else None
+        self._ready = [np.empty(0) for _ in range(len(CHANNELS) + 1)]
+
+    def push(self, time_s, anemometer, load_cell):
+        """
+        Add the next chunk of raw samples.
+
+        Returns
+        -------
+        tuple of numpy.ndarray
+            The timestamps and filtered readings of all samples that could be completed, which
+            may be empty
+        """
+        time_s, anemometer, load_cell = (np.asarray(channel, dtype=np.float64)
+                                         for channel in (time_s, anemometer, load_cell))
+        mask = self.pipeline.accept(anemometer, load_cell)
+        time_s, anemometer, load_cell = time_s[mask], anemometer[mask], load_cell[mask]
+        if self._resampler is not None:
+            time_s, anemometer, load_cell = self._resampler.push(time_s, anemometer, load_cell)
+
+        processed = [time_s]
+        for channel, values in zip(CHANNELS, (anemometer, load_cell)):
+            for streamer in self._streamers[channel]:
+                values = streamer.push(values)
+            processed.append(values)
+
+        return self._emit(processed)
+
+    def finish(self):
+        """Complete the samples that are still held back, at the end of the log."""
+        processed = [np.empty(0)]
+        for channel in CHANNELS:
+            values = np.empty(0)
+            for streamer in self._streamers[channel]:
+                values = np.concatenate((streamer.push(values), streamer.finish()))
+            processed.append(values)
+
+        return self._emit(processed)
+
+    def _emit(self, processed):
+        self._ready = [np.concatenate((ready, values))
+                       for ready, values in zip(self._ready, processed)]
+        count = min(len(ready) for ready in self._ready)
+
+        emitted = tuple(ready[:count] for ready in self._ready)
+        self._ready = [ready[count:] for ready in self._ready]
+        return emitted
+
+
+# Used wherever no pipeline is configured
+DEFAULT_PIPELINE = FilterPipeline()
+
+
+def create_filter(spec):
+    """
+    Create a filter from its specification.
+
+    Parameters
+    ----------
+    spec: dict
+        The 'type' of the filter (see FILTER_TYPES) along with its parameters: 'window' for the
+        moving average, median and despike filters, 'threshold' for the despike filter, and
+        'span' for the exponential moving average. For example {'type': 'median', 'window': 2}
+
+    Returns
+    -------
+    object
+        The filter
+    """
+    spec = dict(spec)
+    filter_type = spec.pop('type', None)
+    if filter_type not in FILTER_TYPES:
+        raise ValueError("Unknown filter type: " + str(filter_type))
+
+    return FILTER_TYPES[filter_type](**spec)
+
+
+def create_pipeline(config):
+    """
+    Create the pipeline selected in a configuration.
+
+    Parameters
+    ----------
+    config: dict
+        The configuration of execute_complete_analysis, where SIGNAL_FILTERS and SAMPLE_LIMITS
+        are the filters and limits of every channel, FORCE_AVERAGE_WINDOW and
+        WINDSPEED_AVERAGE_WINDOW are the averaging windows and RESAMPLE_RATE_HZ is the rate of
+        the resampling
+
+    Returns
+    -------
+    FilterPipeline
+        The pipeline
+    """
+    return FilterPipeline(config.get('SIGNAL_FILTERS'), config.get('SAMPLE_LIMITS'),
+                          config.get('FORCE_AVERAGE_WINDOW', analysis_engine.FORCE_AVERAGE_WINDOW),
+                          config.get('WINDSPEED_AVERAGE_WINDOW',
+                                     analysis_engine.WINDSPEED_AVERAGE_WINDOW),
+                          config.get('RESAMPLE_RATE_HZ', 0))
@@ -0,0 +1,134 @@
+import numpy as np
+
+from daq_io import DAQ_HEADER
+
+# Sampling of the DAQ: the intervals are jittery around the nominal period
+SAMPLE_PERIOD_S = 0.095
+SAMPLE_JITTER_S = 0.01
+
+# Shape of every simulated run down the runway, in samples
+RUN_RAMP_SAMPLES = 50
+RUN_PLATEAU_SAMPLES = (100, 300)
+RUN_GAP_SAMPLES = (200, 1500)
+
+# How many samples are generated and written at once
+GENERATOR_CHUNK_ROWS = 100000
+
+
+def plan_runs(rows, rng):
+    """
+    Choose where the runs of a synthetic log are, and how fast the truck drives in each of them.
+
+    Parameters
+    ----------
+    rows: int
+        The number of samples of the log
+    rng: numpy.random.Generator
+        The source of randomness
+
+    Returns
+    -------
+    list of tuple
+        The (first sample, last sample, windspeed in m/s) of every run, in order
+    """
+    runs = []
+    start = int(rng.integers(*RUN_GAP_SAMPLES))
+    while start < rows:
+        end = start + 2 * RUN_RAMP_SAMPLES + int(rng.integers(*RUN_PLATEAU_SAMPLES))
+        runs.append((start, end, float(rng.uniform(11, 20))))
+        start = end + int(rng.integers(*RUN_GAP_SAMPLES))
+
+    return runs
+
+
+def generate_chunk(first_row, rows, runs, start_time_s, rng, constants):
+    """
+    Generate consecutive samples of a synthetic log.
+
+    Parameters
+    ----------
+    first_row: int
+        The index of the first sample of the chunk in the log
+    rows: int
+        The number of samples of the chunk
+    runs: list of tuple
+        The runs of the log, as returned by plan_runs
+    start_time_s: float
+        The timestamp (s) of the sample before the chunk, or of the first sample
+    rng: numpy.random.Generator
+        The source of randomness
+    constants: dict
+        Numeric constants as returned by analysis_engine.analysis_constants, which are used to
+        turn the windspeed into a realistic drag force
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        The timestamps (s), raw anemometer readings (m/s) and raw load cell readings (lbf)
+    """
+    idx = np.arange(first_row, first_row + rows)
+
+    intervals = SAMPLE_PERIOD_S + rng.uniform(-SAMPLE_JITTER_S / 2, SAMPLE_JITTER_S, rows)
+    if first_row == 0:
+        intervals[0] = 0
+    time_s = start_time_s + np.cumsum(intervals)
+
+    # Trapezoid windspeed profile of every run overlapping the chunk, over a gusty idle wind
+    windspeed = np.abs(rng.normal(2.0, 0.8, rows))
+    for run_start, run_end, run_windspeed in runs:
+        if run_end < first_row or run_start >= first_row + rows:
+            continue
+        ramp = np.minimum(idx - run_start, run_end - idx) / RUN_RAMP_SAMPLES
+        windspeed += run_windspeed * np.clip(ramp, 0, 1)
+
+    windspeed_ft_s = windspeed / 0.3048
+    drag_area = rng.normal(6.5, 0.3, rows)
+    force = 0.5 * constants['AIR_DENSITY_SLG_FT3'] * windspeed_ft_s ** 2 * drag_area
+    force += rng.normal(0.3, 0.4, rows)
+
+    # Rare spikes of the load cell, such as the canopy snatching
+    spikes = rng.random(rows) < 0.001
+    force[spikes] += rng.uniform(10, 80, int(spikes.sum()))
+
+    return (time_s,
+            windspeed * constants['ANEMOMETER_FACTOR'],
+            force * constants['LOAD_CELL_FACTOR'])
+
+
+def generate_daq_log(csv_path, rows, seed=0):
+    """
+    Write a synthetic DAQ log in the same format as the real ones.
+
+    The log is deterministic for a given number of rows and seed. It has timestamps sampled at
+    about 10 Hz with jitter, and a run down the runway every few minutes, during which the wind
+    ramps up and down and the load cell reads the matching drag force, with noise and rare
+    spikes. It is generated and written in chunks, so any number of rows can be generated.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        Where the csv is written
+    rows: int
+        The number of samples
+    seed: int
+        The seed of the random generator. Default is 0.
+    """
+    # Imported here, since the constants are only needed to shape the data
+    import analysis_engine
+
+    rng = np.random.default_rng(seed)
+    constants = analysis_engine.analysis_constants()
+    runs = plan_runs(rows, rng)
+
+    with open(csv_path, 'w', newline='') as csvfile:
+        csvfile.write(','.join(DAQ_HEADER) + '\n')
+
+        time_s = 0.0
+        for first_row in range(0, rows, GENERATOR_CHUNK_ROWS):
+            chunk_rows = min(GENERATOR_CHUNK_ROWS, rows - first_row)
+            chunk = generate_chunk(first_row, chunk_rows, runs, time_s, rng, constants)
+            time_s = float(chunk[0][-1])
+
+            # Written with the shortest representation of every value, as the DAQ does
+            csvfile.writelines('%r,%r,%r\n' % row
+                               for row in zip(*(channel.tolist() for channel in chunk)))
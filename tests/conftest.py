@@ -0,0 +1,38 @@
+import os
+import shutil
+
+import pytest
+
+EXAMPLE_DIRECTORY = os.path.join(os.path.dirname(__file__), "example_data_directory")
+EXAMPLE_LOGS = ["sample_csv_of_log_2021-10-10_0.2tau", "sample_csv_of_log_2021-10-10_0.15tau",
+                "sample_csv_of_log_2021-10-10_0.25tau"]
+
+
+@pytest.fixture
+def analysis_config(tmp_path):
+    """
+    Create configurations that analyze the example logs, with their outputs in tmp_path.
+
+    The returned function takes the names of the logs of the hitlist, which are copied into
+    tmp_path unless they do not exist, and any configuration variables to override. The custom
+    sheet name of every log is the end of its name.
+    """
+    def create_config(hitlist, **kwargs):
+        for name in hitlist:
+            csv_path = os.path.join(EXAMPLE_DIRECTORY, name + ".csv")
+            if os.path.exists(csv_path):
+                shutil.copy(csv_path, tmp_path)
+
+        (tmp_path / "hitlist.txt").write_text("\n".join(hitlist) + "\n\n")
+        (tmp_path / "sheetnames.txt").write_text("\n".join(name[-8:] for name in hitlist))
+
+        config = {'USE_HARD_CODED_PATH': False, 'HARD_CODED_PATH': "", 'HARD_CODED_OUTPUT': "",
+                  'FILE_INPUT_HITLIST': True, 'HITLIST_PATH': str(tmp_path / "hitlist.txt"),
+                  'SINGLE_OUTPUT_FILE': True, 'SINGLE_OUTPUT_FILE_PATH': "Complete Analysis.xlsx",
+                  'FILE_SUBDIRECTORY': str(tmp_path), 'USE_CUSTOM_SHEETNAMES': True,
+                  'SINGLE_OUTPUT_SHEETNAMES_PATH': str(tmp_path / "sheetnames.txt"),
+                  'CONDENSED_EXPORT_VERSION': True, 'SUPPRESS_ALL_PRINTS': True}
+        config.update(kwargs)
+        return config
+
+    return create_config
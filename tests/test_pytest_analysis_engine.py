@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+from analysis_engine import COLUMN_KEYS
+from analysis_engine import StreamingColumnEngine
+from analysis_engine import StreamingSummary
+from analysis_engine import analysis_constants
+from analysis_engine import centered_average
+from analysis_engine import compute_derived_columns
+from analysis_engine import segment_runs
+from analysis_engine import summarize_log
+from analysis_engine import summarize_run
+
+
+def test_centered_average_clipped_window():
+    values = np.arange(1.0, 11.0)
+    result = centered_average(values, 3)
+
+    # At the start the window is clipped to the first sample, like AVERAGE(E1:E5) with a header
+    assert result[0] == np.mean(values[0:4])
+    assert result[2] == np.mean(values[0:6])
+    assert result[5] == np.mean(values[2:9])
+    assert result[9] == np.mean(values[6:10])
+
+
+def test_derived_columns_match_formulas():
+    consts = analysis_constants()
+    time_s = [0.0, 0.0938, 0.2026, 0.2962]
+    wind = [0.0, 7.25, 14.5, 21.75]
+    force = [1.0, 2.0, 3.0, 4.0]
+
+    columns = compute_derived_columns(time_s, wind, force, consts)
+
+    assert columns['time_ms'].tolist() == [0, 93, 202, 296]
+    assert columns['anemometer_calibrated'][1] == 7.25 / 0.725
+
+    ws_ft_s = columns['anemometer_ft_s'][2]
+    assert ws_ft_s == (14.5 / 0.725) / 0.3048
+    assert columns['drag_area'][2] == (2 * 2.5) / (consts['AIR_DENSITY_SLG_FT3'] * ws_ft_s ** 2)
+    assert columns['drag_coeff'][2] == columns['drag_area'][2] / consts['NOM_SA_FT2']
+
+    # The if(ws=0, ,...) guard evaluates to 0
+    assert columns['drag_area'][0] == 0
+
+
+def test_constants_overrides_propagate():
+    consts = analysis_constants({'NOM_DIAM_M': 0.3048})
+
+    assert consts['NOM_DIAM_FT'] == 1.0
+    assert np.isclose(consts['NOM_SA_FT2'], np.pi * 0.25)
+
+
+def test_streaming_engine_matches_whole_log():
+    rng = np.random.default_rng(0)
+    time_s = np.cumsum(rng.uniform(0.09, 0.11, 1000))
+    wind = rng.uniform(0, 20, 1000)
+    wind[::50] = 0
+    force = rng.normal(10, 5, 1000)
+
+    expected = compute_derived_columns(time_s, wind, force)
+
+    for chunk_size in (1, 2, 7, 333, 5000):
+        engine = StreamingColumnEngine()
+        parts = [engine.push(time_s[idx:idx + chunk_size], wind[idx:idx + chunk_size],
+                             force[idx:idx + chunk_size])
+                 for idx in range(0, 1000, chunk_size)]
+        parts.append(engine.finish())
+
+        for key in COLUMN_KEYS:
+            streamed = np.concatenate([part[key] for part in parts])
+            assert np.array_equal(streamed, expected[key])
+
+
+def test_run_summary_uses_threshold_mask():
+    consts = analysis_constants()
+    columns = {'time_ms': np.array([0, 100, 200, 300, 400]),
+               'anemometer_averaged': np.array([5.0, 12.0, 12.0, 12.0, 12.0]),
+               'load_cell_averaged': np.array([20.0, 20.0, 5.0, 20.0, 20.0]),
+               'drag_area': np.array([100.0, 2.0, 100.0, 4.0, 6.0])}
+
+    summary = summarize_run(columns, consts)
+
+    assert summary['sample_count'] == 3
+    assert summary['mean_drag_area'] == 4.0
+    assert summary['median_drag_area'] == 4.0
+    assert summary['std_drag_area'] == 2.0
+    assert np.isclose(summary['time_above_threshold_s'], 0.2)
+    assert np.isclose(summary['drag_coeff_ratio'],
+                      4.0 / consts['NOM_SA_FT2'] / consts['TARGET_COEFF_DRAG'])
+
+    columns['load_cell_averaged'][:] = 0
+    assert summarize_run(columns, consts)['mean_drag_area'] is None
+
+
+def test_segmentation_hysteresis_and_debounce():
+    consts = analysis_constants()
+    time_ms = np.arange(0, 10000, 100)
+    force = np.zeros(len(time_ms))
+    force[10:30] = 15     # First run, 2 s
+    force[18] = 9         # Within the hysteresis band, does not end the run
+    force[32:40] = 15     # Separated by 0.3 s, merged into the first run
+    force[50] = 15        # Single spike, shorter than the minimum duration
+    force[60:80] = 20     # Second run
+    columns = {'time_ms': time_ms,
+               'anemometer_averaged': np.full(len(time_ms), 12.0),
+               'load_cell_averaged': force,
+               'drag_area': np.ones(len(time_ms))}
+
+    runs = segment_runs(columns, consts, hysteresis=0.2, min_duration_s=1.0, debounce_s=0.5)
+
+    assert [(run['start_idx'], run['end_idx']) for run in runs] == [(10, 40), (60, 80)]
+    assert runs[0]['start_s'] == 1.0 and runs[0]['end_s'] == 3.9
+    assert runs[1]['peak_force'] == 20 and runs[1]['mean_drag_area'] == 1
+
+
+def test_streaming_summary_matches_whole_log():
+    rng = np.random.default_rng(1)
+    time_s = np.cumsum(rng.uniform(0.09, 0.11, 2000))
+    wind = np.repeat(rng.uniform(5, 20, 40), 50)
+    force = np.repeat(rng.uniform(0, 25, 40), 50) + rng.normal(0, 2, 2000)
+    columns = compute_derived_columns(time_s, wind, force)
+    run_segmentation = {'hysteresis': 0.2, 'min_duration_s': 1.0, 'debounce_s': 2.0}
+
+    expected = summarize_log(columns, run_segmentation)
+    assert expected['run_count'] > 1
+
+    for chunk_size in (1, 7, 333, 5000):
+        summarizer = StreamingSummary(run_segmentation)
+        for idx in range(0, 2000, chunk_size):
+            summarizer.append({key: values[idx:idx + chunk_size]
+                               for key, values in columns.items()})
+        summary = summarizer.summary()
+
+        assert summary['runs'] == [pytest.approx(run) for run in expected['runs']]
+        assert {key: value for key, value in summary.items() if key != 'runs'} ==\
+            pytest.approx({key: value for key, value in expected.items() if key != 'runs'})
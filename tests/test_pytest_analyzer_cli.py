@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import analyzer_cli
+import signal_filters
+import truck_test_rapid_analyzer as analyzer
+
+EXAMPLE_CSV = os.path.join(os.path.dirname(__file__), "example_data_directory",
+                           "sample_csv_of_log_2021-10-10_0.2tau.csv")
+
+
+def test_summary_matches_analysis(capsys):
+    analyzer_cli.main(['summary', '--json', EXAMPLE_CSV])
+    summary = json.loads(capsys.readouterr().out)[EXAMPLE_CSV]
+
+    expected = analyzer.run_summary(analyzer.analysis_columns(EXAMPLE_CSV))
+    assert summary['row_count'] == expected['row_count'] == 3074
+    for key, _ in analyzer.META_ANALYSIS_STATISTICS:
+        assert summary[key] == pytest.approx(expected[key])
+
+
+def test_summary_uses_configured_filters_and_runs(tmp_path, capsys):
+    config = {'SIGNAL_FILTERS': {'load_cell': [{'type': 'median', 'window': 5}]},
+              'SAMPLE_LIMITS': {'anemometer': [None, 10]},
+              'RUN_MIN_DURATION_S': 0.0, 'RUN_DEBOUNCE_S': 0.0}
+    (tmp_path / "config.yaml").write_text(json.dumps(config))
+
+    analyzer_cli.main(['summary', '--json', '--config', str(tmp_path / "config.yaml"),
+                       EXAMPLE_CSV])
+    summary = json.loads(capsys.readouterr().out)[EXAMPLE_CSV]
+
+    pipeline = signal_filters.create_pipeline(config)
+    expected = analyzer.run_summary(analyzer.analysis_columns(EXAMPLE_CSV, pipeline=pipeline),
+                                    analyzer.analysis_options(config)['run_segmentation'])
+    assert summary['row_count'] == expected['row_count'] < 3074
+    assert summary['run_count'] == expected['run_count']
+    for key, _ in analyzer.META_ANALYSIS_STATISTICS:
+        assert summary[key] == pytest.approx(expected[key])
+
+
+@pytest.mark.parametrize("script", ["analyzer_cli.py", "truck_test_rapid_analyzer.py"])
+def test_summary_does_not_import_openpyxl(script):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # Every imported module is listed on stderr
+    result = subprocess.run([sys.executable, '-X', 'importtime', script, 'summary', EXAMPLE_CSV],
+                            cwd=root, capture_output=True, text=True, check=True)
+
+    assert "openpyxl" not in result.stderr
+    assert "Mean Drag Area [CdSo] (ft^2)" in result.stdout.splitlines()[1]
@@ -0,0 +1,11 @@
+from benchmark import BENCHMARK_STAGES
+from benchmark import benchmark_analysis
+
+
+def test_benchmark_measures_every_stage(tmp_path):
+    result = benchmark_analysis(2000, str(tmp_path))
+
+    assert result['rows'] == 2000
+    assert set(result['stages']) == set(BENCHMARK_STAGES) - {'write_value_rows'}
+    assert result['stages']['write_formula_rows']['calls'] == 1
+    assert (tmp_path / "synthetic_2000_0___analyzed.xlsx").exists()
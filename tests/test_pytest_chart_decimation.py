@@ -0,0 +1,33 @@
+import numpy as np
+
+from chart_decimation import decimate
+from chart_decimation import lttb_indices
+from chart_decimation import minmax_indices
+
+
+def test_lttb_keeps_ends_and_peak():
+    x = np.arange(10000, dtype=float)
+    y = np.sin(x / 500)
+    y[4321] = 10
+
+    indices = lttb_indices(x, y, 100)
+
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 9999
+    assert np.all(np.diff(indices) > 0)
+    assert 4321 in indices
+
+
+def test_minmax_keeps_extremes():
+    x = np.arange(10000, dtype=float)
+    y = np.random.default_rng(0).normal(size=10000)
+
+    indices = minmax_indices(x, y, 100)
+
+    assert len(indices) <= 100
+    assert np.argmin(y) in indices and np.argmax(y) in indices
+
+
+def test_short_series_are_not_decimated():
+    assert decimate(np.arange(5), np.arange(5), 100).tolist() == [0, 1, 2, 3, 4]
+    assert len(decimate(np.arange(500), np.arange(500), 100, 'none')) == 500
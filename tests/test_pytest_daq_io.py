@@ -0,0 +1,101 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from daq_io import DaqTail
+from daq_io import columnar_time_range
+from daq_io import convert_to_columnar
+from daq_io import ensure_columnar
+from daq_io import iter_daq_chunks
+from daq_io import iter_daq_rows
+from daq_io import open_columnar
+from daq_io import parse_daq_block
+from daq_io import read_daq_header
+from daq_io import read_columnar_metadata
+
+EXAMPLE_CSV = os.path.join(os.path.dirname(__file__), "example_data_directory",
+                           "sample_csv_of_log_2021-10-10_0.2tau.csv")
+
+
+def test_rows_skip_header():
+    first_row = next(iter_daq_rows(EXAMPLE_CSV))
+
+    assert first_row == [0.0, 1.5810396193507206, 0.002983133197602683]
+
+
+def test_chunks_cover_all_rows():
+    rows = list(iter_daq_rows(EXAMPLE_CSV))
+    chunks = list(iter_daq_chunks(EXAMPLE_CSV, chunk_rows=1000))
+
+    assert [len(chunk[0]) for chunk in chunks] == [1000, 1000, 1000, len(rows) - 3000]
+    assert np.array_equal(np.concatenate([chunk[1] for chunk in chunks]),
+                          [row[1] for row in rows])
+
+
+def test_columnar_round_trip(tmp_path):
+    rows = np.array(list(iter_daq_rows(EXAMPLE_CSV)))
+    columns = open_columnar(convert_to_columnar(EXAMPLE_CSV, str(tmp_path / "log.daqcol")))
+
+    assert np.array_equal(columns['time_s'], rows[:, 0])
+    assert np.array_equal(columns['anemometer_raw'], rows[:, 1])
+    assert np.array_equal(columns['load_cell_raw'], rows[:, 2])
+
+    window = columnar_time_range(columns, 1.0, 2.0)
+    assert window['time_s'][0] >= 1.0 and window['time_s'][-1] < 2.0
+    assert len(window['load_cell_raw']) == len(window['time_s'])
+
+
+def test_columnar_regenerated_when_csv_changes(tmp_path):
+    csv_path = str(tmp_path / "log.csv")
+    shutil.copy(EXAMPLE_CSV, csv_path)
+
+    path = ensure_columnar(csv_path, 'float32')
+    assert read_columnar_metadata(path)['dtypes'] == ['<f8', '<f4', '<f4']
+
+    with open(csv_path) as csvfile:
+        lines = csvfile.readlines()
+    with open(csv_path, 'w') as csvfile:
+        csvfile.writelines(lines[:101])
+
+    assert read_columnar_metadata(ensure_columnar(csv_path, 'float32'))['row_count'] == 100
+
+
+def test_bulk_parser_reports_malformed_lines():
+    block = b"0.0,1.5,0.25\r\n0.1,oops,0.5\n\n0.2,2.5\n0.3,3.5,1.25\n0.4,4.5,2e-3"
+    malformed = []
+
+    values = parse_daq_block(block, first_line=2, malformed_lines=malformed)
+
+    assert values.tolist() == [[0.0, 1.5, 0.25], [0.3, 3.5, 1.25], [0.4, 4.5, 0.002]]
+    assert sorted(malformed) == [(3, "0.1,oops,0.5"), (5, "0.2,2.5")]
+
+
+def test_bulk_parser_matches_row_reader():
+    rows = list(iter_daq_rows(EXAMPLE_CSV))
+    chunks = list(iter_daq_chunks(EXAMPLE_CSV))
+
+    assert np.array_equal(np.column_stack(chunks[0]), rows)
+
+
+def test_header_is_validated(tmp_path):
+    csv_path = str(tmp_path / "log.csv")
+    with open(csv_path, 'w') as csvfile:
+        csvfile.write("Time,Wind,Force\n0.0,1.0,2.0\n")
+
+    assert read_daq_header(EXAMPLE_CSV) == ['Timestamp', 'ANEMOMETER', 'LOAD CELL']
+    with pytest.raises(ValueError):
+        read_daq_header(csv_path)
+
+
+def test_byte_order_mark_is_skipped(tmp_path):
+    csv_path = str(tmp_path / "log.csv")
+    with open(EXAMPLE_CSV, 'rb') as source, open(csv_path, 'wb') as target:
+        target.write(b'\xef\xbb\xbf' + source.read())
+
+    assert read_daq_header(csv_path) == ['Timestamp', 'ANEMOMETER', 'LOAD CELL']
+    assert list(iter_daq_rows(csv_path)) == list(iter_daq_rows(EXAMPLE_CSV))
+
+    tail = DaqTail(csv_path)
+    assert np.array_equal(tail.read(), np.column_stack(list(iter_daq_chunks(EXAMPLE_CSV))[0]))
@@ -0,0 +1,42 @@
+import os
+import pickle
+
+import numpy as np
+
+from analysis_engine import COLUMN_KEYS
+from analysis_engine import compute_derived_columns
+from daq_io import iter_daq_rows
+from daq_log import DaqLog
+from daq_log import read_log
+
+EXAMPLE_CSV = os.path.join(os.path.dirname(__file__), "example_data_directory",
+                           "sample_csv_of_log_2021-10-10_0.2tau.csv")
+
+
+def test_read_and_derive():
+    rows = np.array(list(iter_daq_rows(EXAMPLE_CSV)))
+    log = read_log(EXAMPLE_CSV)
+
+    assert len(log) == len(rows) and log.source_path == EXAMPLE_CSV
+    assert np.array_equal(log.load_cell_raw, rows[:, 2])
+    assert 'drag_area' not in log and log.nbytes == 24 * len(log)
+    assert not hasattr(log, '__dict__')
+
+    expected = compute_derived_columns(rows[:, 0], rows[:, 1], rows[:, 2])
+    assert log.derive() is log
+    for key in COLUMN_KEYS:
+        assert np.array_equal(log[key], expected[key])
+
+    copy = pickle.loads(pickle.dumps(log))
+    assert np.array_equal(dict(copy)['drag_area'], expected['drag_area'])
+
+
+def test_time_range_is_a_view():
+    log = DaqLog(np.arange(10) * 0.5, np.ones(10), np.arange(10.0), sheetname="Data").derive()
+
+    window = log.time_range(1.0, 3.0)
+    assert window.time_s.tolist() == [1.0, 1.5, 2.0, 2.5]
+    assert window.sheetname == "Data"
+    assert np.shares_memory(window.load_cell_raw, log.load_cell_raw)
+    assert np.shares_memory(window['load_cell_averaged'], log['load_cell_averaged'])
+    assert len(log.time_range(end_s=1.0)) == 2
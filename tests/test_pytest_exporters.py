@@ -0,0 +1,100 @@
+import csv
+import os
+
+import numpy as np
+import pytest
+
+from exporters import ColumnStoreExporter
+from exporters import EXPORTERS
+from exporters import EXPORT_FORMAT_COLUMNAR
+from exporters import EXPORT_FORMAT_CSV
+from exporters import EXPORT_FORMAT_NPZ
+from exporters import export_records
+from exporters import export_table
+from exporters import open_column_store
+
+
+def example_columns():
+    return {'time_ms': np.arange(10, dtype=np.int64) * 95,
+            'drag_area': np.linspace(0, 1, 10) / 3}
+
+
+@pytest.mark.parametrize("export_format", [EXPORT_FORMAT_CSV, EXPORT_FORMAT_NPZ,
+                                           EXPORT_FORMAT_COLUMNAR])
+def test_export_round_trip(tmp_path, export_format):
+    columns = example_columns()
+    path = export_table(export_format, str(tmp_path / "log"), columns,
+                        ['time_ms', 'drag_area'], ["Time (ms)", "Drag Area"], chunk_rows=4)
+
+    if export_format == EXPORT_FORMAT_CSV:
+        with open(path) as file:
+            rows = list(csv.reader(file))
+        assert rows[0] == ["Time (ms)", "Drag Area"]
+        loaded = {'time_ms': [int(row[0]) for row in rows[1:]],
+                  'drag_area': [float(row[1]) for row in rows[1:]]}
+    elif export_format == EXPORT_FORMAT_NPZ:
+        loaded = dict(np.load(path))
+        assert list(loaded['titles']) == ["Time (ms)", "Drag Area"]
+    else:
+        loaded = open_column_store(path)
+
+    assert np.array_equal(loaded['time_ms'], columns['time_ms'])
+    assert np.array_equal(loaded['drag_area'], columns['drag_area'])
+
+
+def test_column_store_append(tmp_path):
+    columns = example_columns()
+    path = str(tmp_path / "log")
+    with ColumnStoreExporter(path, ['time_ms', 'drag_area'], ["Time", "Drag Area"]) as exporter:
+        exporter.append({key: values[:6] for key, values in columns.items()})
+
+    # Rows of an update that was never completed are not read, and are discarded on appending
+    exporter = ColumnStoreExporter(path, ['time_ms', 'drag_area'], ["Time", "Drag Area"],
+                                   append=True)
+    exporter.append({key: values[6:8] for key, values in columns.items()})
+    assert len(open_column_store(exporter.path)['time_ms']) == 6
+
+    with ColumnStoreExporter(path, ['time_ms', 'drag_area'], ["Time", "Drag Area"],
+                             append=True) as exporter:
+        exporter.append({key: values[6:] for key, values in columns.items()})
+
+    loaded = open_column_store(exporter.path)
+    assert np.array_equal(loaded['drag_area'], columns['drag_area'])
+
+
+@pytest.mark.parametrize("export_format", [EXPORT_FORMAT_CSV, EXPORT_FORMAT_NPZ,
+                                           EXPORT_FORMAT_COLUMNAR])
+def test_failed_export_is_not_committed(tmp_path, export_format):
+    columns = example_columns()
+    path = export_table(export_format, str(tmp_path / "log"), columns,
+                        ['time_ms', 'drag_area'], ["Time (ms)", "Drag Area"])
+
+    # A failure midway through the rows leaves no partial table: the csv, which was streamed
+    # over the complete one, is removed, and the other formats keep their complete table
+    with pytest.raises(RuntimeError):
+        with EXPORTERS[export_format](str(tmp_path / "log"), ['time_ms', 'drag_area'],
+                                      ["Time (ms)", "Drag Area"],
+                                      **({'append': True} if export_format ==
+                                         EXPORT_FORMAT_COLUMNAR else {})) as exporter:
+            exporter.append({key: values[:4] for key, values in columns.items()})
+            raise RuntimeError("Interrupted export")
+
+    if export_format == EXPORT_FORMAT_CSV:
+        assert not os.path.exists(path)
+    elif export_format == EXPORT_FORMAT_NPZ:
+        assert np.array_equal(np.load(path)['time_ms'], columns['time_ms'])
+    else:
+        assert np.array_equal(open_column_store(path)['time_ms'], columns['time_ms'])
+
+
+@pytest.mark.parametrize("export_format", [EXPORT_FORMAT_NPZ, EXPORT_FORMAT_COLUMNAR])
+def test_export_records(tmp_path, export_format):
+    path = export_records(export_format, str(tmp_path / "meta_analysis"),
+                          [["log_a", 100, 1.5], ["log_b", 50, None]],
+                          ['log', 'row_count', 'mean_drag_area'], ["Log", "Rows", "Mean"])
+
+    loaded = dict(np.load(path)) if export_format == EXPORT_FORMAT_NPZ else\
+        open_column_store(path)
+    assert list(loaded['log']) == ["log_a", "log_b"]
+    assert list(loaded['row_count']) == [100, 50]
+    assert loaded['mean_drag_area'][0] == 1.5 and np.isnan(loaded['mean_drag_area'][1])
@@ -0,0 +1,37 @@
+import json
+
+from instrumentation import DISABLED
+from instrumentation import Instrumentation
+from instrumentation import JsonReportSink
+from instrumentation import create_instrumentation
+
+
+def test_disabled_instrumentation_measures_nothing():
+    with DISABLED.stage('load_data', 'log') as record:
+        record['rows'] = 10
+
+    assert 'wall_s' not in record
+    assert create_instrumentation({'INSTRUMENTATION': []}) is DISABLED
+
+
+def test_json_report_totals(tmp_path):
+    records = []
+    report = JsonReportSink(str(tmp_path / "report.json"))
+    instrumentation = Instrumentation([records.append, report])
+
+    for target in ("a", "b"):
+        with instrumentation.stage('populate_data_sheet', target) as record:
+            record['rows'] = 100
+        with instrumentation.stage('save', target):
+            pass
+    instrumentation.close()
+
+    assert [record['stage'] for record in records] == ['populate_data_sheet', 'save'] * 2
+    assert records[0]['wall_s'] >= 0 and records[0]['cpu_s'] >= 0
+
+    with open(tmp_path / "report.json") as file:
+        content = json.load(file)
+    assert content['totals']['populate_data_sheet']['rows'] == 200
+    assert content['totals']['save']['count'] == 2
+    assert content['files']['a']['rows'] == 100
+    assert len(content['records']) == 4
@@ -0,0 +1,60 @@
+from job_queue import JOB_DONE
+from job_queue import JOB_FAILED
+from job_queue import JOB_PENDING
+from job_queue import JobQueue
+from job_queue import run_batch
+from tests.conftest import EXAMPLE_LOGS
+
+
+def test_queue_claims_by_priority_and_retries(tmp_path):
+    paths = []
+    for name in ["a", "b", "c"]:
+        paths.append(tmp_path / (name + ".csv"))
+        paths[-1].write_text("Timestamp,ANEMOMETER,LOAD CELL\n")
+
+    with JobQueue(str(tmp_path / "jobs.sqlite")) as queue:
+        assert all(queue.enqueue(str(path)) for path in paths)
+        assert not queue.enqueue(str(paths[0]))
+
+        queue.prioritize([queue.jobs()[2]['id']], 5)
+        first = queue.claim()
+        assert first['path'] == str(paths[2]) and first['attempts'] == 1
+
+        queue.fail(first['id'], "ValueError('bad log')")
+        assert [job['path'] for job in queue.jobs(JOB_FAILED)] == [str(paths[2])]
+        assert queue.retry() == 1
+
+        # A job left running by a crashed batch is claimed again
+        second = queue.claim()
+        assert second['path'] == str(paths[2])
+        assert queue.recover() == 1
+        assert queue.claim()['id'] == second['id']
+
+        queue.complete(second['id'], 10, "c.xlsx")
+        assert not queue.enqueue(str(paths[2]))
+        paths[2].write_text("Timestamp,ANEMOMETER,LOAD CELL\n0.1,1.0,2.0\n")
+        assert queue.enqueue(str(paths[2]))
+        assert queue.counts() == {JOB_PENDING: 3, 'running': 0, JOB_DONE: 0, JOB_FAILED: 0}
+
+
+def test_batch_resumes_without_redoing_completed_logs(tmp_path, analysis_config):
+    database_path = str(tmp_path / "jobs.sqlite")
+    config = analysis_config(EXAMPLE_LOGS[:2], JOB_DATABASE_PATH=database_path,
+                             JOB_POLL_INTERVAL_S=0.05, JOB_SETTLE_S=0, JOB_IDLE_TIMEOUT_S=0.2,
+                             WORKERS=2, EXPORT_FORMAT=['npz'])
+    (tmp_path / "notes.csv").write_text("not,a,log\n")
+
+    # The first log was completed by an earlier batch, and the second was interrupted
+    with JobQueue(database_path) as queue:
+        for name in EXAMPLE_LOGS[:2]:
+            queue.enqueue(str(tmp_path / (name + ".csv")))
+        queue.complete(queue.claim()['id'])
+        queue.claim()
+
+    assert run_batch(config) == {JOB_PENDING: 0, 'running': 0, JOB_DONE: 2, JOB_FAILED: 0}
+
+    assert not (tmp_path / (EXAMPLE_LOGS[0] + "___analyzed.npz")).exists()
+    assert (tmp_path / (EXAMPLE_LOGS[1] + "___analyzed.npz")).exists()
+    with JobQueue(database_path) as queue:
+        job = queue.jobs()[1]
+    assert job['attempts'] == 2 and job['row_count'] == 3498 and job['duration_s'] > 0
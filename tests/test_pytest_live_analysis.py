@@ -0,0 +1,86 @@
+import asyncio
+import os
+import time
+
+import numpy as np
+import pytest
+
+import analysis_engine
+from daq_io import DaqTail
+from daq_io import parse_daq_block
+from live_analysis import LiveAnalysis
+from live_analysis import follow_log
+
+EXAMPLE_CSV = os.path.join(os.path.dirname(__file__), "example_data_directory",
+                           "sample_csv_of_log_2021-10-10_0.2tau.csv")
+
+
+def test_tail_parses_only_appended_lines(tmp_path):
+    csv_path = tmp_path / "live.csv"
+    tail = DaqTail(str(csv_path))
+    assert len(tail.read()) == 0
+
+    csv_path.write_bytes(b"Timestamp,ANEMOMETER,LOAD CELL\n0.1,1.0,2.0\n0.2,1.")
+    assert tail.read().tolist() == [[0.1, 1.0, 2.0]]
+
+    with open(csv_path, 'ab') as file:
+        file.write(b"5,2.5\n0.3,2.0,3.0\n")
+    assert tail.read().tolist() == [[0.2, 1.5, 2.5], [0.3, 2.0, 3.0]]
+    assert len(tail.read()) == 0
+
+    # A new log under the same name is followed from its start
+    csv_path.write_bytes(b"Timestamp,ANEMOMETER,LOAD CELL\n0.0,9.0,9.0\n")
+    assert tail.read().tolist() == [[0.0, 9.0, 9.0]]
+    assert tail.resets == 1
+
+
+def test_live_analysis_matches_whole_log():
+    with open(EXAMPLE_CSV, 'rb') as file:
+        file.readline()
+        samples = parse_daq_block(file.read())
+
+    analysis = LiveAnalysis()
+    for start in range(0, len(samples), 97):
+        analysis.push(samples[start:start + 97])
+    analysis.finish()
+    summary = analysis.summary()
+
+    expected = analysis_engine.summarize_run(
+        analysis_engine.compute_derived_columns(*samples.T))
+    assert summary['row_count'] == len(samples)
+    assert summary['sample_count'] == expected['sample_count']
+    assert summary['mean_drag_area'] == pytest.approx(expected['mean_drag_area'])
+    assert summary['time_above_threshold_s'] ==\
+        pytest.approx(expected['time_above_threshold_s'])
+
+
+def test_follow_log_updates_within_a_second(tmp_path):
+    with open(EXAMPLE_CSV, 'rb') as file:
+        lines = file.readlines()
+    csv_path = tmp_path / "live.csv"
+    csv_path.write_bytes(b"".join(lines[:1000]))
+
+    updates = []
+
+    def on_update(summary):
+        updates.append((time.monotonic(), summary))
+
+    async def write_rest():
+        await asyncio.sleep(0.3)
+        appended_at = time.monotonic()
+        with open(csv_path, 'ab') as file:
+            file.write(b"".join(lines[1000:]))
+        return appended_at
+
+    async def main():
+        follower = asyncio.ensure_future(follow_log(str(csv_path), on_update,
+                                                    poll_interval_s=0.05, idle_timeout_s=0.5))
+        appended_at = await write_rest()
+        return appended_at, await follower
+
+    appended_at, final = asyncio.run(main())
+
+    assert final['row_count'] == len(lines) - 1
+    first_complete = next(update_time for update_time, summary in updates
+                          if summary['row_count'] >= len(lines) - 1 - 3)
+    assert first_complete - appended_at < 1
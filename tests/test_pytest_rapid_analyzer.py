@@ -1,5 +1,33 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+from openpyxl import Workbook
+from openpyxl import load_workbook
+
+import daq_io
+import truck_test_rapid_analyzer as analyzer
+from analysis_engine import COLUMN_KEYS
+from analysis_engine import META_ANALYSIS_STATISTICS
+from analysis_engine import summarize_log
+from daq_log import read_log
+from exporters import open_column_store
+from instrumentation import Instrumentation
+from signal_filters import create_pipeline
+from tests.conftest import EXAMPLE_DIRECTORY
+from tests.conftest import EXAMPLE_LOGS
 from truck_test_rapid_analyzer import HeaderManager
+from truck_test_rapid_analyzer import bounded_futures
 from truck_test_rapid_analyzer import create_averageifs_formula
+from truck_test_rapid_analyzer import execute_complete_analysis
+from xlsx_export import create_sheet
+from xlsx_export import create_workbook
+from xlsx_export import save_workbook
+
+
+def example_csv(name):
+    return os.path.join(EXAMPLE_DIRECTORY, name + ".csv")
 
 
 def test_averageifs():
@@ -11,3 +39,239 @@ def test_averageifs():
     print(result)
 
     assert correct_result == result
+
+
+def test_bounded_futures_submit_ahead_of_use():
+    submitted = []
+    futures = bounded_futures(lambda item: submitted.append(item) or item * 2, range(5), 2)
+
+    # Only the next items are submitted, however many there are
+    assert next(futures) == (0, 0)
+    assert submitted == [0, 1, 2]
+    assert list(futures) == [(1, 2), (2, 4), (3, 6), (4, 8)]
+
+
+def test_parallel_analysis_skips_failed_files(tmp_path, monkeypatch, analysis_config):
+    hitlist = ["sample_csv_of_log_2021-10-10_0.2tau", "missing_log",
+               "sample_csv_of_log_2021-10-10_0.15tau", "sample_csv_of_log_2021-10-10_0.25tau"]
+
+    # The last file is loaded by a worker, but fails while it is written by the main process
+    populate_data_sheet = analyzer.populate_data_sheet
+
+    def failing_populate_data_sheet(ws_data, *args, **kwargs):
+        if ws_data.title == "_0.25tau":
+            raise ValueError("Sheet could not be written")
+        return populate_data_sheet(ws_data, *args, **kwargs)
+
+    monkeypatch.setattr(analyzer, "populate_data_sheet", failing_populate_data_sheet)
+    run_statistics = execute_complete_analysis(analysis_config(hitlist, WORKERS=2))
+
+    workbook = load_workbook(tmp_path / "Complete Analysis.xlsx")
+    assert workbook.sheetnames == ["Sheet", "Constants", "Meta-Analysis", "Runs", "0_0.2tau",
+                                  "_0.15tau"]
+    assert list(run_statistics) == [str(tmp_path / hitlist[0]), str(tmp_path / hitlist[2])]
+
+    # The statistics are those of the files analyzed on their own
+    rows = list(workbook["Meta-Analysis"].iter_rows(min_row=2, values_only=True))
+    for row, name in zip(rows, [hitlist[0], hitlist[2]]):
+        expected = summarize_log(read_log(str(tmp_path / (name + ".csv"))).derive())
+        assert row[1] == expected['row_count'] + 1
+        assert row[2].startswith("=AVERAGEIFS(")
+        assert row[3:] == pytest.approx(tuple(expected[key]
+                                              for key, _ in META_ANALYSIS_STATISTICS))
+
+
+@pytest.mark.parametrize("output_mode, export_formats", [
+    ("formulas", ("xlsx", "csv")), ("values", ("xlsx", "csv")), ("values", ("csv",))])
+def test_analysis_reads_every_log_once(tmp_path, monkeypatch, output_mode, export_formats):
+    name = EXAMPLE_LOGS[0]
+    csv_path = example_csv(name)
+    expected = summarize_log(read_log(csv_path).derive())
+
+    reads = []
+    iter_daq_chunks = daq_io.iter_daq_chunks
+    monkeypatch.setattr(daq_io, "iter_daq_chunks",
+                        lambda path, *args, **kwargs: reads.append(path) or
+                        iter_daq_chunks(path, *args, **kwargs))
+
+    summary = analyzer.execute_analysis(os.path.splitext(csv_path)[0],
+                                        str(tmp_path / (name + ".xlsx")),
+                                        output_mode=output_mode, export_formats=export_formats)
+
+    # The data sheet, the statistics and the exported columns all come from the same pass
+    assert reads == [csv_path]
+    assert summary['runs'] == [pytest.approx(run) for run in expected['runs']]
+    assert {key: value for key, value in summary.items() if key != 'runs'} ==\
+        pytest.approx({key: value for key, value in expected.items() if key != 'runs'})
+    assert len((tmp_path / (name + ".csv")).read_text().splitlines()) ==\
+        expected['row_count'] + 1
+    assert (tmp_path / (name + ".xlsx")).exists() == ("xlsx" in export_formats)
+
+
+def test_incremental_update_adds_only_new_files(tmp_path, analysis_config):
+    hitlist = ["sample_csv_of_log_2021-10-10_0.2tau", "sample_csv_of_log_2021-10-10_0.15tau"]
+    execute_complete_analysis(analysis_config(hitlist[:1]))
+    expected = [summarize_log(read_log(example_csv(name)).derive()) for name in hitlist]
+
+    # Removing the csv ensures that the sheet already in the workbook is not analyzed again
+    os.remove(tmp_path / (hitlist[0] + ".csv"))
+    execute_complete_analysis(analysis_config(hitlist, INCREMENTAL_UPDATE=True))
+
+    workbook = load_workbook(tmp_path / "Complete Analysis.xlsx")
+    assert workbook.sheetnames == ["Sheet", "Constants", "Meta-Analysis", "Runs", "0_0.2tau",
+                                  "_0.15tau"]
+    rows = list(workbook["Meta-Analysis"].iter_rows(min_row=2, values_only=True))
+    assert [row[:2] for row in rows] == [("0_0.2tau", 3075), ("_0.15tau", 3499)]
+
+    # The statistics of the sheet already in the workbook are kept along with the new ones
+    for row, statistics in zip(rows, expected):
+        assert row[3:] == pytest.approx(tuple(statistics[key]
+                                              for key, _ in META_ANALYSIS_STATISTICS))
+    assert len(workbook["0_0.2tau"]._charts) == 1
+
+    # The runs of the first file are kept in the run table, ahead of those of the new file
+    run_sheets = [row[0] for row in workbook["Runs"].iter_rows(min_row=2, values_only=True)]
+    assert run_sheets == ["0_0.2tau"] * 3 + ["_0.15tau"]
+
+
+def test_plot_table_decimates_every_series():
+    columns = read_log(example_csv(EXAMPLE_LOGS[0])).derive()
+    workbook = Workbook()
+    data_sheet = workbook.active
+    data_sheet.cell(len(columns) + 1, 1, columns['time_ms'][-1])
+
+    plot_sheet, plot_layout = analyzer.add_plot_sheet(
+        workbook, "Plot " + EXAMPLE_LOGS[0], columns, 200,
+        {'load_cell_raw': 'minmax', 'target_force': 'none'})
+    assert plot_sheet.title == ("Plot " + EXAMPLE_LOGS[0])[:31]
+    assert plot_sheet.sheet_state == 'hidden'
+
+    # The target force is left out, and the extremes of the min-max series are kept
+    assert 'target_force' not in plot_layout
+    assert max(point_count for _, _, point_count in plot_layout.values()) <= 200
+    time_col, value_col, point_count = plot_layout['load_cell_raw']
+    values = [plot_sheet.cell(row_idx, value_col).value for row_idx in range(2, point_count + 2)]
+    assert max(values) == columns['load_cell_raw'].max()
+    assert min(values) == columns['load_cell_raw'].min()
+    assert set(plot_sheet.cell(row_idx, time_col).value for row_idx in range(2, point_count + 2))\
+        <= set(columns['time_ms'].tolist())
+
+    # Only the series which is not decimated is plotted from the data sheet
+    analyzer.create_graphs(data_sheet, None, len(columns) + 2, plot_sheet, plot_layout)
+    references = [series.yVal.numRef.f for chart in data_sheet._charts[0]._charts
+                  for series in chart.series]
+    assert len(references) == 6
+    assert [reference for reference in references if plot_sheet.title not in reference] ==\
+        ["'" + data_sheet.title + "'!$I$2:$I$" + str(len(columns) + 2)]
+
+
+def test_instrumentation_records_worker_stages():
+    records = []
+    instrumentation = Instrumentation([records.append])
+
+    # The records of the worker process reach the sinks of the main process
+    with ProcessPoolExecutor(1) as pool:
+        future = instrumentation.submit(pool, analyzer.load_data, example_csv(EXAMPLE_LOGS[0]))
+        assert len(instrumentation.result(future)) == 3074
+    assert [(record['stage'], record['rows']) for record in records] ==\
+        [('load_data', 3074)]
+    assert records[0]['target'] == example_csv(EXAMPLE_LOGS[0])
+
+
+def test_shared_formulas_match_row_formulas(tmp_path):
+    chunk = (np.arange(10) * 0.1, np.ones(10), np.ones(10))
+    workbook = create_workbook()
+    sheet = create_sheet(workbook, "Data", number_formats=analyzer.DATA_SHEET_FORMATS)
+    row_idx = analyzer.write_formula_rows(sheet, tuple(channel[:1] for channel in chunk))
+    row_idx = analyzer.write_formula_rows(sheet, tuple(channel[1:] for channel in chunk), row_idx)
+    assert row_idx == 12
+    save_workbook(workbook, tmp_path / "shared.xlsx")
+
+    # Every row after the first of each write shares its formulas
+    loaded = load_workbook(tmp_path / "shared.xlsx")["Data"]
+    for row_idx in range(2, 12):
+        assert [loaded.cell(row_idx, col_idx).value for col_idx in range(4, 12)] ==\
+            analyzer.data_row_formulas(row_idx)
+        assert loaded.cell(row_idx, 1).value == (row_idx - 2) * 100
+        assert loaded.cell(row_idx, 11).number_format == analyzer.DATA_NUMBER_FORMAT
+
+
+def test_column_exports_hold_the_derived_columns(tmp_path):
+    expected = read_log(example_csv(EXAMPLE_LOGS[0])).derive()
+    export_path = str(tmp_path / EXAMPLE_LOGS[0])
+
+    summary = analyzer.execute_analysis(os.path.splitext(example_csv(EXAMPLE_LOGS[0]))[0],
+                                        export_path + ".xlsx",
+                                        export_formats=['npz', 'columnar'])
+    assert not list(tmp_path.glob("*.xlsx"))
+
+    columns = np.load(export_path + ".npz")
+    store = open_column_store(export_path + ".colstore")
+    assert list(columns['titles'])[:2] == ["Time (ms)", "Anemometer Raw (m/s)"]
+    for key in COLUMN_KEYS:
+        assert np.array_equal(columns[key], expected[key])
+        assert np.array_equal(store[key], expected[key])
+
+    analyzer.export_meta_analysis(str(tmp_path / "meta_analysis"), {export_path: summary},
+                                  ['columnar'])
+    meta_analysis = open_column_store(str(tmp_path / "meta_analysis.colstore"))
+    assert list(meta_analysis['log']) == [EXAMPLE_LOGS[0]]
+    assert list(meta_analysis['row_count']) == [3074]
+    assert meta_analysis['mean_drag_area'][0] == pytest.approx(summary['mean_drag_area'])
+
+
+def test_compare_logs_aligns_first_runs(tmp_path):
+    pipeline = create_pipeline({'RESAMPLE_RATE_HZ': 10})
+    targets = [os.path.splitext(example_csv(name))[0] for name in EXAMPLE_LOGS[:2]]
+    comparison = analyzer.compare_logs(targets + [str(tmp_path / "missing")],
+                                       ["0.2tau", "0.15tau", "missing"], pipeline,
+                                       reference='run', suppress_prints=True)
+
+    # Both logs are on the same grid, and have samples at the start of their first run
+    assert comparison['labels'] == ["0.2tau", "0.15tau"]
+    times = comparison['time_s']
+    assert np.allclose(np.diff(times), 0.1)
+    for drag_area in comparison['drag_area']:
+        assert not np.isnan(drag_area[np.isclose(times, 0)]).any()
+
+    sheet = analyzer.create_comparison_sheet(Workbook(), comparison)
+    assert sheet.cell(1, 2).value == "0.2tau Windspeed (m/s)"
+    assert len(sheet._charts) == 3
+
+    analyzer.export_comparison(str(tmp_path / "comparison"), comparison, ['xlsx', 'npz'])
+    assert np.array_equal(np.load(tmp_path / "comparison.npz")['drag_area_1'],
+                          comparison['drag_area'][1], equal_nan=True)
+
+
+def test_plan_shards_within_budget(tmp_path):
+    csv_paths = [example_csv(name) for name in EXAMPLE_LOGS] + [str(tmp_path / "missing.csv")]
+
+    # The logs have 3074, 3498 and 3075 rows, and a missing log counts as empty
+    assert analyzer.plan_shards(csv_paths, max_rows=7000) == [[0, 1], [2, 3]]
+    assert analyzer.plan_shards(csv_paths, max_rows=1000) == [[0], [1], [2], [3]]
+    assert analyzer.plan_shards(csv_paths) == [[0, 1, 2, 3]]
+
+    csv_bytes = os.path.getsize(csv_paths[0]) * analyzer.SHARD_BYTES_PER_CSV_BYTE['values']
+    assert analyzer.plan_shards(csv_paths[:2], max_bytes=csv_bytes,
+                                output_mode='values') == [[0], [1]]
+
+
+def test_shard_index_links_every_sheet(tmp_path):
+    summaries = [summarize_log(read_log(example_csv(name)).derive()) for name in EXAMPLE_LOGS]
+    shard_paths = [str(tmp_path / "shards" / ("Analysis___shard" + str(idx) + ".xlsx"))
+                   for idx in (1, 2)]
+
+    workbook = Workbook()
+    analyzer.create_shard_index(workbook, [(shard_paths[0], dict(zip(["a", "b"], summaries))),
+                                           (shard_paths[1], {"c's": summaries[2]})],
+                                str(tmp_path))
+
+    rows = list(workbook["Meta-Analysis"].iter_rows(min_row=2, values_only=True))
+    assert [row[0] for row in rows] == [os.path.join("shards", "Analysis___shard1.xlsx")] * 2 +\
+        [os.path.join("shards", "Analysis___shard2.xlsx")]
+    assert rows[2][1] == '=HYPERLINK("' + os.path.join("shards", "Analysis___shard2.xlsx") +\
+        '#\'c\'\'s\'!A1", "c\'s")'
+    for row, summary in zip(rows, summaries):
+        assert row[2] == summary['row_count'] + 1
+        assert row[3:] == tuple(summary[key] for key, _ in META_ANALYSIS_STATISTICS)
+    assert workbook["Runs"].max_row - 1 == sum(summary['run_count'] for summary in summaries)
@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pytest
+
+from result_cache import ResultCache
+from result_cache import analysis_parameters
+
+
+def test_entries_depend_on_contents_and_parameters(tmp_path):
+    csv_path = tmp_path / "log.csv"
+    csv_path.write_text("Timestamp,ANEMOMETER,LOAD CELL\n0.0,1.0,2.0\n")
+
+    cache = ResultCache(str(tmp_path / "cache"))
+    key = cache.key(csv_path, analysis_parameters('values'))
+    assert cache.load(key) is None
+
+    cache.store(key, {'time_ms': np.array([0])}, {'row_count': 1})
+    columns, summary = cache.load(key)
+    assert columns['time_ms'].tolist() == [0]
+    assert summary == {'row_count': 1}
+
+    assert cache.key(csv_path, analysis_parameters('formulas')) != key
+
+    constants = dict(analysis_parameters('values')['constants'], ANEMOMETER_FACTOR=0.8)
+    assert cache.key(csv_path, analysis_parameters('values', constants)) != key
+
+    csv_path.write_text("Timestamp,ANEMOMETER,LOAD CELL\n0.0,1.0,2.5\n")
+    assert cache.key(csv_path, analysis_parameters('values')) != key
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10 ** 9)
+    column = {'data': np.zeros(1000)}
+
+    for idx, key in enumerate(['a', 'b', 'c']):
+        cache.store(key, column, {})
+        os.utime(tmp_path / (key + '.npz'), (idx, idx))
+
+    cache.load('a')  # Using 'a' makes 'b' the least recently used entry
+
+    cache.max_bytes = 2 * os.path.getsize(tmp_path / 'a.npz')
+    cache.evict()
+
+    assert sorted(os.listdir(tmp_path)) == ['a.npz', 'c.npz']
+
+
+def test_cached_logs_keep_their_whole_summary(tmp_path, monkeypatch):
+    import daq_log
+    from truck_test_rapid_analyzer import load_data
+    from truck_test_rapid_analyzer import run_summary
+
+    csv_path = os.path.join(os.path.dirname(__file__), "example_data_directory",
+                            "sample_csv_of_log_2021-10-10_0.2tau.csv")
+    cache = ResultCache(str(tmp_path))
+    summary = load_data(csv_path, 'formulas', cache).summary
+    assert summary == run_summary(daq_log.read_log(csv_path).derive())
+
+    # The summary is cached with the log, which is then never read or summarized again
+    monkeypatch.setattr(daq_log, "read_log", None)
+    cached = load_data(csv_path, 'formulas', cache)
+    assert cached.summary == summary
+    assert cached.derived is None
+
+    with pytest.raises(TypeError):
+        load_data(csv_path, 'formulas', cache, run_segmentation={'hysteresis': 0.5})
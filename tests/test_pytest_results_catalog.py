@@ -0,0 +1,60 @@
+import os
+import sqlite3
+
+import pytest
+
+from result_cache import file_digest
+from results_catalog import ResultsCatalog
+from results_catalog import catalog_parameters
+from tests.conftest import EXAMPLE_LOGS
+from truck_test_rapid_analyzer import execute_complete_analysis
+
+
+def test_records_are_replaced_per_parameters(tmp_path):
+    csv_path = tmp_path / "log.csv"
+    csv_path.write_text("Timestamp,ANEMOMETER,LOAD CELL\n")
+    summary = {'row_count': 100, 'mean_drag_area': 4.0, 'run_count': 2,
+               'runs': [{'start_s': 1.0, 'mean_drag_area': 3.0, 'mean_windspeed_ft_s': 35.0},
+                        {'start_s': 5.0, 'mean_drag_area': 5.0, 'mean_windspeed_ft_s': 25.0}]}
+    parameters = catalog_parameters('values')
+    database_path = str(tmp_path / "catalog.sqlite")
+
+    with ResultsCatalog(database_path) as catalog:
+        log_id = catalog.record(str(csv_path), summary, parameters, "Log")
+        assert catalog.record(str(csv_path), dict(summary, mean_drag_area=4.5), parameters,
+                              "Log") == log_id
+        catalog.record(str(csv_path), dict(summary, runs=[]),
+                       catalog_parameters('values', run_segmentation={'hysteresis': 0.5}))
+
+    with ResultsCatalog(database_path, read_only=True) as catalog:
+        logs = catalog.logs(order_by="mean_drag_area DESC")
+        assert [log['mean_drag_area'] for log in logs] == [4.5, 4.0]
+        assert logs[0]['file_hash'] == file_digest(str(csv_path))
+        assert logs[0]['windspeed_threshold'] == parameters['constants']['WINDSPEED_THRESHOLD']
+
+        runs = catalog.runs("mean_windspeed_ft_s > ?", parameters=(30,))
+        assert [(run['log_id'], run['mean_drag_area'], run['sheetname']) for run in runs] ==\
+            [(log_id, 3.0, "Log")]
+
+        with pytest.raises(sqlite3.OperationalError):
+            catalog.query("DELETE FROM logs")
+
+
+def test_complete_analysis_fills_catalog(tmp_path, analysis_config):
+    config = analysis_config(EXAMPLE_LOGS[:2], SINGLE_OUTPUT_FILE=False,
+                             USE_CUSTOM_SHEETNAMES=False, EXPORT_FORMAT=['npz'],
+                             RESULTS_CATALOG=True)
+    run_statistics = execute_complete_analysis(config)
+    # Analyzing the same files again does not duplicate them
+    execute_complete_analysis(config)
+
+    with ResultsCatalog(str(tmp_path / "results_catalog.sqlite")) as catalog:
+        logs = catalog.logs()
+        assert [log['sheetname'] for log in logs] == EXAMPLE_LOGS[:2]
+        for log in logs:
+            summary = run_statistics[os.path.splitext(log['path'])[0]]
+            assert log['row_count'] == summary['row_count']
+            assert log['mean_drag_area'] == pytest.approx(summary['mean_drag_area'])
+            assert log['run_count'] == summary['run_count']
+            assert len(catalog.runs("log_id = ?", parameters=(log['id'],))) ==\
+                summary['run_count']
@@ -0,0 +1,40 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import analysis_engine
+from daq_io import iter_daq_chunks
+from sensitivity_sweep import run_sweep
+
+EXAMPLE_CSV = os.path.join(os.path.dirname(__file__), "example_data_directory",
+                           "sample_csv_of_log_2021-10-10_0.2tau.csv")
+
+
+def test_sweep_matches_full_analyses(tmp_path):
+    csv_path = str(tmp_path / "log.csv")
+    shutil.copy(EXAMPLE_CSV, csv_path)
+    config = {'SWEEP_ANEMOMETER_FACTOR': {'start': 0.6, 'stop': 0.9, 'count': 4},
+              'SWEEP_LOAD_CELL_FACTOR': [1.2, 0.8, 1.0],
+              'SWEEP_AIR_DENSITY_KG_M3': [], 'SUPPRESS_ALL_PRINTS': True}
+
+    result = run_sweep(config, [csv_path])[csv_path]
+    assert result['mean_drag_area'].shape == (4, 3, 1)
+    assert result['load_cell_factor'].tolist() == [0.8, 1.0, 1.2]
+
+    raw_columns = [np.concatenate(channel) for channel in zip(*iter_daq_chunks(csv_path))]
+    for idx in [(0, 0, 0), (2, 1, 0), (3, 2, 0)]:
+        constants = analysis_engine.analysis_constants({
+            'ANEMOMETER_FACTOR': result['anemometer_factor'][idx[0]],
+            'LOAD_CELL_FACTOR': result['load_cell_factor'][idx[1]]})
+        summary = analysis_engine.summarize_run(
+            analysis_engine.compute_derived_columns(*raw_columns, constants), constants)
+
+        assert result['sample_count'][idx] == summary['sample_count']
+        assert result['mean_drag_area'][idx] == pytest.approx(summary['mean_drag_area'])
+        assert result['drag_coeff'][idx] == pytest.approx(summary['drag_coeff'])
+
+    matrices = np.load(tmp_path / "log___sweep.npz")
+    assert np.array_equal(matrices['mean_drag_area'], result['mean_drag_area'], equal_nan=True)
+    assert len((tmp_path / "log___sweep.csv").read_text().splitlines()) == 13
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from analysis_engine import centered_average
+from analysis_engine import timestamps_ms
+from signal_filters import Despike
+from signal_filters import ExponentialMovingAverage
+from signal_filters import FilterPipeline
+from signal_filters import MovingMedian
+from signal_filters import create_pipeline
+
+
+def test_large_window_average_matches_convolution():
+    values = np.random.default_rng(3).normal(100.0, 5.0, 5000)
+    window = 250
+    result = centered_average(values, window)
+
+    kernel = np.ones(2 * window + 1)
+    expected = (np.convolve(values, kernel, mode='same')
+                / np.convolve(np.ones(len(values)), kernel, mode='same'))
+    assert np.allclose(result, expected, rtol=0, atol=1e-9)
+
+
+def test_despike_and_limits():
+    load_cell = np.full(50, 10.0)
+    load_cell[20] = 80.0
+    load_cell[30] = 999.0
+    anemometer = np.linspace(0.0, 20.0, 50)
+    time_s = np.arange(50) * 0.1
+
+    pipeline = create_pipeline({'SIGNAL_FILTERS': {'load_cell': [{'type': 'despike',
+                                                                  'window': 3}]},
+                                'SAMPLE_LIMITS': {'load_cell': [None, 500]}})
+    time_s, anemometer, load_cell = pipeline.apply(time_s, anemometer, load_cell)
+
+    # The out of range sample is dropped, and the spike is replaced by its median
+    assert len(time_s) == len(anemometer) == len(load_cell) == 49
+    assert 3.0 not in time_s
+    assert np.all(load_cell == 10.0)
+    assert pipeline.parameters()['sample_limits'] == {'load_cell': [None, 500]}
+
+
+def test_streaming_matches_whole_log():
+    rng = np.random.default_rng(7)
+    time_s = np.arange(1000) * 0.1
+    anemometer = rng.normal(20.0, 2.0, 1000)
+    load_cell = rng.normal(50.0, 5.0, 1000)
+    load_cell[::97] = -1000.0
+
+    pipeline = FilterPipeline({'anemometer': [{'type': 'median', 'window': 2},
+                                              {'type': 'moving_average', 'window': 20}],
+                               'load_cell': [{'type': 'ema', 'span': 10}]},
+                              {'load_cell': (-100, None)})
+    expected = pipeline.apply(time_s, anemometer, load_cell)
+
+    for chunk_size in [1, 7, 300]:
+        chunks = [(time_s[idx:idx + chunk_size], anemometer[idx:idx + chunk_size],
+                   load_cell[idx:idx + chunk_size]) for idx in range(0, 1000, chunk_size)]
+        streamed = list(pipeline.stream(chunks))
+        for channel, values in enumerate(expected):
+            assert np.allclose(np.concatenate([chunk[channel] for chunk in streamed]), values,
+                               rtol=0, atol=1e-9)
+
+
+def test_resampling_onto_a_uniform_grid():
+    time_s = np.array([0.0, 0.0938, 0.2026, 0.2962, 0.41])
+    load_cell = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+    pipeline = FilterPipeline(resample_rate_hz=10)
+
+    grid, _, resampled = pipeline.apply(time_s, np.zeros(5), load_cell)
+    assert grid.tolist() == [0.0, 0.1, 0.2, 0.3, 0.4]
+    assert resampled[1] == np.interp(0.1, time_s, load_cell)
+
+    # Resampled in chunks, the grid points between two chunks are interpolated the same way
+    streamed = list(pipeline.stream((time_s[idx:idx + 2], np.zeros(2)[:len(time_s[idx:idx + 2])],
+                                     load_cell[idx:idx + 2]) for idx in range(0, 5, 2)))
+    assert np.concatenate([chunk[0] for chunk in streamed]).tolist() == grid.tolist()
+    assert np.array_equal(np.concatenate([chunk[2] for chunk in streamed]), resampled)
+
+
+@pytest.mark.parametrize("rate_hz", [10, 100, 1000])
+def test_resampled_timestamps_step_exactly(rate_hz):
+    time_s = np.cumsum(np.random.default_rng(rate_hz).uniform(0.05, 0.15, 2000)) / rate_hz * 10
+    samples = np.ones(len(time_s))
+    grid, _, _ = FilterPipeline(resample_rate_hz=rate_hz).apply(time_s, samples, samples)
+
+    steps = np.diff(timestamps_ms(grid))
+    assert len(steps) > 100
+    assert np.all(steps == 1000 // rate_hz)
+
+
+@pytest.mark.parametrize("filter_class", [MovingMedian, Despike])
+def test_sorted_windows_match_vectorized_windows(filter_class, monkeypatch):
+    rng = np.random.default_rng(11)
+    values = np.round(rng.normal(10.0, 3.0, 500))
+    values[::37] = 200.0
+
+    for window in (1, 4, 60, 600):
+        monkeypatch.setattr(filter_class, 'vectorized_max_width', 0)
+        result = filter_class(window).apply(values)
+        monkeypatch.setattr(filter_class, 'vectorized_max_width', 10 ** 6)
+        assert np.array_equal(result, filter_class(window).apply(values))
+
+
+def test_ema_matches_recurrence():
+    values = np.random.default_rng(5).normal(50.0, 10.0, 20000)
+
+    for span in (1, 3, 10, 1e5):
+        ema = ExponentialMovingAverage(span)
+        expected = np.empty(len(values))
+        average = 7.0
+        for idx, value in enumerate(values):
+            average += ema.alpha * (value - average)
+            expected[idx] = average
+
+        assert np.allclose(ema.apply(values, 7.0), expected, rtol=1e-12, atol=0)
+        assert ema.apply(values)[0] == values[0]
@@ -0,0 +1,22 @@
+import numpy as np
+
+from daq_io import iter_daq_chunks
+from synthetic_daq import generate_daq_log
+
+
+def test_synthetic_log_is_deterministic(tmp_path):
+    generate_daq_log(str(tmp_path / "first.csv"), 5000, seed=3)
+    generate_daq_log(str(tmp_path / "second.csv"), 5000, seed=3)
+
+    assert (tmp_path / "first.csv").read_bytes() == (tmp_path / "second.csv").read_bytes()
+
+
+def test_synthetic_log_has_runs(tmp_path):
+    generate_daq_log(str(tmp_path / "log.csv"), 5000)
+
+    time_s, anemometer, load_cell = (np.concatenate(channel) for channel in
+                                     zip(*iter_daq_chunks(str(tmp_path / "log.csv"))))
+
+    assert len(time_s) == 5000 and time_s[0] == 0
+    assert np.all(np.diff(time_s) > 0.08) and np.all(np.diff(time_s) < 0.11)
+    assert anemometer.max() / 0.725 > 11 and load_cell.max() > 10
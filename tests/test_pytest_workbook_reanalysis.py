@@ -0,0 +1,55 @@
+import csv
+import os
+
+import pytest
+from openpyxl import load_workbook
+
+from analysis_engine import META_ANALYSIS_STATISTICS
+from tests.conftest import EXAMPLE_LOGS
+from truck_test_rapid_analyzer import execute_analysis
+from truck_test_rapid_analyzer import execute_complete_analysis
+from workbook_reanalysis import run_reanalysis
+
+LOGS = EXAMPLE_LOGS[:2]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_reanalysis_matches_original_analysis(tmp_path, workers, analysis_config):
+    # A condensed single output file, with hidden plot sheets, and a separate output file
+    config = analysis_config(LOGS, CHART_MAX_POINTS=200)
+    run_statistics = execute_complete_analysis(config)
+    target = str(tmp_path / LOGS[0])
+    execute_analysis(target, target + "___analyzed.xlsx", output_mode='values')
+
+    # The csv files are gone, only the workbooks are left
+    for name in LOGS:
+        os.remove(tmp_path / (name + ".csv"))
+
+    workbook_paths = [str(tmp_path / "Complete Analysis.xlsx"), target + "___analyzed.xlsx",
+                      str(tmp_path / "missing.xlsx")]
+    statistics = run_reanalysis(dict(config, WORKERS=workers, EXPORT_FORMAT=['xlsx', 'csv']),
+                                workbook_paths)
+
+    assert list(statistics) == workbook_paths[:2]
+    assert list(statistics[workbook_paths[0]]) == ["0_0.2tau", "_0.15tau"]
+    assert list(statistics[workbook_paths[1]]) == ["Data"]
+    for name, summary in zip(LOGS + LOGS[:1],
+                             list(statistics[workbook_paths[0]].values()) +
+                             [statistics[workbook_paths[1]]["Data"]]):
+        expected = run_statistics[str(tmp_path / name)]
+        assert summary['row_count'] == expected['row_count']
+        assert summary['runs'] == [pytest.approx(run) for run in expected['runs']]
+        for key, _ in META_ANALYSIS_STATISTICS:
+            assert summary[key] == pytest.approx(expected[key])
+
+    meta_analysis = load_workbook(tmp_path / "reanalysis.xlsx")["Meta-Analysis"]
+    assert [row[0] for row in meta_analysis.iter_rows(min_row=2, values_only=True)] ==\
+        ["Complete Analysis.xlsx"] * 2 + [LOGS[0] + "___analyzed.xlsx"]
+    assert (tmp_path / "reanalysis.csv").read_text().count("\n") == 4
+
+    # The timestamps are passed through exactly
+    with open(target + "___analyzed___Data.csv") as file:
+        exported_time = [int(row[0]) for row in list(csv.reader(file))[1:]]
+    data_sheet = load_workbook(target + "___analyzed.xlsx", read_only=True)["Data"]
+    assert exported_time == [row[0] for row in data_sheet.iter_rows(min_row=2, max_col=1,
+                                                                       values_only=True)]
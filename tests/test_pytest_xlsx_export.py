@@ -0,0 +1,76 @@
+import re
+import zipfile
+
+import pytest
+from openpyxl import load_workbook
+
+import xlsx_export
+from xlsx_export import SHARED_FORMULA
+from xlsx_export import StreamingWorkbook
+from xlsx_export import create_sheet
+from xlsx_export import create_workbook
+from xlsx_export import save_workbook
+from xlsx_export import share_formula
+
+
+def test_streaming_sheet_spacing_and_formats(tmp_path):
+    workbook = StreamingWorkbook()
+    sheet = workbook.create_sheet("Data", space_depth=1, number_formats={2: "0.000"})
+
+    sheet.append(["Time (ms)", "Anemometer Raw (m/s)"])
+    for idx in range(10):
+        sheet.append([idx, idx / 3])
+
+    assert sheet.max_row == 11
+    assert sheet.last_row == [9, 3.0]
+
+    workbook.save(tmp_path / "streamed.xlsx")
+
+    loaded = load_workbook(tmp_path / "streamed.xlsx")["Data"]
+    assert loaded.column_dimensions['B'].width == int(0.75 * len("Anemometer Raw (m/s)"))
+    assert loaded['A1'].alignment.wrap_text
+    assert loaded['B11'].value == 3.0
+    assert loaded['B11'].number_format == "0.000"
+    assert loaded['A11'].number_format == "General"
+
+
+def test_streaming_sheet_short_of_space_depth(tmp_path):
+    workbook = StreamingWorkbook()
+    sheet = workbook.create_sheet("Constants", space_depth=12, space_cols=1)
+    sheet.append(["A title", 1.0])
+
+    workbook.save(tmp_path / "streamed.xlsx")
+
+    loaded = load_workbook(tmp_path / "streamed.xlsx")["Constants"]
+    assert loaded['A1'].value == "A title"
+    assert loaded.column_dimensions['A'].width == 5
+
+
+@pytest.mark.parametrize("write_only", [True, False])
+def test_shared_formulas(tmp_path, write_only, monkeypatch):
+    # The sheet xml is rewritten in chunks which end within the cells
+    monkeypatch.setattr(xlsx_export, 'SHEET_XML_CHUNK_SIZE', 50)
+    workbook = create_workbook(write_only)
+    sheet = create_sheet(workbook, "Data", number_formats={2: "0.000"})
+
+    share_formula(sheet, "B", 1, 5)
+    for row_idx in range(1, 6):
+        row = [row_idx, "=A1*2" if row_idx == 1 else SHARED_FORMULA]
+        if write_only:
+            sheet.append(row)
+        else:
+            sheet.cell(row_idx, 1, row[0])
+            sheet.cell(row_idx, 2, row[1]).data_type = 'f'
+    save_workbook(workbook, tmp_path / "shared.xlsx")
+
+    # Only the first cell holds the formula, which the other cells refer to
+    with zipfile.ZipFile(tmp_path / "shared.xlsx") as archive:
+        formulas = [re.findall(r'<f[^>]*>[^<]*</f>|<f[^>]*/>', archive.read(name).decode())
+                    for name in archive.namelist() if name.startswith("xl/worksheets/sheet")]
+    assert [formula for sheet_formulas in formulas for formula in sheet_formulas] ==\
+        ['<f t="shared" si="0" ref="B1:B5">A1*2</f>'] + ['<f t="shared" si="0" />'] * 4
+
+    loaded = load_workbook(tmp_path / "shared.xlsx")["Data"]
+    assert [loaded.cell(row_idx, 2).value for row_idx in range(1, 6)] ==\
+        ["=A1*2", "=A2*2", "=A3*2", "=A4*2", "=A5*2"]
+    assert loaded.column_dimensions['B'].number_format == "0.000"
@@ -1,3 +1,10 @@
+if __name__ == "__main__":
+    # The command line is in its own module, which only imports what every command needs, so it
+    # is run before anything else is imported here
+    import analyzer_cli
+    analyzer_cli.main()
+    raise SystemExit
+
 from openpyxl import Workbook as WB
 from openpyxl import load_workbook as load_wb
 
@@ -9,14 +16,84 @@ from openpyxl.workbook.defined_name import DefinedName as DName
 
 from openpyxl.chart import LineChart, ScatterChart, Reference, Series
 
-import csv
+import collections
+import itertools
 import os
 import sys
 
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from contextlib import nullcontext
+
+import numpy as np
+
 from openpyxl.styles.alignment import Alignment
 
 from config_variables import *
 
+import analysis_engine
+import chart_decimation
+import daq_io
+import daq_log
+import exporters
+import log_alignment
+import result_cache
+import results_catalog
+import signal_filters
+
+from instrumentation import DISABLED as INSTRUMENTATION_DISABLED
+from instrumentation import create_instrumentation
+
+from xlsx_export import DATA_NUMBER_FORMAT
+from xlsx_export import SHARED_FORMULA
+from xlsx_export import StreamingSheet
+from xlsx_export import column_formats
+from xlsx_export import create_sheet
+from xlsx_export import create_workbook
+from xlsx_export import save_workbook
+from xlsx_export import share_formula
+
+OUTPUT_MODE_FORMULAS = 'formulas'
+OUTPUT_MODE_VALUES = 'values'
+
+# The number formats of the data sheet columns, all columns after the time are formatted
+DATA_SHEET_FORMATS = {col_idx: DATA_NUMBER_FORMAT for col_idx in range(2, 12)}
+
+# The columns of the data sheet which are derived from the raw readings by formulas
+DERIVED_FORMULA_COLUMNS = ("D", "E", "F", "G", "H", "I", "J", "K")
+
+# The samples before and after each one that the force and windspeed are averaged over
+FORCE_AVERAGE_WINDOW = 3
+WINDSPEED_AVERAGE_WINDOW = 0
+
+# The series of the main chart, as (column key, data sheet column, title). The x values of all
+# series are the times in the first column.
+MAIN_CHART_SERIES = (('anemometer_raw', 2, "Raw Windspeed"),
+                     ('load_cell_raw', 3, "Raw Force"),
+                     ('anemometer_calibrated', 4, "Calibrated Windspeed"),
+                     ('load_cell_averaged', 6, "Averaged Force"),
+                     ('target_force', 9, "Target Force"))
+DRAG_AREA_CHART_SERIES = (('drag_area', 10, "Drag Area"),)
+
+# The run statistics in the meta-analysis, as (key in analysis_engine.summarize_log, title)
+META_ANALYSIS_STATISTICS = analysis_engine.META_ANALYSIS_STATISTICS
+
+# The columns of the run table after the sheet and run number, as (key in
+# analysis_engine.segment_runs, title)
+RUN_TABLE_COLUMNS = (('start_s', "Start (s)"),
+                     ('end_s', "End (s)"),
+                     ('duration_s', "Duration (s)"),
+                     ('mean_force', "Mean Force (lbf)"),
+                     ('peak_force', "Peak Force (lbf)"),
+                     ('mean_drag_area', "Mean Drag Area [CdSo] (ft^2)"))
+
+# The suffix of the workbooks of a sharded single output file, followed by the shard number
+SHARD_SUFFIX = '___shard'
+
+# The approximate size of a saved data sheet per byte of its csv in every output mode, with which
+# the logs of a single output file are split by SHARD_MAX_BYTES
+SHARD_BYTES_PER_CSV_BYTE = {OUTPUT_MODE_FORMULAS: 1.0, OUTPUT_MODE_VALUES: 2.0}
+
 
 def space_columns(target_sheet, depth=1, cols=0):
     '''
@@ -31,7 +108,12 @@ def space_columns(target_sheet, depth=1, cols=0):
     cols: int=0
         How many columns should be checked. Default values is 0, which specifies a scan of all
         columns.
+
+    A StreamingSheet cannot be modified once its rows are written, so it is spaced while its
+    first rows are written instead, as specified when it is created. It is ignored here.
     '''
+    if isinstance(target_sheet, StreamingSheet):
+        return
 
     exit_flag = False
     col_count = 1
@@ -79,76 +161,87 @@ class HeaderManager():
     DRAG_AREA_COL = 10
     DRAG_COEFF_COL = 11
 
+    def header_titles(self):
+        """
+        Get the titles of all headers.
+
+        Returns
+        -------
+        dict
+            The header titles, keyed by their column index
+        """
+        return {self.TIME_COL: "Time (ms)",
+                self.ANEMOMETER_RAW_COL: "Anemometer Raw (m/s)",
+                self.LOAD_CELL_RAW_COL: "Load Cell Raw (lbf)",
+                self.ANEMOMETER_CALIBRATED_COL: "Anemometer Calibrated (m/s)",
+                self.LOAD_CELL_CALIBRATED_COL: "Load Cell Calibrated (lbf)",
+
+                self.LOAD_CELL_AVERAGED_COL: "Load Cell Averaged (lbf)",
+                self.ANEMOMETER_AVERAGED_COL: "Anemometer Averaged (m/s)",
+                self.ANEMOMETER_FT_S_COL: "Anemometer (ft/s)",
+
+                self.TARGET_FORCE_COL: "Target Force (lbf)",
+                self.DRAG_AREA_COL: "Drag Area [CdSo] (ft^2)",
+                self.DRAG_COEFF_COL: "Drag Coefficient (unitless)"}
+
     def create_headers(self, sheet, target_row=1):
         """
         Create headers in specified sheet.
 
         Parameters
         ----------
-        sheet: openpyxl.Worksheet
+        sheet: openpyxl.Worksheet or StreamingSheet
             The sheet where the headers are to be created
 
         target_row: The row where the headers should be inserted. Default is 1, which is the first row.
                     (openpyxl starts counting at 1 so this is the true first row in the spreadsheet)
+                    For a StreamingSheet, the headers are always appended as the next row.
 
         """
-        sheet.cell(target_row, self.TIME_COL, "Time (ms)")
-        sheet.cell(target_row, self.ANEMOMETER_RAW_COL, "Anemometer Raw (m/s)")
-        sheet.cell(target_row, self.LOAD_CELL_RAW_COL, "Load Cell Raw (lbf)")
-        sheet.cell(target_row, self.ANEMOMETER_CALIBRATED_COL,
-                   "Anemometer Calibrated (m/s)")
-        sheet.cell(target_row, self.LOAD_CELL_CALIBRATED_COL,
-                   "Load Cell Calibrated (lbf)")
+        titles = self.header_titles()
 
-        sheet.cell(target_row, self.LOAD_CELL_AVERAGED_COL,
-                   "Load Cell Averaged (lbf)")
-        sheet.cell(target_row, self.ANEMOMETER_AVERAGED_COL,
-                   "Anemometer Averaged (m/s)")
-        sheet.cell(target_row, self.ANEMOMETER_FT_S_COL, "Anemometer (ft/s)")
+        if isinstance(sheet, StreamingSheet):
+            sheet.append([titles[col_idx] for col_idx in sorted(titles)])
+            return
 
-        sheet.cell(target_row, self.TARGET_FORCE_COL, "Target Force (lbf)")
-        sheet.cell(target_row, self.DRAG_AREA_COL, "Drag Area [CdSo] (ft^2)")
-        sheet.cell(target_row, self.DRAG_COEFF_COL,
-                   "Drag Coefficient (unitless)")
+        for col_idx, title in titles.items():
+            sheet.cell(target_row, col_idx, title)
 
 
-def process_sheet_row(raw_data, row_idx, sheet):
+def data_row_formulas(row_idx, force_window=FORCE_AVERAGE_WINDOW,
+                      windspeed_window=WINDSPEED_AVERAGE_WINDOW):
     """
-    Create all formulas and input sheet data for a single data timestamp (row)
+    Create the formulas of the derived columns (D to K) of a single data timestamp (row)
 
     Parameters
     ----------
-    raw_data: array of float-like str
-        The raw data from the DAQ csv
     row_idx: int
-        The index of the row where it is the to be inserted. That is, the target excel sheet row
-    sheet: openpyxl.Worksheet
-        The worksheet where the data will be inputted.
-    """
-    sheet.cell(row_idx, 1, int(float(raw_data[0])*1000))
-
-    sheet.cell(row_idx, 2, float(raw_data[1]))
-    sheet.cell(row_idx, 2).number_format = "0.000"
+        The index of the target excel sheet row
+    force_window, windspeed_window: int
+        The half-widths of the averaging windows of the force and the windspeed (in rows).
+        Default is FORCE_AVERAGE_WINDOW and WINDSPEED_AVERAGE_WINDOW
 
-    sheet.cell(row_idx, 3, float(raw_data[2]))
-    sheet.cell(row_idx, 3).number_format = "0.000"
+    Returns
+    -------
+    list of str
+        The formula of every derived column
+    """
+    row_values = []
 
     r_force = "C" + str(row_idx)
     r_wspeed = "B" + str(row_idx)
 
     calibrated_windspeed_formula = "=" +\
         r_wspeed + "/" + 'ANEMOMETER_FACTOR'
-    sheet.cell(row_idx, 4, calibrated_windspeed_formula)
-    sheet.cell(row_idx, 4).number_format = "0.000"
+    row_values.append(calibrated_windspeed_formula)
     cal_ws = "D" + str(row_idx)
 
     calibrated_force_formula = "=" + r_force + \
         "/" + 'LOAD_CELL_FACTOR'
-    sheet.cell(row_idx, 5, calibrated_force_formula)
-    sheet.cell(row_idx, 5).number_format = "0.000"
+    row_values.append(calibrated_force_formula)
     cal_force = "E" + str(row_idx)
 
-    force_average_window = 3
+    force_average_window = force_window
     if row_idx - force_average_window >= 1:
         averaged_force_lower_bound = row_idx - force_average_window
     else:
@@ -160,13 +253,12 @@ def process_sheet_row(raw_data, row_idx, sheet):
         cal_force[0] + str(averaged_force_upper_bound)
 
     averaged_force_formula = "=AVERAGE(" + f_bounds + ")"
-    sheet.cell(row_idx, 6, averaged_force_formula)
-    sheet.cell(row_idx, 6).number_format = "0.000"
+    row_values.append(averaged_force_formula)
     av_force = "F" + str(row_idx)
 
     #
 
-    ws_average_window = 0
+    ws_average_window = windspeed_window
     if row_idx - ws_average_window >= 1:
         averaged_ws_lower_bound = row_idx - ws_average_window
     else:
@@ -178,13 +270,11 @@ def process_sheet_row(raw_data, row_idx, sheet):
         cal_ws[0] + str(averaged_ws_upper_bound)
 
     averaged_windspeed_formula = "=AVERAGE(" + ws_bounds + ")"
-    sheet.cell(row_idx, 7, averaged_windspeed_formula)
-    sheet.cell(row_idx, 7).number_format = "0.000"
+    row_values.append(averaged_windspeed_formula)
     av_windspeed = "G" + str(row_idx)
 
     ft_s_windspeed_formula = "=" + av_windspeed + "/0.3048"
-    sheet.cell(row_idx, 8, ft_s_windspeed_formula)
-    sheet.cell(row_idx, 8).number_format = "0.000"
+    row_values.append(ft_s_windspeed_formula)
     av_windspeed_ft_s = "H" + str(row_idx)
 
     target_force_formula = "=(" + av_windspeed_ft_s +\
@@ -192,25 +282,258 @@ def process_sheet_row(raw_data, row_idx, sheet):
         "*" + 'TARGET_DRAG_AREA_FT2' +\
         "*0.5"
 
-    sheet.cell(row_idx, 9, target_force_formula)
-    sheet.cell(row_idx, 9).number_format = "0.000"
+    row_values.append(target_force_formula)
     target_force_lbf = "I" + str(row_idx)
 
     drag_area_formula = "=if(" + av_windspeed_ft_s + "=0, ," +\
         "(2*" + av_force + ")/(" + 'AIR_DENSITY_SLG_FT3' +\
         "*(" + av_windspeed_ft_s + ")^2))"
-    sheet.cell(row_idx, 10, drag_area_formula)
-    sheet.cell(row_idx, 10).number_format = "0.000"
+    row_values.append(drag_area_formula)
     drag_area_ft2 = "J" + str(row_idx)
 
     coeff_of_drag_formula = "=" + drag_area_ft2 +\
         "/" + 'NOM_SA_FT2'
-    sheet.cell(row_idx, 11, coeff_of_drag_formula)
-    sheet.cell(row_idx, 11).number_format = "0.000"
+    row_values.append(coeff_of_drag_formula)
     coeff_of_drag = "K" + str(row_idx)
 
+    return row_values
+
+
+def write_formula_rows(sheet, chunk, first_row=2, force_window=FORCE_AVERAGE_WINDOW,
+                       windspeed_window=WINDSPEED_AVERAGE_WINDOW):
+    """
+    Input consecutive samples into the sheet, with the formulas of data_row_formulas.
+
+    Every derived column of the block is a shared formula, which is only written in full in the
+    first row where its cell references are the same relative to the row. This is at the first
+    row of the block, except for the averaging columns, whose windows are cut off at the top of
+    the sheet. Excel recalculates it exactly as it does the formulas written out in every row.
+
+    Parameters
+    ----------
+    sheet: openpyxl.Worksheet or StreamingSheet
+        The worksheet where the data will be inputted.
+    chunk: tuple of numpy.ndarray
+        The timestamps (s), raw anemometer readings and raw load cell readings of the samples
+    first_row: int=2
+        The sheet row where the first sample is to be inserted
+    force_window, windspeed_window: int
+        The averaging windows, see data_row_formulas
+
+    Returns
+    -------
+    int
+        The index of the row after the last inputted row
+    """
+    row_count = len(chunk[0])
+    if row_count == 0:
+        return first_row
+    last_row = first_row + row_count - 1
+
+    # The first row of every derived column where the formula is no longer cut off
+    shared_rows = [first_row] * len(DERIVED_FORMULA_COLUMNS)
+    shared_rows[DERIVED_FORMULA_COLUMNS.index("F")] = max(first_row, force_window + 1)
+    shared_rows[DERIVED_FORMULA_COLUMNS.index("G")] = max(first_row, windspeed_window + 1)
+
+    for column, shared_row in zip(DERIVED_FORMULA_COLUMNS, shared_rows):
+        if shared_row < last_row:
+            share_formula(sheet, column, shared_row, last_row)
+
+    # The rows up to the last first shared formula hold some formulas in full
+    full_rows = min(max(shared_rows) + 1, last_row + 1) - first_row
+    number_formats = None if isinstance(sheet, StreamingSheet) else column_formats(sheet, 11)
+
+    # The timestamps are written in ms, as in the time column of analysis_engine
+    chunk = (analysis_engine.timestamps_ms(chunk[0]),) + tuple(chunk[1:])
+
+    row_idx = first_row
+    for time_ms, anemometer_raw, load_cell_raw in zip(*(channel[:full_rows].tolist()
+                                                        for channel in chunk)):
+        formulas = data_row_formulas(row_idx, force_window, windspeed_window)
+        row_values = [time_ms, anemometer_raw, load_cell_raw] +\
+            [formula if row_idx <= shared_row else SHARED_FORMULA
+             for formula, shared_row in zip(formulas, shared_rows)]
+        write_data_row(sheet, row_idx, row_values, number_formats)
+        row_idx += 1
+
+    shared = [SHARED_FORMULA] * len(DERIVED_FORMULA_COLUMNS)
+    for time_ms, anemometer_raw, load_cell_raw in zip(*(channel[full_rows:].tolist()
+                                                        for channel in chunk)):
+        write_data_row(sheet, row_idx, [time_ms, anemometer_raw, load_cell_raw] + shared,
+                       number_formats)
+        row_idx += 1
+
+    return row_idx
+
+
+def write_data_row(sheet, row_idx, row_values, number_formats=None):
+    """
+    Input the values of a single data timestamp (row) into the sheet, with the data formatting.
+
+    Parameters
+    ----------
+    sheet: openpyxl.Worksheet or StreamingSheet
+        The worksheet where the data will be inputted. A StreamingSheet is formatted when it is
+        created, and the row is simply appended to it.
+    row_idx: int
+        The index of the target excel sheet row
+    row_values: list or tuple
+        The values (or formulas) of every column of the row
+    number_formats: list=None
+        The number formats of the columns of a regular sheet, as returned by
+        xlsx_export.column_formats. Default is None, which gets them from the sheet.
+    """
+    if isinstance(sheet, StreamingSheet):
+        sheet.append(row_values)
+        return
+
+    if number_formats is None:
+        number_formats = column_formats(sheet, len(row_values))
+
+    for col_idx, value, number_format in zip(range(1, len(row_values) + 1), row_values,
+                                             number_formats):
+        cell = sheet.cell(row_idx, col_idx, value)
+        if value == SHARED_FORMULA:
+            cell.data_type = 'f'
+        if number_format is not None:
+            cell.number_format = number_format
+
+
+def write_value_rows(sheet, columns, first_row=2):
+    """
+    Input natively computed data into the sheet, instead of the formulas of data_row_formulas
+
+    Parameters
+    ----------
+    sheet: openpyxl.Worksheet or StreamingSheet
+        The worksheet where the data will be inputted.
+    columns: daq_log.DaqLog or dict
+        The log with its derived columns, or a chunk of them as returned by
+        analysis_engine.StreamingColumnEngine
+    first_row: int=2
+        The sheet row where the first sample is to be inserted
+
+    Returns
+    -------
+    int
+        The index of the row after the last inputted row
+    """
+    number_formats = None if isinstance(sheet, StreamingSheet) else column_formats(sheet, 11)
+
+    row_idx = first_row
+    for row in analysis_engine.column_rows(columns):
+        write_data_row(sheet, row_idx, row, number_formats)
+        row_idx += 1
+
+    return row_idx
+
+
+def create_plot_table(plot_sheet, columns, max_points, methods=None):
+    """
+    Write a decimated copy of the chart series into a separate plot sheet.
+
+    Charts of long logs plot every sample and become very slow to open and scroll, so each
+    series is reduced to at most max_points points with a shape-preserving method, see
+    chart_decimation. Since every series keeps different samples, each of them gets its own
+    pair of time and value columns. The full-resolution data is left untouched.
+
+    Parameters
+    ----------
+    plot_sheet: openpyxl.Worksheet or StreamingSheet
+        The empty sheet where the table is written
+    columns: daq_log.DaqLog
+        The log with its derived columns, as returned by analysis_columns
+    max_points: int
+        The maximum number of points of every decimated series
+    methods: dict=None
+        The decimation method of each series, keyed by its column key (see MAIN_CHART_SERIES
+        and DRAG_AREA_CHART_SERIES), with chart_decimation.DECIMATION_LTTB for the others.
+        Series with chart_decimation.DECIMATION_NONE are not decimated, and are still plotted
+        from the data sheet.
+
+    Returns
+    -------
+    dict
+        The (time column, value column, number of points) of every decimated series in the plot
+        sheet, keyed by its column key. This is the plot_layout of create_graphs.
+    """
+    if methods is None:
+        methods = {}
+
+    time_ms = columns['time_ms']
+
+    header = []
+    table_columns = []
+    plot_layout = {}
+    for key, _, title in MAIN_CHART_SERIES + DRAG_AREA_CHART_SERIES:
+        method = methods.get(key, chart_decimation.DECIMATION_LTTB)
+        if method == chart_decimation.DECIMATION_NONE:
+            continue
+
+        indices = chart_decimation.decimate(time_ms, columns[key], max_points, method)
+        plot_layout[key] = (len(header) + 1, len(header) + 2, len(indices))
+        header += [title + " Time (ms)", title]
+        table_columns += [time_ms[indices].tolist(), columns[key][indices].tolist()]
+
+    plot_sheet.append(header)
+    for row in itertools.zip_longest(*table_columns):
+        plot_sheet.append(row)
+
+    return plot_layout
+
+
+def add_plot_sheet(workbook, title, columns, max_points, methods=None):
+    """
+    Create a hidden sheet with the decimated plot table of a log, see create_plot_table.
+
+    Parameters
+    ----------
+    workbook: openpyxl.Workbook or StreamingWorkbook
+        The workbook where the sheet is created
+    title: str
+        The title of the sheet, which is shortened to the 31 characters allowed by excel
+    columns, max_points, methods:
+        See create_plot_table
+
+    Returns
+    -------
+    tuple of (openpyxl.Worksheet or StreamingSheet, dict)
+        The plot sheet and the location of the series in it, as taken by create_graphs
+    """
+    plot_sheet = create_sheet(workbook, title[:31])
+    plot_sheet.sheet_state = 'hidden'
+
+    return plot_sheet, create_plot_table(plot_sheet, columns, max_points, methods)
+
+
+def create_chart_series(key, data_col, title, data_sheet, max_idx, plot_sheet, plot_layout):
+    """
+    Create a chart series, from the plot table if it was decimated and from the data otherwise.
+
+    Parameters
+    ----------
+    key, data_col, title:
+        The column key, data sheet column and title of the series, see MAIN_CHART_SERIES
+    data_sheet, max_idx, plot_sheet, plot_layout:
+        See create_graphs
 
-def create_graphs(data_sheet, output_sheet, max_idx):
+    Returns
+    -------
+    openpyxl.chart.Series
+        The series, with the times as x values
+    """
+    if key in plot_layout:
+        x_col, y_col, point_count = plot_layout[key]
+        x_data = Reference(plot_sheet, min_col=x_col, min_row=2, max_row=point_count + 1)
+        y_data = Reference(plot_sheet, min_col=y_col, min_row=2, max_row=point_count + 1)
+    else:
+        x_data = Reference(data_sheet, min_col=1, min_row=2, max_row=max_idx)
+        y_data = Reference(data_sheet, min_col=data_col, min_row=2, max_row=max_idx)
+
+    return Series(y_data, xvalues=x_data, title=title)
+
+
+def create_graphs(data_sheet, output_sheet, max_idx, plot_sheet=None, plot_layout=None):
     """
     Create graphs from the data.
 
@@ -219,52 +542,43 @@ def create_graphs(data_sheet, output_sheet, max_idx):
 
     Parameters
     ----------
-    data_sheet: openpyxl.Worksheet
+    data_sheet: openpyxl.Worksheet or StreamingSheet
         The sheet where the data is located
-    output_sheet: openpyxl.Worksheet
+    output_sheet: openpyxl.Worksheet or StreamingSheet
         The sheet where the graph should be located
     max_idx: int
         The maximum shreadsheet row where the data is
+    plot_sheet: openpyxl.Worksheet or StreamingSheet
+        The sheet with the decimated plot table, see create_plot_table. Default is None.
+    plot_layout: dict
+        The location of the decimated series in the plot sheet, as returned by create_plot_table.
+        The series which are not in it are plotted from the data sheet. Default is None.
     """
+    if plot_layout is None:
+        plot_layout = {}
 
     chart = ScatterChart()
     drag_area_chart = ScatterChart()
     #chart.style = 13
-    time_data = Reference(data_sheet, min_col=1, min_row=2, max_row=max_idx)
-    wind_data = Reference(data_sheet, min_col=2, min_row=2, max_row=max_idx)
-    force_data = Reference(data_sheet, min_col=3, min_row=2, max_row=max_idx)
-    cal_wind_data = Reference(data_sheet, min_col=4,
-                              min_row=2, max_row=max_idx)
-    av_force_data = Reference(data_sheet, min_col=6,
-                              min_row=2, max_row=max_idx)
-    target_force_data = Reference(
-        data_sheet, min_col=9, min_row=2, max_row=max_idx)
-    drag_area_data = Reference(
-        data_sheet, min_col=10, min_row=2, max_row=max_idx)
-
-    wind_series = Series(wind_data, xvalues=time_data, title="Raw Windspeed")
-    force_series = Series(force_data, xvalues=time_data, title="Raw Force")
-    cal_wind_series = Series(cal_wind_data, xvalues=time_data,
-                             title="Calibrated Windspeed")
-    av_force_series = Series(av_force_data, xvalues=time_data,
-                             title="Averaged Force")
-    target_force_series = Series(target_force_data, xvalues=time_data,
-                                 title="Target Force")
-    drag_area_series = Series(drag_area_data, xvalues=time_data,
-                              title="Drag Area")
-
-    chart.append(wind_series)
-    chart.append(force_series)
-    chart.append(cal_wind_series)
-    chart.append(av_force_series)
-    chart.append(target_force_series)
-
-    drag_area_chart.append(drag_area_series)
+
+    for key, data_col, title in MAIN_CHART_SERIES:
+        chart.append(create_chart_series(key, data_col, title, data_sheet, max_idx,
+                                         plot_sheet, plot_layout))
+
+    for key, data_col, title in DRAG_AREA_CHART_SERIES:
+        drag_area_chart.append(create_chart_series(key, data_col, title, data_sheet, max_idx,
+                                                   plot_sheet, plot_layout))
+
+    if isinstance(data_sheet, StreamingSheet):
+        # The cells of a streaming sheet cannot be read back, but it remembers its last row
+        max_time = data_sheet.last_row[0]
+    else:
+        max_time = data_sheet.cell(max_idx - 1, 1).value
 
     if DEBUG_MODE_VERBOSE:
-        print(data_sheet.cell(max_idx - 1, 1).value)
+        print(max_time)
 
-    chart.x_axis.scaling.max = data_sheet.cell(max_idx - 1, 1).value
+    chart.x_axis.scaling.max = max_time
     chart.x_axis.scaling.min = 0
     chart.height = 10
     chart.width = 30
@@ -272,7 +586,7 @@ def create_graphs(data_sheet, output_sheet, max_idx):
 
     chart.y_axis.axId = 200
 
-    drag_area_chart.x_axis.scaling.max = data_sheet.cell(max_idx - 1, 1).value
+    drag_area_chart.x_axis.scaling.max = max_time
     drag_area_chart.x_axis.scaling.min = 0
     drag_area_chart.height = 10
     drag_area_chart.width = 40
@@ -291,24 +605,6 @@ def create_graphs(data_sheet, output_sheet, max_idx):
         output_sheet.add_chart(drag_area_chart, 'B2')
 
 
-def simple_filter(raw_data):  # to be expanded later
-    """
-    Dummy filter function for sifting through data, currently just returns True.
-
-    Parameters
-    ----------
-    raw_data: array of float-like str
-        The data based on which the filtering will occur.
-
-    Returns
-    -------
-    bool
-        True if data passes the filter criteria, False otherwise.
-
-    """
-    return True
-
-
 def create_averageifs_formula(sheet_name, range_end):
     """
     Parameters
@@ -354,25 +650,37 @@ def create_averageifs_formula(sheet_name, range_end):
     return formula
 
 
-def create_meta_analysis(target_workbook, target_worksheet):
+def create_meta_analysis(target_workbook, target_worksheet, run_statistics=None):
     """
     Creates a meta-analysis of the data in a single-file output docuemnt.
 
+    Every data sheet gets a row with its AVERAGEIFS formula of the drag area, which is kept for
+    traceability, followed by the natively computed statistics of its run. These are values, so
+    they are known without the spreadsheet having to be recalculated.
+
     Parameters
     ----------
-    target_workbook: openpyxl.Workbook
+    target_workbook: openpyxl.Workbook or StreamingWorkbook
         The workbook object containing all created worksheets 
-    target_worksheet: openpyxl.Worksheet
-        The sheet where the meta-analysis should be performed
+    target_worksheet: openpyxl.Worksheet or StreamingSheet
+        The sheet where the meta-analysis should be performed. It must still be empty, since the
+        results are appended to it.
+    run_statistics: dict
+        The statistics of the runs (see analysis_engine.summarize_run), keyed by the title of
+        their data sheet. Sheets without statistics, such as those already in a workbook that
+        is updated, only get the formula. Default is None.
     """
+    if run_statistics is None:
+        run_statistics = {}
 
     all_sheetnames = target_workbook.sheetnames
 
-    row_index = 2
+    target_worksheet.append(["Sheet", "Rows", "Mean Drag Area [CdSo] (ft^2) (formula)"] +
+                            [title for _, title in META_ANALYSIS_STATISTICS])
 
     # Sheets that are excluded from the meta-analysis
     name_blacklist = ['Constants', 'README',
-                      'Graphs', "Sheet", "META-ANALYSIS"]
+                      'Graphs', "Sheet", "META-ANALYSIS", "RUNS"]
     for idx in range(len(name_blacklist)):
         name_blacklist[idx] = name_blacklist[idx].upper()
 
@@ -381,27 +689,594 @@ def create_meta_analysis(target_workbook, target_worksheet):
         print(name_blacklist)
 
     for itm in all_sheetnames:
-        if not (itm.upper() in name_blacklist):
-            target_worksheet.cell(row_index, 1, itm)
+        # Hidden sheets only hold the plot tables of the charts
+        if not (itm.upper() in name_blacklist) and\
+                target_workbook[itm].sheet_state != 'hidden':
+            worksheet_end = target_workbook[itm].max_row
 
-            worksheet_dims = target_workbook[itm].calculate_dimension()
-            worksheet_end_str = worksheet_dims.split(':')[-1]
-            worksheet_end = int(
-                "".join(filter(str.isdigit, worksheet_end_str)))
-
-            target_worksheet.cell(row_index, 2, worksheet_end)
             average_formula = create_averageifs_formula(
                 quote(target_workbook[itm].title), worksheet_end)
-            target_worksheet.cell(row_index, 3, average_formula)
 
-            row_index += 1
+            row = [itm, worksheet_end, average_formula]
+            if itm in run_statistics:
+                row += [run_statistics[itm][key] for key, _ in META_ANALYSIS_STATISTICS]
+            target_worksheet.append(row)
+
+
+def previous_meta_analysis(meta_analysis_sheet):
+    """
+    Read the statistics of an existing meta-analysis, see create_meta_analysis.
+
+    Parameters
+    ----------
+    meta_analysis_sheet: openpyxl.Worksheet
+        The meta-analysis of a workbook that is updated
+
+    Returns
+    -------
+    dict
+        The statistics in META_ANALYSIS_STATISTICS of every sheet, keyed by its title. Sheets
+        which only have the formula, such as those of a workbook created before the statistics
+        were computed natively, are left out.
+    """
+    keys = [key for key, _ in META_ANALYSIS_STATISTICS]
+
+    return {row[0]: dict(zip(keys, row[3:]))
+            for row in meta_analysis_sheet.iter_rows(min_row=2, values_only=True)
+            if len(row) >= 3 + len(keys) and any(value is not None for value in row[3:])}
+
+
+def create_run_table(target_worksheet, runs_by_sheet, previous_rows=None):
+    """
+    List every run found by analysis_engine.segment_runs, one row per run.
+
+    Parameters
+    ----------
+    target_worksheet: openpyxl.Worksheet or StreamingSheet
+        The sheet where the table is written. It must still be empty, since the rows are
+        appended to it.
+    runs_by_sheet: dict
+        The runs of every log, keyed by the title of its data sheet
+    previous_rows: list of tuple
+        Rows of an earlier run table which are kept before the new ones, such as those of the
+        sheets already in a workbook that is updated. Default is None.
+    """
+    target_worksheet.append(["Sheet", "Run"] + [title for _, title in RUN_TABLE_COLUMNS] +
+                            ["First Row", "Last Row"])
+
+    for row in previous_rows or []:
+        target_worksheet.append(row)
+
+    for sheet_title, runs in runs_by_sheet.items():
+        for run_idx, run in enumerate(runs, 1):
+            # The data starts on the second row of the data sheet
+            target_worksheet.append([sheet_title, run_idx] +
+                                    [run[key] for key, _ in RUN_TABLE_COLUMNS] +
+                                    [run['start_idx'] + 2, run['end_idx'] + 1])
+
+
+def create_comparison_sheet(workbook, comparison):
+    """
+    Write a comparison of aligned logs into a sheet, with an overlay chart of every channel.
+
+    Parameters
+    ----------
+    workbook: openpyxl.Workbook or StreamingWorkbook
+        The workbook where the "Comparison" sheet is created
+    comparison: dict
+        The comparison, as returned by log_alignment.align_logs
+
+    Returns
+    -------
+    openpyxl.Worksheet or StreamingSheet
+        The sheet, with the time and every channel of every log in its columns
+    """
+    columns, keys, titles = log_alignment.comparison_table(comparison)
+    sheet = create_sheet(workbook, "Comparison", space_depth=1)
+
+    sheet.append(titles)
+    for row in zip(*(columns[key].tolist() for key in keys)):
+        # The times where a log has no samples are left empty, NaN not being valid in excel
+        sheet.append([None if value != value else value for value in row])
+
+    max_row = len(comparison['time_s']) + 1
+    log_count = len(comparison['labels'])
+    x_data = Reference(sheet, min_col=1, min_row=2, max_row=max_row)
+    for channel_idx, (_, title) in enumerate(log_alignment.COMPARISON_CHANNELS):
+        chart = ScatterChart()
+        chart.title = title
+        chart.x_axis.title = "Time (s)"
+        chart.height = 10
+        chart.width = 30
+
+        for log_idx in range(log_count):
+            y_data = Reference(sheet, min_col=2 + channel_idx * log_count + log_idx, min_row=1,
+                               max_row=max_row)
+            chart.append(Series(y_data, xvalues=x_data, title_from_data=True))
+
+        sheet.add_chart(chart, get_column_letter(len(keys) + 2) + str(1 + 20 * channel_idx))
+
+    return sheet
+
+
+def iter_data_chunks(csv_path, columnar_dtype=None, pipeline=None):
+    """
+    Stream the processed samples of a DAQ log in chunks.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data, including the extension
+    columnar_dtype: str=None
+        If given, the samples are read from a memory-mapped columnar version of the csv with
+        readings of this dtype ('float64' or 'float32'), which is created next to the csv the
+        first time and whenever the csv changes. Default is None, which parses the csv.
+    pipeline: signal_filters.FilterPipeline=None
+        Which samples are rejected and how the readings are filtered. Default is None, which
+        keeps the samples as they are.
+
+    Returns
+    -------
+    iterator of tuple of numpy.ndarray
+        The timestamps (s), anemometer readings (m/s) and load cell readings (lbf) of each chunk
+    """
+    return daq_log.iter_log_chunks(csv_path, columnar_dtype, pipeline)
+
+
+def load_data(csv_path, output_mode=OUTPUT_MODE_FORMULAS, cache=None, columnar_dtype=None,
+              instrumentation=INSTRUMENTATION_DISABLED, pipeline=None, run_segmentation=None):
+    """
+    Read the DAQ csv and prepare all of its data for the data sheet, without writing anything.
+
+    This is the part of the analysis which does not depend on the workbook, so that it can be
+    done in a separate process. The result can be passed to populate_data_sheet.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data, including the extension
+    output_mode: str
+        If OUTPUT_MODE_VALUES, all of the columns are computed. Otherwise only the filtered
+        raw data is read, since the formulas are created as the rows are written.
+    cache: result_cache.ResultCache=None
+        If given, the data and its summary are taken from the cache when the same csv has
+        already been loaded with the same analysis parameters, and added to it otherwise.
+        Default is None.
+    columnar_dtype: str=None
+        Whether the samples are read from a columnar file, see iter_data_chunks
+    instrumentation: instrumentation.Instrumentation
+        Where the loading is measured, as the load_data stage. Default is disabled.
+    pipeline: signal_filters.FilterPipeline=None
+        The processing of the samples, see iter_data_chunks. Default is None, which keeps the
+        samples as they are.
+    run_segmentation: dict=None
+        The parameters of the run segmentation of the cached summary, see run_summary. Default
+        is None.
+
+    Returns
+    -------
+    daq_log.DaqLog
+        The log, whose derived columns are only computed for OUTPUT_MODE_VALUES, and whose
+        summary is known when it went through the cache
+    """
+    if pipeline is None:
+        pipeline = signal_filters.DEFAULT_PIPELINE
+
+    with instrumentation.stage('load_data', csv_path) as record:
+        if cache is not None:
+            cache_key = cache.key(csv_path, result_cache.analysis_parameters(
+                output_mode, columnar_dtype=columnar_dtype, pipeline=pipeline,
+                run_segmentation=run_segmentation))
+            cached = cache.load(cache_key)
+            if cached is not None:
+                record['rows'] = cached[1]['row_count']
+                log = daq_log.DaqLog.from_columns(cached[0], csv_path)
+                log.summary = cached[1]
+                return log
+
+        log = daq_log.read_log(csv_path, columnar_dtype, pipeline)
+        if output_mode == OUTPUT_MODE_VALUES:
+            log.derive(pipeline)
+
+        if cache is not None:
+            # Only the columns of the output mode are cached, along with the whole summary
+            columns = dict(log)
+            log.summary = run_summary(log.derive(pipeline), run_segmentation)
+            cache.store(cache_key, columns, log.summary)
+
+        record['rows'] = len(log)
+        return log
+
+
+def analysis_columns(csv_path, data=None, cache=None, columnar_dtype=None, pipeline=None):
+    """
+    Get all computed columns of a log, for the statistics and charts that are computed natively.
+
+    Parameters
+    ----------
+    csv_path: path-format str
+        The path of the csv data, including the extension
+    data: daq_log.DaqLog
+        The log as already loaded by load_data, in which case the csv is not read again, and its
+        derived columns are computed unless they already are. Default is None.
+    cache, columnar_dtype, pipeline:
+        See load_data
+
+    Returns
+    -------
+    daq_log.DaqLog
+        The log with its derived columns, which are indexed by the names in
+        analysis_engine.COLUMN_KEYS
+    """
+    if data is None:
+        return load_data(csv_path, OUTPUT_MODE_VALUES, cache, columnar_dtype, pipeline=pipeline)
+
+    return data.derive(pipeline)
+
+
+def run_summary(columns, run_segmentation=None):
+    """
+    Summarize a log, see analysis_engine.summarize_log.
+
+    Parameters
+    ----------
+    columns: daq_log.DaqLog
+        The log as returned by analysis_columns
+    run_segmentation: dict
+        Keyword arguments of analysis_engine.segment_runs. Default is None, which uses the
+        default parameters.
+
+    Returns
+    -------
+    dict
+        The statistics of analysis_engine.summarize_run, along with the list of runs of
+        analysis_engine.segment_runs under 'runs', their number under 'run_count' and the number
+        of samples of the log under 'row_count'
+    """
+    return analysis_engine.summarize_log(columns, run_segmentation)
+
+
+def populate_data_sheet(ws_data, csv_path, output_mode=OUTPUT_MODE_FORMULAS, data=None,
+                        columnar_dtype=None, pipeline=None, column_sinks=()):
+    """
+    Read the DAQ csv and input all of its data into the data sheet.
+
+    The csv is streamed, so that only a bounded part of it is held in memory at any time and the
+    file is closed as soon as it has been read. The computed columns of every chunk can be
+    handed to other stages of the analysis at the same time, so that the csv is only read once.
+
+    Parameters
+    ----------
+    ws_data: openpyxl.Worksheet
+        The sheet where the data is to be inputted, below the headers
+    csv_path: path-format str
+        The path of the csv data, including the extension
+    output_mode: str
+        OUTPUT_MODE_FORMULAS to input excel formulas for every derived value, or
+        OUTPUT_MODE_VALUES to compute all of the values natively and input them directly.
+        Defaults to formulas.
+    data: daq_log.DaqLog=None
+        The log as already loaded by load_data, in which case the csv is not read again.
+        Default is None.
+    columnar_dtype: str=None
+        Whether the samples are read from a columnar file, see iter_data_chunks
+    pipeline: signal_filters.FilterPipeline=None
+        The processing of the samples and the averaging windows of the formulas, see
+        iter_data_chunks. Default is None, which keeps the samples as they are.
+    column_sinks: list
+        Objects to which the computed columns are appended as they are completed, see
+        stream_columns. Default is none.
+
+    Returns
+    -------
+    int
+        The index of the row after the last inputted row
+    """
+    if pipeline is None:
+        pipeline = signal_filters.DEFAULT_PIPELINE
+
+    if output_mode not in (OUTPUT_MODE_FORMULAS, OUTPUT_MODE_VALUES):
+        raise ValueError("Unknown output mode: " + str(output_mode))
+
+    if data is not None:
+        for sink in column_sinks:
+            sink.append(data.derive(pipeline))
+        if output_mode == OUTPUT_MODE_VALUES:
+            return write_value_rows(ws_data, data.derive(pipeline))
+
+        return write_formula_rows(ws_data, (data.time_s, data.anemometer_raw, data.load_cell_raw),
+                                  2, pipeline.force_window, pipeline.windspeed_window)
+
+    # The formulas are written from the samples, so that the columns are only computed for the
+    # sinks in that mode
+    engine = None
+    if output_mode == OUTPUT_MODE_VALUES or column_sinks:
+        engine = pipeline.column_engine()
+
+    row_idx = 2
+    for chunk in iter_data_chunks(csv_path, columnar_dtype, pipeline):
+        if output_mode == OUTPUT_MODE_FORMULAS:
+            row_idx = write_formula_rows(ws_data, chunk, row_idx, pipeline.force_window,
+                                         pipeline.windspeed_window)
+        if engine is not None:
+            row_idx = _write_columns(ws_data, engine.push(*chunk), row_idx, output_mode,
+                                     column_sinks)
+
+    if engine is not None:
+        row_idx = _write_columns(ws_data, engine.finish(), row_idx, output_mode, column_sinks)
+
+    return row_idx
+
+
+def _write_columns(ws_data, columns, row_idx, output_mode, column_sinks):
+    for sink in column_sinks:
+        sink.append(columns)
+    if output_mode == OUTPUT_MODE_VALUES:
+        return write_value_rows(ws_data, columns, row_idx)
+    return row_idx
+
+
+def stream_columns(chunks, column_sinks, pipeline=None):
+    """
+    Compute the columns of a log that is read in chunks, and hand them over as they are completed.
+
+    Only the chunks that are being computed are held in memory, whatever the length of the log.
+
+    Parameters
+    ----------
+    chunks: iterable of tuple of numpy.ndarray
+        The timestamps (s), anemometer readings (m/s) and load cell readings (lbf) of each chunk,
+        as processed by the pipeline, see iter_data_chunks
+    column_sinks: list
+        Objects with an append(columns) method, such as an analysis_engine.StreamingSummary or an
+        exporters.Exporter, to which the computed columns of consecutive samples are appended
+    pipeline: signal_filters.FilterPipeline=None
+        The pipeline of the averaging windows. Default is None, which uses the default windows.
+
+    Returns
+    -------
+    int
+        The number of samples of the log
+    """
+    if pipeline is None:
+        pipeline = signal_filters.DEFAULT_PIPELINE
+
+    row_count = 0
+    for columns in _iter_columns(pipeline.column_engine(), chunks):
+        for sink in column_sinks:
+            sink.append(columns)
+        row_count += len(columns['time_ms'])
+
+    return row_count
+
+
+def _iter_columns(engine, chunks):
+    for chunk in chunks:
+        yield engine.push(*chunk)
+    yield engine.finish()
+
+
+def column_exporters(stack, export_path, export_formats):
+    """
+    Open an exporter of the computed columns of a log for every selected format other than xlsx.
+
+    Parameters
+    ----------
+    stack: contextlib.ExitStack
+        Where the exporters are entered, so that they are closed along with it
+    export_path: path-format str
+        Where the columns are exported, without the extension of the format
+    export_formats: list of str
+        The selected formats, see exporters.EXPORT_FORMATS
+
+    Returns
+    -------
+    list of exporters.Exporter
+        The exporters, to which the columns are appended, see stream_columns
+    """
+    titles = HeaderManager().header_titles()
+
+    return [stack.enter_context(exporters.EXPORTERS[export_format](
+                export_path, analysis_engine.COLUMN_KEYS,
+                [titles[col_idx] for col_idx in sorted(titles)]))
+            for export_format in export_formats if export_format != exporters.EXPORT_FORMAT_XLSX]
+
+
+def export_columns(export_path, columns, export_formats, instrumentation=INSTRUMENTATION_DISABLED,
+                   target=None):
+    """
+    Export the computed columns of a log in every selected format other than xlsx.
+
+    Parameters
+    ----------
+    export_path: path-format str
+        Where the columns are exported, without the extension of the format
+    columns: daq_log.DaqLog
+        The log as returned by analysis_columns
+    export_formats: list of str
+        The selected formats, see exporters.EXPORT_FORMATS
+    instrumentation: instrumentation.Instrumentation
+        Where every export is measured, as the export_<format> stage. Default is disabled.
+    target: str=None
+        The input path of the log, which the stages are recorded under
+    """
+    titles = HeaderManager().header_titles()
+
+    for export_format in export_formats:
+        if export_format == exporters.EXPORT_FORMAT_XLSX:
+            continue
+
+        with instrumentation.stage('export_' + export_format, target) as record:
+            exporters.export_table(export_format, export_path, columns,
+                                   analysis_engine.COLUMN_KEYS,
+                                   [titles[col_idx] for col_idx in sorted(titles)])
+            record['rows'] = len(columns['time_ms'])
+
+
+def export_meta_analysis(export_path, run_statistics, export_formats):
+    """
+    Export the meta-analysis of every analyzed log in every selected format other than xlsx.
+
+    The table has a row per log, with its name, number of samples and the statistics in
+    META_ANALYSIS_STATISTICS.
+
+    Parameters
+    ----------
+    export_path: path-format str
+        Where the table is exported, without the extension of the format
+    run_statistics: dict
+        The statistics of every log as returned by run_summary, keyed by its input path
+    export_formats: list of str
+        The selected formats, see exporters.EXPORT_FORMATS
+    """
+    keys = ['log', 'row_count'] + [key for key, _ in META_ANALYSIS_STATISTICS]
+    titles = ["Log", "Rows"] + [title for _, title in META_ANALYSIS_STATISTICS]
+    records = [[os.path.basename(target)] + [statistics[key] for key in keys[1:]]
+               for target, statistics in run_statistics.items()]
+
+    for export_format in export_formats:
+        if export_format != exporters.EXPORT_FORMAT_XLSX:
+            exporters.export_records(export_format, export_path, records, keys, titles)
+
+
+def compare_logs(targets, labels, pipeline, columnar_dtype=None,
+                 reference=log_alignment.ALIGN_START, run_segmentation=None,
+                 instrumentation=INSTRUMENTATION_DISABLED, suppress_prints=False):
+    """
+    Align logs on a common time grid, see log_alignment.align_logs.
+
+    Every log is streamed in chunks, so that only its resampled comparison columns are held in
+    memory. Logs that cannot be read are reported and left out.
+
+    Parameters
+    ----------
+    targets: list of str
+        The input paths of the logs, without the extension
+    labels: list of str
+        The label of every log, such as its sheet name
+    pipeline: signal_filters.FilterPipeline
+        The processing of the samples, which must resample them
+    columnar_dtype: str=None
+        Whether the samples are read from a columnar file, see iter_data_chunks
+    reference: str
+        How the logs are aligned, see log_alignment.align_logs. Default is ALIGN_START
+    run_segmentation: dict=None
+        The parameters of the run segmentation, see run_summary. Default is None.
+    instrumentation: instrumentation.Instrumentation
+        Where the streaming of every log is measured, as the aligned_columns stage. Default is
+        disabled.
+    suppress_prints: bool
+        Whether the logs that cannot be read are not reported. Default is False.
+
+    Returns
+    -------
+    dict
+        The comparison of log_alignment.align_logs
+    """
+    logs = {}
+    for target, label in zip(targets, labels):
+        try:
+            with instrumentation.stage('aligned_columns', target) as record:
+                logs[label] = log_alignment.aligned_columns(target + '.csv', pipeline,
+                                                            columnar_dtype)
+                record['rows'] = len(logs[label][0])
+        except Exception as err:
+            if not suppress_prints:
+                print(target + " could not be compared: " + repr(err))
+
+    return log_alignment.align_logs(logs, pipeline.resampler.rate_hz, reference,
+                                    run_segmentation=run_segmentation)
+
+
+def export_comparison(export_path, comparison, export_formats):
+    """
+    Export a comparison of aligned logs in every selected format other than xlsx.
+
+    Parameters
+    ----------
+    export_path: path-format str
+        Where the comparison is exported, without the extension of the format
+    comparison: dict
+        The comparison, as returned by log_alignment.align_logs
+    export_formats: list of str
+        The selected formats, see exporters.EXPORT_FORMATS
+    """
+    columns, keys, titles = log_alignment.comparison_table(comparison)
+
+    for export_format in export_formats:
+        if export_format != exporters.EXPORT_FORMAT_XLSX:
+            exporters.export_table(export_format, export_path, columns, keys, titles)
+
+
+def data_sheet_title(sheetname_prefix, condensed_version=False):
+    """
+    Get the title of the data sheet of a file in a single-file output.
+
+    Parameters
+    ----------
+    sheetname_prefix: str
+        The sheetname of the file
+    condensed_version: bool
+        Whether the single file is in the condensed output version
+
+    Returns
+    -------
+    str
+        The title of the data sheet
+    """
+    if condensed_version:
+        return sheetname_prefix
+    return "Data " + sheetname_prefix
+
+
+def bounded_futures(submit, items, max_pending):
+    """
+    Submit a task for every item in order, with a bounded number of them ahead of their use.
+
+    The task of the next item is submitted as the future of an item is handed out, so that the
+    workers keep going while it is used, but at most max_pending completed results are ever
+    waiting to be used, however many items there are.
+
+    Parameters
+    ----------
+    submit: callable
+        Submits the task of an item, and returns its future
+    items: list
+        The items, in the order in which their results are used
+    max_pending: int
+        How many tasks are submitted ahead, usually the number of workers
+
+    Yields
+    ------
+    tuple
+        Every item and the future of its task, in order
+    """
+    items = iter(items)
+    futures = collections.deque((item, submit(item))
+                                for item in itertools.islice(items, max(max_pending, 1)))
+    while futures:
+        item, future = futures.popleft()
+        for next_item in itertools.islice(items, 1):
+            futures.append((next_item, submit(next_item)))
+        yield item, future
 
 
 def execute_analysis(input_path, output_path,
                      single_file=False,
                      single_workbook=None,
                      sheetname_prefix=None,
-                     condensed_version=False):
+                     condensed_version=False,
+                     output_mode=OUTPUT_MODE_FORMULAS,
+                     write_only=False,
+                     data=None,
+                     cache=None,
+                     columnar_dtype=None,
+                     chart_max_points=0,
+                     chart_methods=None,
+                     run_segmentation=None,
+                     instrumentation=INSTRUMENTATION_DISABLED,
+                     export_formats=(exporters.EXPORT_FORMAT_XLSX,),
+                     pipeline=None):
     """
     Execute a full analysis of a single data set.
 
@@ -417,53 +1292,317 @@ def execute_analysis(input_path, output_path,
     condensed_version: bool
         In the event of a single file output, whether it should be done in a condensed
         output version. This is mostly used for the google drive output.
+    output_mode: str
+        Whether the derived columns are inputted as excel formulas (OUTPUT_MODE_FORMULAS) or as
+        natively computed values (OUTPUT_MODE_VALUES). Defaults to formulas.
+    write_only: bool
+        In the event of a separate output file, whether it is written with the write-only
+        (streaming) backend, see xlsx_export.StreamingWorkbook. A single workbook is written with
+        whichever backend it was created with. Defaults to False.
+    data: daq_log.DaqLog
+        The log as already loaded by load_data, in which case the csv is not read.
+        Defaults to None.
+    cache: result_cache.ResultCache
+        If given, the csv is loaded through the result cache, see load_data. Defaults to None.
+    columnar_dtype: str
+        If given, the samples are read from a memory-mapped columnar version of the csv,
+        see iter_data_chunks. Defaults to None.
+    chart_max_points: int
+        If not 0, the charts plot a decimated copy of the data in a hidden sheet, with at most
+        this many points per series, see create_plot_table. Defaults to 0.
+    chart_methods: dict
+        The decimation method of each chart series, see create_plot_table. Defaults to None.
+    run_segmentation: dict
+        The parameters of the run segmentation, see run_summary. Defaults to None.
+    instrumentation: instrumentation.Instrumentation
+        Where every stage of the analysis is measured, with the input path as the target.
+        Default is disabled.
+    export_formats: list of str
+        The formats in which the analysis is exported, see exporters.EXPORT_FORMATS. The other
+        formats are written next to the output path, with their own extension. Without
+        EXPORT_FORMAT_XLSX, no workbook is created at all. Default is only EXPORT_FORMAT_XLSX.
+    pipeline: signal_filters.FilterPipeline
+        Which samples are rejected, how the readings are filtered, and the averaging windows of
+        the data sheet. Default is None, which keeps the samples as they are, with the default
+        windows.
+
+    Returns
+    -------
+    dict
+        The summary statistics and the runs of the log, see run_summary. In the event of a
+        separate output file, the runs are also listed in its "Runs" sheet.
     """
+    # The log is read once, in whole when the cache or the decimated charts need all of its
+    # columns, and otherwise streamed through every stage of the analysis at the same time
+    xlsx = exporters.EXPORT_FORMAT_XLSX in export_formats
+    if data is None and (cache is not None or (xlsx and chart_max_points)):
+        data = load_data(input_path + '.csv', output_mode, cache, columnar_dtype,
+                         instrumentation, pipeline, run_segmentation)
+
+    export_path = os.path.splitext(output_path)[0]
+    if not xlsx and data is None:
+        with ExitStack() as stack, instrumentation.stage('stream_columns', input_path) as record:
+            summarizer = analysis_engine.StreamingSummary(run_segmentation)
+            record['rows'] = stream_columns(
+                iter_data_chunks(input_path + '.csv', columnar_dtype, pipeline),
+                [summarizer] + column_exporters(stack, export_path, export_formats), pipeline)
+
+        return summarizer.summary()
+
+    if not xlsx:
+        with instrumentation.stage('analysis_columns', input_path) as record:
+            columns = analysis_columns(input_path + '.csv', data, cache, columnar_dtype,
+                                       pipeline)
+            record['rows'] = len(columns['time_ms'])
+
+        with instrumentation.stage('run_summary', input_path) as record:
+            summary = columns.summary or run_summary(columns, run_segmentation)
+            record['rows'] = summary['row_count']
+
+        export_columns(export_path, columns, export_formats, instrumentation, input_path)
+        return summary
 
     if single_workbook:
 
         if not condensed_version:
-            ws_data = single_workbook.create_sheet(
-                title=("Data " + sheetname_prefix))
-            ws_graphs = single_workbook.create_sheet(
-                title=("Graphs " + sheetname_prefix))
+            ws_data = create_sheet(single_workbook, data_sheet_title(sheetname_prefix),
+                                   space_depth=1, number_formats=DATA_SHEET_FORMATS)
+            ws_graphs = create_sheet(single_workbook, "Graphs " + sheetname_prefix)
             ws_data.sheet_view.zoomScale = 70
         else:
-            ws_data = single_workbook.create_sheet(title=(sheetname_prefix))
+            ws_data = create_sheet(single_workbook, data_sheet_title(sheetname_prefix, True),
+                                   space_depth=1, number_formats=DATA_SHEET_FORMATS)
             ws_data.sheet_view.zoomScale = 55
     else:
-        active_wb = WB()
-        ws_data = active_wb.create_sheet(title="Data")
-        ws_consts = active_wb.create_sheet(title="Constants")
-        ws_graphs = active_wb.create_sheet(title="Graphs")
+        active_wb = create_workbook(write_only)
+        ws_data = create_sheet(active_wb, "Data",
+                               space_depth=1, number_formats=DATA_SHEET_FORMATS)
+        ws_consts = create_sheet(active_wb, "Constants", space_depth=10, space_cols=1)
+        ws_graphs = create_sheet(active_wb, "Graphs")
 
-        Consts().create_constants_table(ws_consts)
-        Consts.create_defined_names(active_wb)
+        from constants import SimplifiedConsts as SConsts
+        consts = SConsts(ws_consts, active_wb)
 
     HeaderManager().create_headers(ws_data)
 
-    csvfile = open(input_path + '.csv', newline='')
-    csvreader = csv.reader(csvfile, delimiter=',')
-
-    row_idx = 1
-    for row in list(csvreader):
-        if row_idx > 1:
-            if simple_filter(row):  # Data Filtering
-                process_sheet_row(row, row_idx, ws_data)
-            else:
-                row_idx -= 1
-
-        row_idx += 1
+    summarizer = None
+    with ExitStack() as stack:
+        column_sinks = []
+        if data is None:
+            summarizer = analysis_engine.StreamingSummary(run_segmentation)
+            column_sinks = [summarizer] + column_exporters(stack, export_path, export_formats)
+
+        with instrumentation.stage('populate_data_sheet', input_path) as record:
+            row_idx = populate_data_sheet(ws_data, input_path + '.csv', output_mode, data,
+                                          columnar_dtype, pipeline, column_sinks)
+            record['rows'] = row_idx - 2
+
+    columns = None
+    if data is not None:
+        with instrumentation.stage('analysis_columns', input_path) as record:
+            columns = analysis_columns(input_path + '.csv', data, cache, columnar_dtype,
+                                       pipeline)
+            columns.sheetname = ws_data.title
+            record['rows'] = row_idx - 2
+
+        export_columns(export_path, columns, export_formats, instrumentation, input_path)
+
+    plot_sheet, plot_layout = None, None
+    with instrumentation.stage('create_graphs', input_path):
+        if chart_max_points:
+            plot_sheet, plot_layout = add_plot_sheet(
+                single_workbook or active_wb,
+                "Plot " + sheetname_prefix if single_workbook else "Plot",
+                columns, chart_max_points, chart_methods)
+
+        if condensed_version:
+            create_graphs(ws_data, None, row_idx, plot_sheet, plot_layout)
+        else:
+            create_graphs(ws_data, ws_graphs, row_idx, plot_sheet, plot_layout)
 
-    if condensed_version:
-        create_graphs(ws_data, None, row_idx)
-    else:
-        create_graphs(ws_data, ws_graphs, row_idx)
+    with instrumentation.stage('space_columns', input_path):
+        space_columns(ws_data, 1)
 
-    space_columns(ws_data, 1)
+    with instrumentation.stage('run_summary', input_path) as record:
+        if summarizer is not None:
+            summary = summarizer.summary()
+        else:
+            summary = columns.summary or run_summary(columns, run_segmentation)
+        record['rows'] = row_idx - 2
 
     if not single_workbook:
+        ws_runs = create_sheet(active_wb, "Runs", space_depth=1)
+        create_run_table(ws_runs, {"Data": summary['runs']})
+
+        space_columns(ws_runs, 1)
         space_columns(ws_consts, 10, 1)
-        active_wb.save(output_path)
+
+        with instrumentation.stage('save', input_path) as record:
+            save_workbook(active_wb, output_path)
+            record['rows'] = row_idx - 2
+
+    return summary
+
+
+def shard_path(output_path, shard_idx):
+    """Get the path of a shard of a single output file, numbered from 1."""
+    base, extension = os.path.splitext(output_path)
+    return base + SHARD_SUFFIX + str(shard_idx) + extension
+
+
+def plan_shards(csv_paths, max_rows=0, max_bytes=0, output_mode=OUTPUT_MODE_FORMULAS):
+    """
+    Split the logs of a single output file into shards that fit a budget.
+
+    Every shard holds the next logs in order for as long as they fit, and a log that exceeds
+    the budget on its own gets a shard to itself. The rows of a log are the lines of its csv
+    (see daq_io.count_daq_lines), and its bytes the estimated size of its data sheet (see
+    SHARD_BYTES_PER_CSV_BYTE). Logs which do not exist count as empty.
+
+    Parameters
+    ----------
+    csv_paths: list of path-format str
+        The csv of every log, including the extension
+    max_rows: int
+        The maximum number of data rows of a shard. Default is 0, which has no limit.
+    max_bytes: int
+        The maximum estimated size (bytes) of a shard. Default is 0, which has no limit.
+    output_mode: str
+        The output mode of the data sheets. Defaults to formulas.
+
+    Returns
+    -------
+    list of list of int
+        The indices of the logs of every shard
+    """
+    shards = []
+    shard_rows, shard_bytes = 0, 0
+    for idx, csv_path in enumerate(csv_paths):
+        log_rows, log_bytes = 0, 0
+        if os.path.exists(csv_path):
+            if max_rows:
+                log_rows = daq_io.count_daq_lines(csv_path)
+            log_bytes = os.path.getsize(csv_path) * SHARD_BYTES_PER_CSV_BYTE[output_mode]
+
+        if shards and (not max_rows or shard_rows + log_rows <= max_rows) and\
+                (not max_bytes or shard_bytes + log_bytes <= max_bytes):
+            shards[-1].append(idx)
+            shard_rows += log_rows
+            shard_bytes += log_bytes
+        else:
+            shards.append([idx])
+            shard_rows, shard_bytes = log_rows, log_bytes
+
+    return shards
+
+
+def write_shard(output_path, targets, options, cache=None, condensed_version=False,
+                instrumentation=INSTRUMENTATION_DISABLED):
+    """
+    Analyze logs into a workbook of their own, laid out as a single output file.
+
+    The workbook gets its own Constants sheet and defined names, so that its formulas and
+    meta-analysis do not depend on any other workbook. Shards of the same analysis can therefore
+    be written at the same time, each in its own process.
+
+    Parameters
+    ----------
+    output_path: path-format str
+        The path where the workbook is saved
+    targets: list of tuple
+        The input path (without the extension) and sheetname of every log, in order
+    options: dict
+        The options of the analysis, see analysis_options
+    cache: result_cache.ResultCache
+        If given, the csv files are loaded through the result cache, see load_data.
+        Defaults to None.
+    condensed_version: bool
+        Whether the data and graphs of every log share a sheet, see execute_analysis.
+        Defaults to False.
+    instrumentation: instrumentation.Instrumentation
+        Where every stage of the analysis is measured. Default is disabled.
+
+    Returns
+    -------
+    dict
+        The summary statistics and runs of every log (see run_summary), keyed by its input path
+    """
+    workbook = create_workbook(options['write_only'])
+    ws_consts = create_sheet(workbook, "Constants", space_depth=12, space_cols=1)
+
+    from constants import SimplifiedConsts as SConsts
+    SConsts(ws_consts, workbook)
+
+    ws_meta_analysis = create_sheet(workbook, "Meta-Analysis")
+    ws_runs = create_sheet(workbook, "Runs", space_depth=1)
+    space_columns(ws_consts, 12, 1)
+
+    run_statistics = {}
+    sheet_statistics = {}
+    for target, sheetname in targets:
+        run_statistics[target] = execute_analysis(target,
+                                                  output_path=target + '___analyzed.xlsx',
+                                                  single_file=True,
+                                                  single_workbook=workbook,
+                                                  sheetname_prefix=sheetname,
+                                                  condensed_version=condensed_version,
+                                                  cache=cache,
+                                                  instrumentation=instrumentation,
+                                                  **options)
+        sheet_statistics[data_sheet_title(sheetname, condensed_version)] = run_statistics[target]
+
+    with instrumentation.stage('meta_analysis', output_path):
+        create_meta_analysis(workbook, ws_meta_analysis, sheet_statistics)
+        create_run_table(ws_runs, {sheet_title: statistics['runs'] for sheet_title, statistics
+                                   in sheet_statistics.items()})
+        space_columns(ws_runs, 1)
+
+    with instrumentation.stage('save', output_path):
+        save_workbook(workbook, output_path)
+
+    return run_statistics
+
+
+def create_shard_index(workbook, shard_statistics, link_directory=None):
+    """
+    Create the combined meta-analysis and run table of the shards of a single output file.
+
+    The statistics are values, since formulas can only refer to the data sheets of other
+    workbooks while those are open. Every sheet links to its data sheet in its shard.
+
+    Parameters
+    ----------
+    workbook: openpyxl.Workbook or StreamingWorkbook
+        The index workbook, where the "Meta-Analysis" and "Runs" sheets are added
+    shard_statistics: list of tuple
+        The path of every shard, and the statistics of its logs (see run_summary) keyed by the
+        title of their data sheet
+    link_directory: path-format str=None
+        The directory of the index, which the shards are named and linked relative to. Default
+        is None, which expects the shards to be in the same directory as the index.
+    """
+    ws_meta_analysis = create_sheet(workbook, "Meta-Analysis")
+    ws_runs = create_sheet(workbook, "Runs", space_depth=1)
+
+    # The rows are the last row of every data sheet, as in the meta-analysis of each shard
+    ws_meta_analysis.append(["Workbook", "Sheet", "Rows"] +
+                            [title for _, title in META_ANALYSIS_STATISTICS])
+
+    runs_by_sheet = {}
+    for path, sheet_statistics in shard_statistics:
+        if link_directory is None:
+            workbook_name = os.path.basename(path)
+        else:
+            workbook_name = os.path.relpath(os.path.abspath(path), link_directory)
+        for sheet_title, statistics in sheet_statistics.items():
+            link = ('=HYPERLINK("' + workbook_name + '#' + quote(sheet_title) + '!A1", "' +
+                    sheet_title.replace('"', '""') + '")')
+            ws_meta_analysis.append([workbook_name, link, statistics['row_count'] + 1] +
+                                    [statistics[key] for key, _ in META_ANALYSIS_STATISTICS])
+            runs_by_sheet[sheet_title] = statistics['runs']
+
+    create_run_table(ws_runs, runs_by_sheet)
+    space_columns(ws_runs, 1)
 
 
 def execute_complete_analysis(config):
@@ -490,7 +1629,276 @@ def execute_complete_analysis(config):
          11. CONDENSED_EXPORT_VERSION : bool : Whether the single file is condensed or not. This is
                  particularly useful for google drive exports (Recommended True).
          12. SUPPRESS_ALL_PRINTS: bool : Whether all print statements are supressed or not 
+         13. OUTPUT_MODE: string : Optional. 'formulas' to export excel formulas for all derived
+                 columns, or 'values' to compute them natively, which does not require the
+                 spreadsheet to be recalculated. Defaults to 'formulas'.
+         14. WRITE_ONLY_EXPORT: bool : Optional. Whether the workbooks are streamed to disk as
+                 they are written, which keeps the memory use low for large logs.
+                 Defaults to False.
+         15. WORKERS: int : Optional. How many processes analyze the files of the hitlist in
+                 parallel. A file that fails to be analyzed is then reported and skipped,
+                 without stopping the others, and in a single output file at most this many
+                 loaded files wait to be written. Defaults to 1, which analyzes them one at a
+                 time.
+         16. USE_CACHE: bool : Optional. Whether the results of unchanged csv files are reused from
+                 previous runs with the same analysis parameters. Defaults to False.
+         17. CACHE_DIRECTORY: string : Optional. Where the cached results are stored. Defaults to
+                 a '.analysis_cache' folder in the FILE_SUBDIRECTORY.
+         18. CACHE_MAX_BYTES: int : Optional. The size above which the least recently used
+                 cached results are removed. Defaults to 1 GiB.
+         19. INCREMENTAL_UPDATE: bool : Optional. If a single output file already exists, whether
+                 it is updated with only the files of the hitlist that it does not contain yet,
+                 instead of being regenerated. Its meta-analysis is always rebuilt. The update is
+                 never done in write-only mode, since the existing workbook must be loaded.
+                 Defaults to False.
+         20. COLUMNAR_CACHE: bool : Optional. Whether every csv is converted once to a binary
+                 columnar file next to it, which later runs memory-map instead of parsing the csv.
+                 It is regenerated whenever the csv changes. Defaults to False.
+         21. COLUMNAR_DTYPE: string : Optional. 'float64' or 'float32', the type in which the
+                 readings are stored in the columnar files. Defaults to 'float64'.
+         22. CHART_MAX_POINTS: int : Optional. If not 0, the charts of long logs plot a decimated
+                 copy of every series with at most this many points, which is kept in a hidden
+                 sheet, while the data sheet keeps the full data. Defaults to 0.
+         23. CHART_DECIMATION: dict : Optional. The decimation method of each chart series:
+                 'lttb' (largest triangle three buckets), 'minmax' (minimum and maximum of every
+                 bucket) or 'none' (plotted from the full data). The keys are anemometer_raw,
+                 load_cell_raw, anemometer_calibrated, load_cell_averaged, target_force and
+                 drag_area, and series which are not given use 'lttb'. Defaults to {}.
+         24. RUN_HYSTERESIS: float : Optional. The fraction by which WINDSPEED_THRESHOLD and
+                 FORCE_THRESHOLD are reduced for a run to end, once it has started.
+                 Defaults to 0.2.
+         25. RUN_MIN_DURATION_S: float : Optional. Shorter runs (s) are ignored, such as single
+                 spikes of the load cell. Defaults to 1.0.
+         26. RUN_DEBOUNCE_S: float : Optional. Runs separated by a shorter gap (s) are merged
+                 into one. Defaults to 0.5.
+         27. INSTRUMENTATION: list : Optional. Where the wall time, CPU time, rows and peak
+                 memory of every stage of the analysis are reported: 'log' logs every stage as
+                 a json line to the 'truck_test_rapid_analyzer' logger, and 'json' writes them
+                 all to a report file at the end. Defaults to [], which measures nothing.
+         28. INSTRUMENTATION_REPORT_PATH: string : Optional. Where the 'json' report is written.
+                 Defaults to 'analysis_report.json' in the FILE_SUBDIRECTORY.
+         29. INSTRUMENTATION_CALLBACK: callable : Optional. Called with the record (dict) of
+                 every stage, in addition to the INSTRUMENTATION sinks. Defaults to None.
+         30. EXPORT_FORMAT: string or list : Optional. The formats in which the analysis is
+                 exported: 'xlsx' for the workbooks, and 'csv', 'npz' (numpy archive) or
+                 'columnar' (a directory with a raw binary file per column) for the computed
+                 columns of every log, written next to it with its own extension, along with a
+                 'meta_analysis' table of all logs in the FILE_SUBDIRECTORY. Without 'xlsx', no
+                 workbook is created at all. Defaults to 'xlsx'.
+         31. FORCE_AVERAGE_WINDOW: int : Optional. How many samples on each side of a sample
+                 are averaged into its force, see analysis_engine.compute_derived_columns.
+                 Defaults to 3.
+         32. WINDSPEED_AVERAGE_WINDOW: int : Optional. The same for the windspeed. Defaults to
+                 0, which does not average the windspeed.
+         33. SIGNAL_FILTERS: dict : Optional. The filters of the 'anemometer' and 'load_cell'
+                 readings, applied in order before they are written to the data sheet, as lists
+                 of specifications such as {'type': 'median', 'window': 2}, see
+                 signal_filters.create_filter. Defaults to no filters.
+         34. SAMPLE_LIMITS: dict : Optional. The [minimum, maximum] accepted reading of the
+                 'anemometer' and 'load_cell' channels (either may be null), outside of which
+                 samples are dropped before filtering. Defaults to no limits.
+         35. RESAMPLE_RATE_HZ: float : Optional. If not 0, the samples are interpolated onto a
+                 uniform time grid of this rate (Hz) before they are filtered, so that the
+                 averaging windows cover the same duration on every row. Defaults to 0.
+         36. ALIGN_LOGS: bool : Optional. In input-hitlist mode, whether the resampled logs are
+                 also placed on a common time grid and compared, in a "Comparison" sheet of
+                 the single output file (or a comparison.xlsx in the FILE_SUBDIRECTORY) with an
+                 overlay chart of the windspeed, force and drag area of every log, and as a
+                 'comparison' table in the other export formats. Requires RESAMPLE_RATE_HZ.
+                 Defaults to False.
+         37. ALIGN_REFERENCE: string : Optional. 'start' to compare the logs from their first
+                 sample, or 'run' from the start of their first run. Defaults to 'start'.
+         38. RESULTS_CATALOG: bool : Optional. Whether the summary statistics of every analyzed
+                 file are recorded in a SQLite catalog, along with the hash of its csv, its
+                 sheetname, row count and analysis parameters, so that the logs of every
+                 campaign can be queried without opening any workbook (see results_catalog).
+                 Defaults to False.
+         39. RESULTS_CATALOG_PATH: string : Optional. The path of the catalog, which several
+                 campaigns can share. Defaults to 'results_catalog.sqlite' in the
+                 FILE_SUBDIRECTORY.
+         40. RESULTS_CATALOG_RUNS: bool : Optional. Whether the runs of every file are recorded
+                 in the catalog too. Defaults to True.
+         41. SHARD_MAX_ROWS: int : Optional. If not 0, the single output file is split into
+                 several workbooks ('___shard1', '___shard2', ... after its name), each holding
+                 the next files of the hitlist for as long as their data rows fit in this
+                 budget, with their own Constants sheet, meta-analysis and run table. The single
+                 output file itself becomes an index, with the combined meta-analysis and runs
+                 of all shards as values, linked to their data sheets. With WORKERS, the shards
+                 are written in parallel. A file above the budget gets a shard to itself, and
+                 the workbook is not split if everything fits. Cannot be combined with
+                 INCREMENTAL_UPDATE. Defaults to 0.
+         42. SHARD_MAX_BYTES: int : Optional. The same, for the estimated size (bytes) of every
+                 shard, see SHARD_BYTES_PER_CSV_BYTE. Both budgets apply if both are given.
+                 Defaults to 0.
+
+    Returns
+    -------
+    dict
+        The summary statistics and runs of every analyzed file (see run_summary),
+        keyed by its input path without the extension. Files which could not be analyzed
+        are left out.
     '''
+    instrumentation = create_instrumentation(config)
+    try:
+        with instrumentation.stage('complete_analysis'):
+            return run_complete_analysis(config, instrumentation)
+    finally:
+        instrumentation.close()
+
+
+def analysis_options(config):
+    """
+    Collect the options of execute_analysis that are set in a configuration.
+
+    Parameters
+    ----------
+    config: dict
+        The configuration dictionary, see execute_complete_analysis
+
+    Returns
+    -------
+    dict
+        The keyword arguments of execute_analysis: output_mode, write_only, columnar_dtype,
+        chart_max_points, chart_methods, run_segmentation, export_formats and pipeline
+    """
+    columnar_dtype = None
+    if config.get('COLUMNAR_CACHE', False):
+        columnar_dtype = config.get('COLUMNAR_DTYPE', 'float64')
+
+    return {'output_mode': config.get('OUTPUT_MODE', OUTPUT_MODE_FORMULAS),
+            'write_only': config.get('WRITE_ONLY_EXPORT', False),
+            'columnar_dtype': columnar_dtype,
+            'chart_max_points': config.get('CHART_MAX_POINTS', 0),
+            'chart_methods': config.get('CHART_DECIMATION') or {},
+            'run_segmentation': analysis_engine.run_segmentation_config(config),
+            'export_formats': exporters.export_formats(config.get('EXPORT_FORMAT',
+                                                                  exporters.EXPORT_FORMAT_XLSX)),
+            'pipeline': signal_filters.create_pipeline(config)}
+
+
+def analysis_cache(config):
+    """
+    Create the result cache selected in a configuration.
+
+    Parameters
+    ----------
+    config: dict
+        The configuration dictionary, see execute_complete_analysis
+
+    Returns
+    -------
+    result_cache.ResultCache or None
+        The cache, or None if USE_CACHE is disabled
+    """
+    if not config.get('USE_CACHE', False):
+        return None
+
+    cache_directory = config.get('CACHE_DIRECTORY') or os.path.join(
+        config['FILE_SUBDIRECTORY'], result_cache.DEFAULT_CACHE_DIRECTORY_NAME)
+    return result_cache.ResultCache(cache_directory, config.get(
+        'CACHE_MAX_BYTES', result_cache.DEFAULT_CACHE_MAX_BYTES))
+
+
+def results_catalog_path(config):
+    """
+    Get the path of the results catalog selected in a configuration.
+
+    Parameters
+    ----------
+    config: dict
+        The configuration dictionary, see execute_complete_analysis
+
+    Returns
+    -------
+    str or None
+        The path of the catalog, or None if RESULTS_CATALOG is disabled
+    """
+    if not config.get('RESULTS_CATALOG', False):
+        return None
+
+    return config.get('RESULTS_CATALOG_PATH') or os.path.join(
+        config['FILE_SUBDIRECTORY'], results_catalog.DEFAULT_CATALOG_NAME)
+
+
+def catalog_results(catalog_path, run_statistics, sheetnames, output_paths, options,
+                    include_runs=True):
+    """
+    Record the statistics of analyzed files in a results catalog.
+
+    Parameters
+    ----------
+    catalog_path: path-format str
+        The path of the catalog, which is created if it does not exist
+    run_statistics: dict
+        The summary of every analyzed file, keyed by its input path without the extension, as
+        returned by execute_complete_analysis
+    sheetnames, output_paths: dict
+        The sheetname and output path of every file, with the same keys. Files which are not in
+        them are recorded without.
+    options: dict
+        The options of the analysis, see analysis_options
+    include_runs: bool
+        Whether the runs of every file are recorded too. Default is True.
+    """
+    parameters = results_catalog.catalog_parameters(
+        options['output_mode'], columnar_dtype=options['columnar_dtype'],
+        pipeline=options['pipeline'], run_segmentation=options['run_segmentation'])
+
+    with results_catalog.ResultsCatalog(catalog_path) as catalog:
+        for target, summary in run_statistics.items():
+            catalog.record(target + '.csv', summary, parameters, sheetnames.get(target),
+                           output_paths.get(target), include_runs=include_runs)
+
+
+def run_complete_analysis(config, instrumentation=INSTRUMENTATION_DISABLED):
+    '''
+    Executes the full analysis, see execute_complete_analysis
+
+    Parameters
+    ----------
+    config: dict
+        The configuration dictionary, see execute_complete_analysis
+    instrumentation: instrumentation.Instrumentation
+        Where every stage of the analysis is measured. Default is disabled.
+
+    Returns
+    -------
+    dict
+        The summary statistics and runs of every analyzed file, see execute_complete_analysis
+    '''
+
+    options = analysis_options(config)
+    output_mode = options['output_mode']
+    write_only = options['write_only']
+    workers = config.get('WORKERS', 1)
+
+    export_formats = options['export_formats']
+    columnar_dtype = options['columnar_dtype']
+    chart_max_points = options['chart_max_points']
+    chart_methods = options['chart_methods']
+    run_segmentation = options['run_segmentation']
+    pipeline = options['pipeline']
+
+    align_logs = config.get('ALIGN_LOGS', False)
+    align_reference = config.get('ALIGN_REFERENCE', log_alignment.ALIGN_START)
+    if align_logs and pipeline.resampler is None:
+        raise ValueError("ALIGN_LOGS requires the logs to be resampled, see RESAMPLE_RATE_HZ")
+    if align_reference not in log_alignment.ALIGN_REFERENCES:
+        raise ValueError("Unknown alignment reference: " + str(align_reference))
+
+    shard_max_rows = config.get('SHARD_MAX_ROWS', 0)
+    shard_max_bytes = config.get('SHARD_MAX_BYTES', 0)
+    if (shard_max_rows or shard_max_bytes) and config.get('INCREMENTAL_UPDATE', False):
+        raise ValueError("INCREMENTAL_UPDATE cannot update a sharded single output file")
+    comparison = None
+
+    run_statistics = {}
+    # The sheetname and output path of every file, for the results catalog
+    target_sheetnames = {}
+    output_paths = {}
+
+    cache = analysis_cache(config)
+    catalog_path = results_catalog_path(config)
 
     if not config['SUPPRESS_ALL_PRINTS']:
         print('Analyzer active')
@@ -502,7 +1910,8 @@ def execute_complete_analysis(config):
         hitlist_path = config['HITLIST_PATH']
         hitlist = []
         with open(hitlist_path, 'r') as hitlist_file:
-            hitlist = list(hitlist_file)
+            # Blank lines (usually at the end of the file) are ignored
+            hitlist = [line.rstrip("\n") for line in hitlist_file if line.strip()]
 
         if len(hitlist) == 0:
             print(
@@ -510,7 +1919,7 @@ def execute_complete_analysis(config):
             print("Ensure that the correct target file is being passed to the program.")
             print("The current one is " + hitlist_path)
             print("Analyzer finished")
-            return
+            return run_statistics
 
         if config['USE_CUSTOM_SHEETNAMES']:
             sheetnames_path = config['SINGLE_OUTPUT_SHEETNAMES_PATH']
@@ -529,53 +1938,281 @@ def execute_complete_analysis(config):
             for idx in range(len(hitlist)):
                 hitlist[idx] = os.path.join(
                     config['FILE_SUBDIRECTORY'], hitlist[idx])
-
-        # Putting all analysis results into one file
-        if config['SINGLE_OUTPUT_FILE']:
+        target_sheetnames = dict(zip(hitlist, sheetnames))
+
+        # The single output file is split into shards if it does not fit the budget
+        shards = None
+        if config['SINGLE_OUTPUT_FILE'] and exporters.EXPORT_FORMAT_XLSX in export_formats and\
+                (shard_max_rows or shard_max_bytes):
+            shards = plan_shards([target + '.csv' for target in hitlist], shard_max_rows,
+                                 shard_max_bytes, output_mode)
+            if len(shards) == 1:
+                shards = None
+
+        if shards is not None:
+            single_output_path = os.path.join(config['FILE_SUBDIRECTORY'],
+                                              config['SINGLE_OUTPUT_FILE_PATH'])
+            condensed_version = config['CONDENSED_EXPORT_VERSION']
             if not config['SUPPRESS_ALL_PRINTS']:
-                print('Exporting analysis to single file: '
-                      + os.path.join(config['FILE_SUBDIRECTORY'],
-                                     config['SINGLE_OUTPUT_FILE_PATH']))
-
-            global_workbook = WB()
-            ws_consts = global_workbook.create_sheet(title="Constants")
+                print('Exporting analysis to ' + str(len(shards)) + ' shards indexed by: ' +
+                      single_output_path)
+
+            shard_paths = [shard_path(single_output_path, shard_idx)
+                           for shard_idx in range(1, len(shards) + 1)]
+            shard_targets = [[(hitlist[idx], sheetnames[idx]) for idx in shard]
+                             for shard in shards]
+            shard_statistics = []
+
+            with ProcessPoolExecutor(min(workers, len(shards))) if workers > 1 else\
+                    nullcontext() as pool:
+                if pool:
+                    # Every shard is analyzed and saved entirely by one of the worker processes
+                    writing = [instrumentation.submit(pool, write_shard, path, targets, options,
+                                                      cache, condensed_version)
+                               for path, targets in zip(shard_paths, shard_targets)]
+                else:
+                    writing = [None] * len(shards)
+
+                for path, targets, future in zip(shard_paths, shard_targets, writing):
+                    if future:
+                        try:
+                            statistics = instrumentation.result(future)
+                        except Exception as err:
+                            if not config['SUPPRESS_ALL_PRINTS']:
+                                print(path + " could not be written: " + repr(err))
+                            continue
+                    else:
+                        statistics = write_shard(path, targets, options, cache,
+                                                 condensed_version, instrumentation)
+
+                    run_statistics.update(statistics)
+                    output_paths.update(dict.fromkeys(statistics, path))
+                    shard_statistics.append((path, {
+                        data_sheet_title(sheetname, condensed_version): statistics[target]
+                        for target, sheetname in targets}))
+                    if not config['SUPPRESS_ALL_PRINTS']:
+                        print(path + " written")
+
+            index_workbook = create_workbook(write_only)
+            with instrumentation.stage('meta_analysis', single_output_path):
+                create_shard_index(index_workbook, shard_statistics)
+
+            if align_logs:
+                with instrumentation.stage('compare_logs', single_output_path):
+                    comparison = compare_logs(hitlist, sheetnames, pipeline, columnar_dtype,
+                                              align_reference, run_segmentation, instrumentation,
+                                              config['SUPPRESS_ALL_PRINTS'])
+                    create_comparison_sheet(index_workbook, comparison)
+
+            with instrumentation.stage('save', single_output_path):
+                save_workbook(index_workbook, single_output_path)
+            if not config['SUPPRESS_ALL_PRINTS']:
+                print('\n Analysis complete')
+        # Putting all analysis results into one file, which only exists as a workbook
+        elif config['SINGLE_OUTPUT_FILE'] and exporters.EXPORT_FORMAT_XLSX in export_formats:
+            single_output_path = os.path.join(config['FILE_SUBDIRECTORY'],
+                                              config['SINGLE_OUTPUT_FILE_PATH'])
+            output_paths = dict.fromkeys(hitlist, single_output_path)
+            if not config['SUPPRESS_ALL_PRINTS']:
+                print('Exporting analysis to single file: ' + single_output_path)
 
-            from constants import SimplifiedConsts as SConsts
-            consts = SConsts(ws_consts, global_workbook)
+            condensed_version = config['CONDENSED_EXPORT_VERSION']
 
-            # Creating worksheet for performing a summy analysis of all data later
-            ws_meta_analysis = global_workbook.create_sheet(
-                title="Meta-Analysis")
+            if config.get('INCREMENTAL_UPDATE', False) and os.path.exists(single_output_path):
+                global_workbook = load_wb(single_output_path)
 
-            space_columns(ws_consts, 12, 1)
+                # Only the files which do not have a sheet in the workbook yet are analyzed
+                existing_sheetnames = set(global_workbook.sheetnames)
+                pending = [(target, sheetname) for target, sheetname in zip(hitlist, sheetnames)
+                           if data_sheet_title(sheetname, condensed_version)
+                           not in existing_sheetnames]
 
-            for target, sheetname in zip(hitlist, sheetnames):
-                execute_analysis(target[:-1],
-                                 output_path=target[:-1] + '___analyzed.xlsx',
-                                 single_file=True,
-                                 single_workbook=global_workbook,
-                                 sheetname_prefix=sheetname,
-                                 condensed_version=config['CONDENSED_EXPORT_VERSION'])
                 if not config['SUPPRESS_ALL_PRINTS']:
-                    print(target[:-1] + " analyzed")
+                    print("Updating existing file, " + str(len(pending)) +
+                          " new file(s) to analyze")
+
+                # The meta-analysis is recreated in the same place, to include the new sheets,
+                # with the statistics of the sheets already in it
+                previous_statistics = {}
+                if "Meta-Analysis" in existing_sheetnames:
+                    previous_statistics = previous_meta_analysis(global_workbook["Meta-Analysis"])
+                    meta_index = global_workbook.sheetnames.index("Meta-Analysis")
+                    global_workbook.remove(global_workbook["Meta-Analysis"])
+                    ws_meta_analysis = global_workbook.create_sheet("Meta-Analysis", meta_index)
+                else:
+                    ws_meta_analysis = global_workbook.create_sheet("Meta-Analysis")
+
+                # As is the run table, which keeps the runs of the sheets already in it
+                previous_runs = []
+                if "Runs" in existing_sheetnames:
+                    previous_runs = list(global_workbook["Runs"].iter_rows(min_row=2,
+                                                                           values_only=True))
+                    global_workbook.remove(global_workbook["Runs"])
+                ws_runs = global_workbook.create_sheet(
+                    "Runs", global_workbook.sheetnames.index("Meta-Analysis") + 1)
+            else:
+                global_workbook = create_workbook(write_only)
+                ws_consts = create_sheet(global_workbook, "Constants",
+                                         space_depth=12, space_cols=1)
+
+                from constants import SimplifiedConsts as SConsts
+                consts = SConsts(ws_consts, global_workbook)
+
+                # Creating worksheet for performing a summy analysis of all data later
+                ws_meta_analysis = create_sheet(global_workbook, "Meta-Analysis")
+                ws_runs = create_sheet(global_workbook, "Runs", space_depth=1)
+                previous_statistics = {}
+                previous_runs = []
+
+                space_columns(ws_consts, 12, 1)
+
+                pending = list(zip(hitlist, sheetnames))
+
+            # The statistics of the files analyzed now, keyed by their data sheet
+            sheet_statistics = {}
+
+            with ProcessPoolExecutor(workers) if workers > 1 else nullcontext() as pool:
+                if pool:
+                    # The files are read and computed in parallel, but written in hitlist order
+                    loading = bounded_futures(
+                        lambda target: instrumentation.submit(pool, load_data, target + '.csv',
+                                                              output_mode, cache, columnar_dtype,
+                                                              pipeline=pipeline,
+                                                              run_segmentation=run_segmentation),
+                        [target for target, _ in pending], workers)
+                else:
+                    loading = ((target, None) for target, _ in pending)
+
+                for (target, sheetname), (_, future) in zip(pending, loading):
+                    sheet_count = len(global_workbook.sheetnames)
+                    try:
+                        data = instrumentation.result(future) if future else None
+                        run_statistics[target] = execute_analysis(
+                            target,
+                            output_path=target + '___analyzed.xlsx',
+                            single_file=True,
+                            single_workbook=global_workbook,
+                            sheetname_prefix=sheetname,
+                            condensed_version=condensed_version,
+                            output_mode=output_mode,
+                            data=data,
+                            cache=cache,
+                            columnar_dtype=columnar_dtype,
+                            chart_max_points=chart_max_points,
+                            chart_methods=chart_methods,
+                            run_segmentation=run_segmentation,
+                            instrumentation=instrumentation,
+                            export_formats=export_formats,
+                            pipeline=pipeline)
+                    except Exception as err:
+                        if not pool:
+                            raise
+                        # The sheets of the file are removed, whether it failed in a worker
+                        # process or while it was being written
+                        for title in global_workbook.sheetnames[sheet_count:]:
+                            global_workbook.remove(global_workbook[title])
+                        if not config['SUPPRESS_ALL_PRINTS']:
+                            print(target + " could not be analyzed: " + repr(err))
+                        continue
+                    finally:
+                        # The loaded file is released as soon as it is written
+                        data = future = None
+
+                    sheet_statistics[data_sheet_title(sheetname, condensed_version)] =\
+                        run_statistics[target]
+                    if not config['SUPPRESS_ALL_PRINTS']:
+                        print(target + " analyzed")
 
             # Performs meta-analysis to summarize drag area data
-            create_meta_analysis(global_workbook, ws_meta_analysis)
-
-            global_workbook.save(os.path.join(
-                config['FILE_SUBDIRECTORY'], config['SINGLE_OUTPUT_FILE_PATH']))
+            with instrumentation.stage('meta_analysis', single_output_path):
+                create_meta_analysis(global_workbook, ws_meta_analysis,
+                                     dict(previous_statistics, **sheet_statistics))
+                create_run_table(ws_runs, {sheet_title: statistics['runs'] for sheet_title,
+                                           statistics in sheet_statistics.items()},
+                                 previous_runs)
+                space_columns(ws_runs, 1)
+
+            if align_logs:
+                with instrumentation.stage('compare_logs', single_output_path):
+                    comparison = compare_logs(hitlist, sheetnames, pipeline, columnar_dtype,
+                                              align_reference, run_segmentation, instrumentation,
+                                              config['SUPPRESS_ALL_PRINTS'])
+                    if "Comparison" in global_workbook.sheetnames:
+                        global_workbook.remove(global_workbook["Comparison"])
+                    create_comparison_sheet(global_workbook, comparison)
+
+            with instrumentation.stage('save', single_output_path):
+                save_workbook(global_workbook, single_output_path)
             if not config['SUPPRESS_ALL_PRINTS']:
                 print('\n Analysis complete')
         else:  # Making an individual analysis file for each input file that was given
-            for target in hitlist:
-                target_output_path = os.path.join(
-                    config['FILE_SUBDIRECTORY'], (target[:-1] + '___analyzed.xlsx'))
-                execute_analysis(target[:-1], output_path=target_output_path)
-                if not config['SUPPRESS_ALL_PRINTS']:
-                    print(target[:-1] + " analyzed")
+            if exporters.EXPORT_FORMAT_XLSX in export_formats:
+                output_paths = {target: target + '___analyzed.xlsx' for target in hitlist}
+
+            if workers > 1:
+                # Every file is analyzed and saved entirely by one of the worker processes
+                with ProcessPoolExecutor(workers) as pool:
+                    analyses = [instrumentation.submit(pool, execute_analysis, target,
+                                                       output_path=target + '___analyzed.xlsx',
+                                                       output_mode=output_mode,
+                                                       write_only=write_only,
+                                                       cache=cache,
+                                                       columnar_dtype=columnar_dtype,
+                                                       chart_max_points=chart_max_points,
+                                                       chart_methods=chart_methods,
+                                                       run_segmentation=run_segmentation,
+                                                       export_formats=export_formats,
+                                                       pipeline=pipeline)
+                                for target in hitlist]
+
+                    for target, future in zip(hitlist, analyses):
+                        try:
+                            run_statistics[target] = instrumentation.result(future)
+                        except Exception as err:
+                            if not config['SUPPRESS_ALL_PRINTS']:
+                                print(target + " could not be analyzed: " + repr(err))
+                            continue
+
+                        if not config['SUPPRESS_ALL_PRINTS']:
+                            print(target + " analyzed")
+            else:
+                for target in hitlist:
+                    run_statistics[target] = execute_analysis(
+                        target, output_path=target + '___analyzed.xlsx',
+                        output_mode=output_mode,
+                        write_only=write_only,
+                        cache=cache,
+                        columnar_dtype=columnar_dtype,
+                        chart_max_points=chart_max_points,
+                        chart_methods=chart_methods,
+                        run_segmentation=run_segmentation,
+                        instrumentation=instrumentation,
+                        export_formats=export_formats,
+                        pipeline=pipeline)
+                    if not config['SUPPRESS_ALL_PRINTS']:
+                        print(target + " analyzed")
+
+            if align_logs:
+                with instrumentation.stage('compare_logs'):
+                    comparison = compare_logs(hitlist, sheetnames, pipeline, columnar_dtype,
+                                              align_reference, run_segmentation, instrumentation,
+                                              config['SUPPRESS_ALL_PRINTS'])
+                    if exporters.EXPORT_FORMAT_XLSX in export_formats:
+                        comparison_workbook = create_workbook(write_only)
+                        create_comparison_sheet(comparison_workbook, comparison)
+                        save_workbook(comparison_workbook, os.path.join(
+                            config['FILE_SUBDIRECTORY'], exporters.COMPARISON_NAME + '.xlsx'))
 
             if not config['SUPPRESS_ALL_PRINTS']:
                 print('\n Analysis complete')
+
+        if comparison is not None:
+            export_comparison(os.path.join(config['FILE_SUBDIRECTORY'],
+                                           exporters.COMPARISON_NAME),
+                              comparison, export_formats)
+        export_meta_analysis(os.path.join(config['FILE_SUBDIRECTORY'],
+                                          exporters.META_ANALYSIS_NAME),
+                             run_statistics, export_formats)
     else:  # Swithcing to simpler mode that analyzes only one file
         if not config['SUPPRESS_ALL_PRINTS']:
             print("Analyzer operating in basic single-file mode")
@@ -587,57 +2224,28 @@ def execute_complete_analysis(config):
             itarget = input("Enter the input target path")
             otarget = input("Enter the output target path")
 
-        active_wb = WB()
-        ws_data = active_wb.create_sheet(title="Data")
-        ws_consts = active_wb.create_sheet(title="Constants")
-        ws_graphs = active_wb.create_sheet(title="Graphs")
-
-        from constants import SimplifiedConsts as SConsts
-        consts = SConsts(ws_consts, active_wb)
-        HeaderManager().create_headers(ws_data)
-
-        csvfile = open(itarget, newline='')
-        csvreader = csv.reader(csvfile, delimiter=',')
-
-        row_idx = 1
-        for row in list(csvreader):
-            if row_idx > 1:
-                if simple_filter(row):  # Data Filtering
-                    process_sheet_row(row, row_idx, ws_data)
-                else:
-                    row_idx -= 1
-
-            row_idx += 1
-
-        create_graphs(ws_data, ws_graphs, row_idx)
-
-        space_columns(ws_data, 1)
-        space_columns(ws_consts, 10, 1)
-
-        active_wb.save(otarget)
-
-
-if __name__ == "__main__":
-
-    config = {}
-    if len(sys.argv) == 2:
-        import yaml
-        config_path = sys.argv[1]
-        with open(config_path) as file:
-            config = yaml.load(file, Loader=yaml.FullLoader)
-    else:  # Drawing configuration from variables in python script
-        # Impored from config_varaibles.py, see file for detailed description
-        config['USE_HARD_CODED_PATH'] = USE_HARD_CODED_PATH
-        config['HARD_CODED_PATH'] = HARD_CODED_PATH
-        config['HARD_CODED_OUTPUT'] = HARD_CODED_OUTPUT
-        config['FILE_INPUT_HITLIST'] = FILE_INPUT_HITLIST
-        config['HITLIST_PATH'] = HITLIST_PATH
-        config['SINGLE_OUTPUT_FILE'] = SINGLE_OUTPUT_FILE
-        config['SINGLE_OUTPUT_FILE_PATH'] = SINGLE_OUTPUT_FILE_PATH
-        config['FILE_SUBDIRECTORY'] = FILE_SUBDIRECTORY
-        config['USE_CUSTOM_SHEETNAMES'] = USE_CUSTOM_SHEETNAMES
-        config['SINGLE_OUTPUT_SHEETNAMES_PATH'] = SINGLE_OUTPUT_SHEETNAMES_PATH
-        config['CONDENSED_EXPORT_VERSION'] = CONDENSED_EXPORT_VERSION
-        config['SUPPRESS_ALL_PRINTS'] = False
-
-    execute_complete_analysis(config)
+        summary = execute_analysis(os.path.splitext(itarget)[0], otarget,
+                                   output_mode=output_mode,
+                                   write_only=write_only,
+                                   cache=cache,
+                                   columnar_dtype=columnar_dtype,
+                                   chart_max_points=chart_max_points,
+                                   chart_methods=chart_methods,
+                                   run_segmentation=run_segmentation,
+                                   instrumentation=instrumentation,
+                                   export_formats=export_formats,
+                                   pipeline=pipeline)
+
+        run_statistics[os.path.splitext(itarget)[0]] = summary
+        target_sheetnames[os.path.splitext(itarget)[0]] = "Data"
+        output_paths[os.path.splitext(itarget)[0]] = otarget
+        export_meta_analysis(os.path.join(os.path.dirname(otarget), exporters.META_ANALYSIS_NAME),
+                             run_statistics, export_formats)
+
+    if catalog_path is not None and run_statistics:
+        with instrumentation.stage('results_catalog', catalog_path) as record:
+            catalog_results(catalog_path, run_statistics, target_sheetnames, output_paths,
+                            options, config.get('RESULTS_CATALOG_RUNS', True))
+            record['rows'] = len(run_statistics)
+
+    return run_statistics
@@ -0,0 +1,239 @@
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from contextlib import nullcontext
+
+import numpy as np
+from openpyxl import load_workbook as load_wb
+
+import analysis_engine
+import daq_io
+import exporters
+import truck_test_rapid_analyzer as analyzer
+
+from xlsx_export import create_workbook
+from xlsx_export import save_workbook
+
+# The name of the combined meta-analysis of the re-analyzed workbooks
+REANALYSIS_NAME = 'reanalysis'
+
+# The titles of the first columns of a data sheet, which hold the samples of its log
+_RAW_TITLES = tuple(analyzer.HeaderManager().header_titles()[col_idx]
+                    for col_idx in (analyzer.HeaderManager.TIME_COL,
+                                    analyzer.HeaderManager.ANEMOMETER_RAW_COL,
+                                    analyzer.HeaderManager.LOAD_CELL_RAW_COL))
+
+
+def data_sheets(workbook):
+    """
+    Find the data sheets of a workbook generated by the analyzer.
+
+    A data sheet is any sheet whose first row starts with the time and raw reading headers of
+    HeaderManager, whatever its title, so that both separate and single output files (condensed
+    or not, and their shards) are recognized. Only the first row of every sheet is read.
+
+    Parameters
+    ----------
+    workbook: openpyxl.Workbook
+        The workbook, usually loaded in read-only mode
+
+    Returns
+    -------
+    list of openpyxl.Worksheet
+        The data sheets, in the order of the workbook
+    """
+    return [sheet for sheet in workbook.worksheets
+            if next(sheet.iter_rows(max_row=1, max_col=len(_RAW_TITLES), values_only=True),
+                    None) == _RAW_TITLES]
+
+
+def iter_sheet_chunks(sheet, chunk_rows=daq_io.DEFAULT_CHUNK_ROWS):
+    """
+    Stream the samples of a data sheet in chunks.
+
+    Only the time and raw reading columns are read, and rows without all three of them are
+    skipped.
+
+    Parameters
+    ----------
+    sheet: openpyxl.Worksheet
+        The data sheet, see data_sheets
+    chunk_rows: int
+        How many samples are converted at once. Default is daq_io.DEFAULT_CHUNK_ROWS
+
+    Yields
+    ------
+    tuple of numpy.ndarray
+        The timestamps (s), anemometer readings (m/s) and load cell readings (lbf) of each chunk
+    """
+    rows = []
+    for row in sheet.iter_rows(min_row=2, max_col=len(_RAW_TITLES), values_only=True):
+        if None not in row:
+            rows.append(row)
+        if len(rows) == chunk_rows:
+            yield _chunk_columns(rows)
+            rows = []
+
+    if rows:
+        yield _chunk_columns(rows)
+
+
+def _chunk_columns(rows):
+    # The timestamps of the sheets are whole ms, which analysis_engine.timestamps_ms recovers
+    # exactly from the seconds
+    samples = np.array(rows, dtype=np.float64)
+    return samples[:, 0] / 1000, samples[:, 1], samples[:, 2]
+
+
+def reanalyze_workbook(workbook_path, pipeline=None, run_segmentation=None,
+                       export_formats=()):
+    """
+    Recompute the derived columns and statistics of every data sheet of a workbook.
+
+    The workbook is loaded in read-only mode, and the raw columns of every sheet are streamed
+    from the file in chunks, whose derived columns are exported and summarized as they are
+    computed, so that no sheet is ever held in memory as a whole. The derived columns are
+    computed natively with the current constants, whatever the values in the Constants sheet of
+    the workbook. The samples are taken as they are in the sheets, since they already went
+    through the signal filters of the analysis that wrote them.
+
+    Parameters
+    ----------
+    workbook_path: path-format str
+        The workbook, such as a '___analyzed.xlsx' or single output file
+    pipeline: signal_filters.FilterPipeline=None
+        The pipeline of the averaging windows. Default is None, which uses the default windows.
+    run_segmentation: dict=None
+        Keyword arguments of analysis_engine.segment_runs. Default is None, which uses the
+        default parameters.
+    export_formats: list of str
+        The formats other than xlsx in which the derived columns of every sheet are exported,
+        next to the workbook with the title of the sheet after its name. Default is none.
+
+    Returns
+    -------
+    dict
+        The summary of every data sheet (see analysis_engine.summarize_log), keyed by its title
+    """
+    summaries = {}
+    workbook = load_wb(workbook_path, read_only=True)
+    try:
+        for sheet in data_sheets(workbook):
+            export_path = os.path.splitext(workbook_path)[0] + '___' + sheet.title
+            summarizer = analysis_engine.StreamingSummary(run_segmentation)
+            with ExitStack() as stack:
+                analyzer.stream_columns(
+                    iter_sheet_chunks(sheet),
+                    [summarizer] + analyzer.column_exporters(stack, export_path, export_formats),
+                    pipeline)
+            summaries[sheet.title] = summarizer.summary()
+    finally:
+        workbook.close()
+
+    return summaries
+
+
+def export_reanalysis(export_path, workbook_statistics, export_formats):
+    """
+    Export the combined meta-analysis of re-analyzed workbooks in every selected format.
+
+    In xlsx, it is a workbook with the meta-analysis and runs of every data sheet, as in the
+    index of a sharded single output file (see truck_test_rapid_analyzer.create_shard_index),
+    linked to the sheets of the workbooks. The other formats get the meta-analysis table, see
+    truck_test_rapid_analyzer.export_meta_analysis.
+
+    Parameters
+    ----------
+    export_path: path-format str
+        Where the meta-analysis is exported, without the extension of the format
+    workbook_statistics: dict
+        The summaries of reanalyze_workbook, keyed by the path of their workbook
+    export_formats: list of str
+        The selected formats, see exporters.EXPORT_FORMATS
+    """
+    link_directory = os.path.dirname(os.path.abspath(export_path))
+
+    if exporters.EXPORT_FORMAT_XLSX in export_formats:
+        workbook = create_workbook()
+        analyzer.create_shard_index(workbook, list(workbook_statistics.items()), link_directory)
+        save_workbook(workbook, export_path + '.xlsx')
+
+    # Every data sheet is labelled by its workbook and title, as in the lines of run_reanalysis
+    keys = ['log', 'row_count'] + [key for key, _ in analysis_engine.META_ANALYSIS_STATISTICS]
+    titles = ["Log", "Rows"] + [title for _, title in analysis_engine.META_ANALYSIS_STATISTICS]
+    records = [[os.path.relpath(os.path.abspath(path), link_directory) + " [" + sheet_title +
+                "]"] + [summary[key] for key in keys[1:]]
+               for path, summaries in workbook_statistics.items()
+               for sheet_title, summary in summaries.items()]
+
+    for export_format in export_formats:
+        if export_format != exporters.EXPORT_FORMAT_XLSX:
+            exporters.export_records(export_format, export_path, records, keys, titles)
+
+
+def format_reanalysis(workbook_path, sheet_title, summary):
+    """Format the summary of a re-analyzed data sheet as a single line."""
+    mean_drag_area = summary['mean_drag_area']
+    return (workbook_path + " [" + sheet_title + "]: " + str(summary['row_count']) +
+            " samples, " + str(summary['run_count']) + " runs, mean drag area " +
+            ("-" if mean_drag_area is None else format(mean_drag_area, '.6g')) + " ft^2")
+
+
+def run_reanalysis(config, workbook_paths):
+    '''
+    Re-analyze workbooks generated by the analyzer, from the samples in their data sheets.
+
+    This recovers the statistics of archived analyses whose csv files are lost, under the
+    current constants, without opening the workbooks in a spreadsheet application.
+
+    Parameters
+    ----------
+    config: dict
+        The configuration dictionary. Its WORKERS (how many workbooks are re-analyzed in
+        parallel), EXPORT_FORMAT, averaging windows (see signal_filters.create_pipeline), run
+        segmentation and SUPPRESS_ALL_PRINTS fields are used, along with the following field:
+         1. REANALYSIS_OUTPUT_PATH: string : Optional. Where the combined meta-analysis of all
+                workbooks is written, without the extension of the export formats.
+                Defaults to 'reanalysis' in the FILE_SUBDIRECTORY.
+    workbook_paths: list of path-format str
+        The workbooks
+
+    Returns
+    -------
+    dict
+        The summaries of reanalyze_workbook, keyed by the path of their workbook. Workbooks
+        which could not be read are left out.
+    '''
+    options = analyzer.analysis_options(config)
+    workers = config.get('WORKERS', 1)
+    export_path = config.get('REANALYSIS_OUTPUT_PATH') or os.path.join(
+        config.get('FILE_SUBDIRECTORY', ''), REANALYSIS_NAME)
+
+    arguments = (options['pipeline'], options['run_segmentation'], options['export_formats'])
+    workbook_statistics = {}
+
+    with ProcessPoolExecutor(workers) if workers > 1 else nullcontext() as pool:
+        if pool:
+            # Every workbook is read and re-analyzed entirely by one of the worker processes,
+            # since the read-only loader goes through all sheets whenever it opens a workbook
+            analyses = [pool.submit(reanalyze_workbook, path, *arguments)
+                        for path in workbook_paths]
+        else:
+            analyses = [None] * len(workbook_paths)
+
+        for path, future in zip(workbook_paths, analyses):
+            try:
+                summaries = future.result() if future else reanalyze_workbook(path, *arguments)
+            except Exception as err:
+                if not config.get('SUPPRESS_ALL_PRINTS', False):
+                    print(path + " could not be re-analyzed: " + repr(err))
+                continue
+
+            workbook_statistics[path] = summaries
+            if not config.get('SUPPRESS_ALL_PRINTS', False):
+                for sheet_title, summary in summaries.items():
+                    print(format_reanalysis(path, sheet_title, summary))
+
+    export_reanalysis(export_path, workbook_statistics, options['export_formats'])
+    return workbook_statistics
@@ -0,0 +1,543 @@
+import os
+import re
+import shutil
+import tempfile
+import weakref
+import zipfile
+
+from bisect import bisect_right
+from xml.etree import ElementTree
+
+from openpyxl import Workbook as WB
+
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
+from openpyxl.workbook.defined_name import DefinedName
+
+from openpyxl.styles.alignment import Alignment
+
+# The number format of all numeric data columns
+DATA_NUMBER_FORMAT = "0.000"
+
+# The value of a cell which continues the shared formula of a cell above it, see share_formula
+SHARED_FORMULA = "="
+
+# The start of a formula cell in the xml of a sheet, up to the end of its formula start tag,
+# which is an empty element for the cells written as SHARED_FORMULA
+FORMULA_CELL_PATTERN = re.compile(
+    rb'(?P<cell><c\b[^>]*?\br="(?P<column>[A-Z]+)(?P<row>[0-9]+)"[^>]*>)<f(?P<empty>\s*/)?>')
+
+# How much of the xml of a sheet is rewritten at a time when its shared formulas are written
+SHEET_XML_CHUNK_SIZE = 1 << 20
+
+# The shared formulas of every sheet, as (column letter, first row, last row), keyed by sheet,
+# which are written when its workbook is saved with save_workbook
+SHARED_FORMULAS = weakref.WeakKeyDictionary()
+
+PACKAGE_RELATIONSHIPS = "http://schemas.openxmlformats.org/package/2006/relationships"
+SPREADSHEET_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+DOCUMENT_RELATIONSHIPS = \
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+
+def share_formula(sheet, column, first_row, last_row):
+    """
+    Share the formula of a cell with the cells below it, which are written as SHARED_FORMULA.
+
+    Excel fills in the formula of every cell of a shared formula with its relative references
+    shifted to the row of the cell, exactly as if it had been written out in full, but the file
+    only holds the formula once.
+
+    Parameters
+    ----------
+    sheet: openpyxl.Worksheet or StreamingSheet
+        The sheet of the formula, whose workbook must be saved with save_workbook
+    column: str
+        The letter of the column
+    first_row: int
+        The row of the cell holding the formula
+    last_row: int
+        The last row where the formula is shared, after all rows of the previous shares of the
+        column
+    """
+    worksheet = sheet.worksheet if isinstance(sheet, StreamingSheet) else sheet
+    SHARED_FORMULAS.setdefault(worksheet, []).append((column, first_row, last_row))
+
+
+def save_workbook(workbook, filename):
+    """
+    Save a workbook, with the shared formulas of its sheets.
+
+    openpyxl writes every formula cell on its own, so the cells written as SHARED_FORMULA are
+    turned into references to the first cell of their shared formula in the xml of their
+    sheets once the workbook is saved, see write_shared_formulas.
+
+    Parameters
+    ----------
+    workbook: openpyxl.Workbook or StreamingWorkbook
+        The workbook
+    filename: str
+        Where the workbook is saved
+    """
+    if isinstance(workbook, StreamingWorkbook):
+        workbook.save(filename)
+        return
+
+    workbook.save(filename)
+
+    ranges = {worksheet.title: SHARED_FORMULAS[worksheet]
+              for worksheet in workbook.worksheets if worksheet in SHARED_FORMULAS}
+    if ranges:
+        write_shared_formulas(filename, ranges)
+
+
+def write_shared_formulas(filename, ranges):
+    """
+    Turn the cells of shared formulas into references to the first cell of their range.
+
+    The xml of the sheets is rewritten in chunks into a copy of the file, which then replaces it.
+
+    Parameters
+    ----------
+    filename: str
+        The saved workbook
+    ranges: dict
+        The shared formulas of every sheet, as (column letter, first row, last row), keyed by
+        sheet title
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    with zipfile.ZipFile(filename) as source:
+        parts = _sheet_parts(source)
+        shared_parts = {parts[title]: sheet_ranges for title, sheet_ranges in ranges.items()}
+
+        with tempfile.NamedTemporaryFile(dir=directory, suffix=".xlsx", delete=False) as file:
+            temp_filename = file.name
+        try:
+            with zipfile.ZipFile(temp_filename, 'w', zipfile.ZIP_DEFLATED) as target:
+                for info in source.infolist():
+                    with source.open(info) as reader, target.open(info, 'w') as writer:
+                        if info.filename in shared_parts:
+                            _share_sheet_formulas(reader, writer, shared_parts[info.filename])
+                        else:
+                            shutil.copyfileobj(reader, writer)
+            os.replace(temp_filename, filename)
+        except BaseException:
+            os.remove(temp_filename)
+            raise
+
+
+def _sheet_parts(archive):
+    """The names of the xml files of the sheets of a workbook archive, keyed by sheet title"""
+    relationships = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    targets = {relationship.get("Id"): relationship.get("Target")
+               for relationship in relationships.iter(
+                   "{%s}Relationship" % PACKAGE_RELATIONSHIPS)}
+
+    parts = {}
+    workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+    for sheet in workbook.iter("{%s}sheet" % SPREADSHEET_MAIN):
+        target = targets[sheet.get("{%s}id" % DOCUMENT_RELATIONSHIPS)]
+        parts[sheet.get("name")] = target[1:] if target.startswith("/") else "xl/" + target
+    return parts
+
+
+def _share_sheet_formulas(reader, writer, ranges):
+    """
+    Copy the xml of a sheet, with the formula cells of the shared formulas referring to them.
+
+    Parameters
+    ----------
+    reader, writer: file
+        The xml of the sheet, and where its copy is written
+    ranges: list of tuple
+        The shared formulas of the sheet, as (column letter, first row, last row)
+    """
+    # For every column letter, the first and last rows of its shared formulas, and their
+    # indices, in increasing row order
+    columns = {}
+    for index, (column, first_row, last_row) in enumerate(ranges):
+        first_rows, last_rows, indices = columns.setdefault(column, ([], [], []))
+        first_rows.append(first_row)
+        last_rows.append(last_row)
+        indices.append(index)
+
+    def share(match):
+        column = match.group('column').decode()
+        if column not in columns:
+            return match.group(0)
+
+        first_rows, last_rows, indices = columns[column]
+        row = int(match.group('row'))
+        idx = bisect_right(first_rows, row) - 1
+        if idx < 0 or row > last_rows[idx]:
+            return match.group(0)
+
+        attributes = 't="shared" si="%d"' % indices[idx]
+        if row == first_rows[idx]:
+            attributes += ' ref="%s%d:%s%d"' % (column, first_rows[idx], column, last_rows[idx])
+        return b'%s<f %s%s>' % (match.group('cell'), attributes.encode(),
+                                match.group('empty') or b'')
+
+    # Every chunk is rewritten up to the end of its last row, so that no cell is cut in two
+    pending = b''
+    for chunk in iter(lambda: reader.read(SHEET_XML_CHUNK_SIZE), b''):
+        pending += chunk
+        end = pending.rfind(b'</row>') + len(b'</row>')
+        if end >= len(b'</row>'):
+            writer.write(FORMULA_CELL_PATTERN.sub(share, pending[:end]))
+            pending = pending[end:]
+    writer.write(FORMULA_CELL_PATTERN.sub(share, pending))
+
+
+def add_defined_name(workbook, name, attr_text):
+    """
+    Define a name for the whole workbook.
+
+    openpyxl 3.1 keeps the defined names of a workbook by name, where earlier versions keep a
+    list of them.
+
+    Parameters
+    ----------
+    workbook: openpyxl.Workbook or StreamingWorkbook
+        The workbook
+    name: str
+        The defined name
+    attr_text: str
+        What the name refers to, such as an absolute cell reference
+    """
+    defined_name = DefinedName(name, attr_text=attr_text)
+    if hasattr(workbook.defined_names, 'add'):
+        workbook.defined_names.add(defined_name)
+    else:
+        workbook.defined_names.append(defined_name)
+
+
+def set_column_formats(worksheet, number_formats):
+    """
+    Set the number formats of whole columns of a sheet.
+
+    Excel only uses them for the cells that are not in the file, so the cells that are written
+    must still be given the number format of their column, see column_formats.
+
+    Parameters
+    ----------
+    worksheet: openpyxl.Worksheet or openpyxl.worksheet._write_only.WriteOnlyWorksheet
+        The sheet, which must not have any rows yet if it is write-only
+    number_formats: dict
+        The number formats, keyed by column index (starting at 1)
+    """
+    for col_idx, number_format in number_formats.items():
+        worksheet.column_dimensions[get_column_letter(col_idx)].number_format = number_format
+
+
+def column_formats(worksheet, col_count):
+    """
+    Get the number formats of the columns of a regular sheet, as set by set_column_formats.
+
+    Parameters
+    ----------
+    worksheet: openpyxl.Worksheet
+        The sheet
+    col_count: int
+        How many columns, starting from the first one
+
+    Returns
+    -------
+    list of str or None
+        The number format of every column, or None for the columns without a style
+    """
+    number_formats = []
+    for col_idx in range(1, col_count + 1):
+        column = get_column_letter(col_idx)
+        if column in worksheet.column_dimensions and\
+                worksheet.column_dimensions[column].has_style:
+            number_formats.append(worksheet.column_dimensions[column].number_format)
+        else:
+            number_formats.append(None)
+
+    return number_formats
+
+
+class StreamingSheet():
+    """
+    Row-appending wrapper around a write-only worksheet.
+
+    A write-only worksheet streams every appended row to disk, so cells cannot be read back or
+    modified later. Everything that the rest of the analyzer used to look up in the cells is
+    therefore recorded as the rows are written instead: the row count, the last row, and the
+    column widths required for the headers.
+
+    The widths are learned from the first space_depth rows, using the same rule as space_columns.
+    Since write-only column widths must be set before the first row is written, those rows are
+    held back until they are all known, which is never more than a handful of rows.
+    """
+
+    def __init__(self, worksheet, space_depth=None, space_cols=0, number_formats=None):
+        """
+        Parameters
+        ----------
+        worksheet: openpyxl.worksheet._write_only.WriteOnlyWorksheet
+            The write-only sheet where the rows are written
+        space_depth: int=None
+            How many of the first rows are used to size the columns, see space_columns.
+            Default is None, which leaves the column widths as they are
+        space_cols: int=0
+            How many columns are sized, see space_columns
+        number_formats: dict=None
+            Number formats applied to the columns, and to all of their cells after the first
+            space_depth rows, keyed by column index (starting at 1)
+        """
+        self.worksheet = worksheet
+        self.space_depth = space_depth
+        self.space_cols = space_cols
+
+        self.row_count = 0
+        self.last_row = None
+
+        self._held_rows = []
+        self._flushed = space_depth is None
+
+        # One styled cell per formatted column, which is refilled for every row. Write-only
+        # sheets serialize appended rows immediately, so the same cell objects can be reused.
+        self._template_cells = {}
+        if number_formats:
+            set_column_formats(worksheet, number_formats)
+            for col_idx, number_format in number_formats.items():
+                cell = WriteOnlyCell(worksheet)
+                cell.number_format = number_format
+                self._template_cells[col_idx] = cell
+
+    @property
+    def title(self):
+        return self.worksheet.title
+
+    @property
+    def sheet_view(self):
+        return self.worksheet.sheet_view
+
+    @property
+    def sheet_state(self):
+        return self.worksheet.sheet_state
+
+    @sheet_state.setter
+    def sheet_state(self, state):
+        self.worksheet.sheet_state = state
+
+    @property
+    def max_row(self):
+        """The index of the last row, following openpyxl in reporting 1 for an empty sheet"""
+        return max(self.row_count, 1)
+
+    def add_chart(self, chart, anchor=None):
+        self.worksheet.add_chart(chart, anchor)
+
+    def append(self, row):
+        """
+        Append a row of values after the last row of the sheet.
+
+        Parameters
+        ----------
+        row: list or tuple
+            The values of the row, starting at the first column
+        """
+        self.row_count += 1
+        self.last_row = row
+
+        if not self._flushed:
+            self._held_rows.append(row)
+            if len(self._held_rows) > self.space_depth:
+                self.flush()
+            return
+
+        if self._template_cells:
+            row = list(row)
+            for col_idx, cell in self._template_cells.items():
+                value = row[col_idx - 1] if col_idx <= len(row) else None
+                if value is not None:
+                    cell.value = value
+                    if isinstance(value, str) and value == SHARED_FORMULA:
+                        cell.data_type = 'f'
+                    row[col_idx - 1] = cell
+
+        if SHARED_FORMULA in row:
+            row = [self._formula_cell() if value == SHARED_FORMULA else value for value in row]
+
+        self.worksheet.append(row)
+
+    def flush(self):
+        """
+        Size the columns from the rows held back so far, and write those rows.
+
+        This is done automatically once enough rows have been appended, or when the workbook
+        is saved.
+        """
+        if self._flushed:
+            return
+        self._flushed = True
+
+        spaced_rows = self._held_rows[:self.space_depth]
+        wrapped = set()
+
+        col_count = 1
+        while True:
+            max_width = 0
+            for row_offset, row in enumerate(spaced_rows):
+                value = row[col_count - 1] if col_count <= len(row) else None
+                if isinstance(value, str):
+                    max_width = max(max_width, len(value))
+                    wrapped.add((row_offset, col_count))
+
+            self.worksheet.column_dimensions[get_column_letter(col_count)].width = int(
+                0.75 * max_width)
+            wrapped.add((0, col_count))
+
+            col_count += 1
+
+            # Same exit condition as space_columns
+            if self.space_cols:
+                if col_count >= self.space_cols:
+                    break
+            elif not spaced_rows or col_count > len(spaced_rows[0]) or\
+                    not spaced_rows[0][col_count - 1]:
+                break
+
+        held_rows = self._held_rows
+        self._held_rows = []
+        for row_offset, row in enumerate(held_rows):
+            if row_offset < len(spaced_rows):
+                row = [self._wrapped_cell(value) if (row_offset, col_idx) in wrapped
+                       and value is not None else value
+                       for col_idx, value in enumerate(row, 1)]
+                self.worksheet.append(row)
+            else:
+                self.row_count -= 1
+                self.append(row)
+
+    def _formula_cell(self):
+        cell = WriteOnlyCell(self.worksheet, SHARED_FORMULA)
+        cell.data_type = 'f'
+        return cell
+
+    def _wrapped_cell(self, value):
+        cell = WriteOnlyCell(self.worksheet, value)
+        cell.alignment = Alignment(wrap_text=True)
+        return cell
+
+
+class StreamingWorkbook():
+    """
+    Write-only workbook that streams the rows of every sheet to disk as they are appended.
+
+    The memory used does not grow with the amount of data, as opposed to a regular
+    openpyxl.Workbook which keeps an object for every cell. It mimics the parts of the
+    openpyxl.Workbook interface that are used by the analyzer, and its sheets are StreamingSheet.
+    """
+
+    def __init__(self):
+        self.workbook = WB(write_only=True)
+        self._sheets = {}
+
+    @property
+    def sheetnames(self):
+        return self.workbook.sheetnames
+
+    @property
+    def defined_names(self):
+        return self.workbook.defined_names
+
+    def __getitem__(self, title):
+        return self._sheets[title]
+
+    def create_sheet(self, title, space_depth=None, space_cols=0, number_formats=None):
+        """
+        Create a new sheet at the end of the workbook.
+
+        Parameters
+        ----------
+        title: str
+            The title of the sheet
+        space_depth, space_cols, number_formats:
+            See StreamingSheet
+
+        Returns
+        -------
+        StreamingSheet
+            The created sheet
+        """
+        sheet = StreamingSheet(self.workbook.create_sheet(title=title),
+                               space_depth, space_cols, number_formats)
+        self._sheets[sheet.title] = sheet
+        return sheet
+
+    def remove(self, sheet):
+        """
+        Remove a sheet from the workbook, discarding the rows already streamed to it.
+
+        Parameters
+        ----------
+        sheet: StreamingSheet
+            The sheet
+        """
+        sheet.worksheet.close()
+        self.workbook.remove(sheet.worksheet)
+        del self._sheets[sheet.title]
+
+    def save(self, filename):
+        """
+        Write any rows that are still held back, and save the workbook.
+
+        As with any write-only workbook, this can only be done once.
+        """
+        for sheet in self._sheets.values():
+            sheet.flush()
+        save_workbook(self.workbook, filename)
+
+
+def create_workbook(write_only=False):
+    """
+    Create an empty workbook for the analysis output.
+
+    Parameters
+    ----------
+    write_only: bool=False
+        Whether a StreamingWorkbook is created instead of a regular openpyxl.Workbook
+
+    Returns
+    -------
+    openpyxl.Workbook or StreamingWorkbook
+        The created workbook
+    """
+    if write_only:
+        return StreamingWorkbook()
+    return WB()
+
+
+def create_sheet(workbook, title, space_depth=None, space_cols=0, number_formats=None):
+    """
+    Create a sheet in either kind of workbook.
+
+    The spacing is only used by a StreamingWorkbook, which needs to know it before any rows are
+    written. The number formats are set for the columns of both kinds of sheets, and a
+    StreamingWorkbook also applies them to the cells as they are appended.
+
+    Parameters
+    ----------
+    workbook: openpyxl.Workbook or StreamingWorkbook
+        The workbook where the sheet is created
+    title: str
+        The title of the sheet
+    space_depth, space_cols, number_formats:
+        See StreamingSheet
+
+    Returns
+    -------
+    openpyxl.Worksheet or StreamingSheet
+        The created sheet
+    """
+    if isinstance(workbook, StreamingWorkbook):
+        return workbook.create_sheet(title, space_depth, space_cols, number_formats)
+
+    sheet = workbook.create_sheet(title=title)
+    if number_formats:
+        set_column_formats(sheet, number_formats)
+    return sheet